@@ -97,6 +97,8 @@ DATABASES = {
         "OPTIONS": {
             "charset": "utf8mb4",
             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
+            # Requis par `okofen_sync --engine native` (LOAD DATA LOCAL INFILE)
+            "local_infile": int(os.getenv("DB_LOCAL_INFILE", "0")),
         },
         # "CONN_MAX_AGE": 60,  # optionnel: garder les connexions ouvertes (seconds)
     }
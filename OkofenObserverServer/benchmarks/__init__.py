@@ -0,0 +1,33 @@
+"""
+Benchmarks du pipeline d'import Okofen.
+
+Les scripts s'exécutent depuis `OkofenObserverServer/`, par exemple:
+
+    python -m benchmarks.bench_rawdata_build --days 365
+
+Ils utilisent une base SQLite dédiée (voir `benchmarks.settings`) et ne touchent
+jamais à la base configurée dans `OkofenObserverServer.settings`.
+"""
+import os
+import sys
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = SERVER_DIR.parent
+
+# Comme manage.py: `src` est importé depuis la racine du dépôt
+for _p in (str(REPO_ROOT), str(SERVER_DIR)):
+    if _p not in sys.path:
+        sys.path.append(_p)
+
+
+def setup_django(migrate: bool = False):
+    """Initialise Django avec les réglages de benchmark."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    import django
+
+    django.setup()
+    if migrate:
+        from django.core.management import call_command
+
+        call_command("migrate", verbosity=0, interactive=False)
@@ -0,0 +1,60 @@
+"""
+Débit d'insertion RawData (lignes/s) par moteur de `bulk_load.insert_rows`.
+
+Chaque moteur insère les mêmes lignes dans une table vide, puis une seconde fois
+pour vérifier que les doublons sont ignorés (le nombre de lignes ne change pas).
+
+    python -m benchmarks.bench_bulk_load --days 90
+    BENCH_DB_NAME=/tmp/bench.sqlite3 python -m benchmarks.bench_bulk_load
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import tempfile
+import time
+
+from benchmarks import setup_django
+from benchmarks.synthetic import generate_touch_files
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=90, help="Nombre de fichiers journaliers synthétiques")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    setup_django(migrate=True)
+    from django.db import connection
+
+    from okofen_data.bulk_load import ENGINES, insert_rows
+    from okofen_data.models import RawData
+    from okofen_data.update_db import build_rawdata_rows, iter_parsed_files
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = generate_touch_files(tmp, dt.date(2023, 1, 1), args.days)
+        rows = []
+        for _, parsed in iter_parsed_files(files):
+            rows.extend(build_rawdata_rows(parsed)[0])
+
+    print(f"backend: {connection.vendor}, {len(rows)} lignes, batch_size={args.batch_size}")
+    for engine in ENGINES:
+        RawData.objects.all().delete()
+        t0 = time.perf_counter()
+        insert_rows(rows, batch_size=args.batch_size, engine=engine)
+        elapsed = time.perf_counter() - t0
+        count = RawData.objects.count()
+
+        t0 = time.perf_counter()
+        insert_rows(rows, batch_size=args.batch_size, engine=engine)
+        elapsed_dup = time.perf_counter() - t0
+        assert RawData.objects.count() == count == len(rows), "doublons mal gérés"
+
+        print(
+            f"{engine:7s}: {elapsed:7.2f}s  {len(rows) / elapsed:10.0f} lignes/s"
+            f"  | ré-import (doublons ignorés): {len(rows) / elapsed_dup:10.0f} lignes/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
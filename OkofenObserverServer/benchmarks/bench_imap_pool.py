@@ -0,0 +1,76 @@
+"""
+Téléchargement des pièces jointes Okofen depuis un serveur IMAP local simulé
+(`benchmarks.fake_imap`): une connexion (séquentiel) contre un pool de N connexions.
+
+Chaque commande IMAP subit `--latency` secondes de délai pour simuler le réseau;
+`--drop-every n` coupe une connexion tous les n FETCH pour mesurer les reprises.
+
+    python -m benchmarks.bench_imap_pool --emails 365 --workers 1,2,4,8 --latency 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import filecmp
+import os
+import tempfile
+import time
+
+from benchmarks import setup_django
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emails", type=int, default=365, help="Nombre d'emails (un CSV journalier chacun)")
+    parser.add_argument("--workers", default="1,2,4,8", help="Tailles de pool à mesurer, séparées par des virgules")
+    parser.add_argument("--batch-size", type=int, default=50, help="UID par lot (BODYSTRUCTURE + BODY.PEEK)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Délai simulé par commande IMAP (s)")
+    parser.add_argument("--drop-every", type=int, default=None, help="Coupe une connexion tous les n FETCH")
+    parser.add_argument("--retries", type=int, default=None, help="Reprises d'un lot après une coupure (défaut: FETCH_RETRIES)")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from benchmarks.fake_imap import FakeImapServer, OKOFEN_SENDER, seed_synthetic_mailbox
+    from src.mailler import FETCH_RETRIES, EmailConnector
+
+    retries = FETCH_RETRIES if args.retries is None else args.retries
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with FakeImapServer(latency=args.latency, drop_after=args.drop_every) as server:
+            files, seeded = seed_synthetic_mailbox(server, os.path.join(tmp, "src"), args.emails)
+            print(f"{args.emails} emails ({seeded / 1e6:.1f} Mo), latence {args.latency * 1000:.0f} ms/commande")
+            for workers in (int(w) for w in args.workers.split(",")):
+                out_dir = os.path.join(tmp, f"out_{workers}")
+                os.makedirs(out_dir)
+                connector = EmailConnector(
+                    server.username, server.password, "127.0.0.1", server.port, use_ssl=False
+                )
+                connector.verbose = False
+                connector.connect_mailbox()
+                connector.set_directory("INBOX", readonly=False)
+                uids = connector.search_new_emails("FROM", OKOFEN_SENDER)
+                bytes_before = server.bytes_sent
+
+                t0 = time.perf_counter()
+                received = 0
+                for uid, attachments in connector.fetch_attachment_parts(
+                    uids, batch_size=args.batch_size, workers=workers, retries=retries
+                ):
+                    assert attachments is not None, f"email {uid} incomplete"
+                    for filename, payload in attachments:
+                        with open(os.path.join(out_dir, filename), "wb") as fp:
+                            fp.write(payload)
+                    received += 1
+                elapsed = time.perf_counter() - t0
+                connector.logout_mailbox()
+
+                assert received == len(uids) == args.emails
+                assert all(filecmp.cmp(f, os.path.join(out_dir, os.path.basename(f)), shallow=False) for f in files)
+                transferred = server.bytes_sent - bytes_before
+                print(
+                    f"workers={workers:2d}: {elapsed:7.2f}s  {received / elapsed:8.1f} emails/s"
+                    f"  {transferred / elapsed / 1e6:6.2f} Mo/s"
+                )
+
+
+if __name__ == "__main__":
+    main()
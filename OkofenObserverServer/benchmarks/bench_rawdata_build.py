@@ -0,0 +1,84 @@
+"""
+Avant/après: construction des objets RawData dans `update_db`.
+
+- "legacy": une recherche `current.loc[idx, col]` par champ et par ligne + make_aware par ligne
+  (implémentation historique, recopiée ci-dessous).
+- "vectorized": `parsing.frame_to_parsed` + `update_db.build_rawdata_objects`
+  (colonnes NumPy, localisation tz vectorisée).
+
+    python -m benchmarks.bench_rawdata_build --days 365
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import tempfile
+import time
+
+from benchmarks import setup_django
+from benchmarks.synthetic import generate_touch_files
+
+
+def _legacy_build_objects(current, fields):
+    from django.utils.timezone import make_aware
+
+    from okofen_data.models import RawData
+
+    objs = []
+    for idx in current.index:
+        objs.append(
+            RawData(
+                datetime=make_aware(current.loc[idx, 'datetime']),
+                **{
+                    name: current.loc[idx, label] if label in current.columns else None
+                    for name, label, _ in fields
+                },
+            )
+        )
+    return objs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=365, help="Nombre de fichiers journaliers synthétiques")
+    parser.add_argument("--start", default="2023-01-01", help="Premier jour (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from okofen_data.parsing import frame_to_parsed, get_date_from_filename, prepare_frame
+    from okofen_data.update_db import RAW_FIELDS, RAW_LABELS, build_rawdata_objects
+    from src.okofen import read_okfen_data
+
+    start = dt.datetime.strptime(args.start, "%Y-%m-%d").date()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        files = generate_touch_files(tmp, start, args.days)
+        print(f"Génération de {len(files)} fichiers: {time.perf_counter() - t0:.1f}s")
+
+        t0 = time.perf_counter()
+        frames = [prepare_frame(read_okfen_data(f), get_date_from_filename(f), f) for f in files]
+        print(f"Lecture + normalisation: {time.perf_counter() - t0:.1f}s")
+
+    rows = sum(len(f) for f in frames)
+
+    t0 = time.perf_counter()
+    legacy = [_legacy_build_objects(f, RAW_FIELDS) for f in frames]
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vectorized = [
+        build_rawdata_objects(frame_to_parsed(f, "", get_date_from_filename(name), RAW_LABELS))[0]
+        for name, f in zip(files, frames)
+    ]
+    t_vector = time.perf_counter() - t0
+
+    assert sum(map(len, legacy)) == sum(map(len, vectorized)) == rows
+    print(f"{rows} lignes")
+    print(f"legacy     : {t_legacy:8.2f}s  ({rows / t_legacy:10.0f} lignes/s)")
+    print(f"vectorized : {t_vector:8.2f}s  ({rows / t_vector:10.0f} lignes/s)")
+    print(f"speedup    : {t_legacy / t_vector:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
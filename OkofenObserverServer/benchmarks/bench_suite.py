@@ -0,0 +1,249 @@
+"""
+Suite de benchmarks du chemin de synchronisation, sur SQLite.
+
+Pour chaque jeu de données synthétique (1 mois, 1 an, 5 ans, se terminant hier
+pour que `lastdays` tombe sur des données), mesure:
+
+- update_db: import initial, puis ré-exécution sans changement (manifeste)
+- daily_stats.recompute_all
+- les endpoints JSON (daydata, range 30 j / 365 j, lastdays 7 j), en client authentifié
+
+Le rapport JSON (`--output`, sinon la sortie standard; la progression va sur
+la sortie d'erreur) contient l'environnement (commit git, versions) et une
+entrée par mesure; `--compare` affiche le ratio avec un rapport précédent.
+
+    python -m benchmarks.bench_suite --datasets 1m,1y --output bench_report.json
+    python -m benchmarks.bench_suite --datasets 1m --compare bench_report.json
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import REPO_ROOT, setup_django
+from benchmarks.synthetic import generate_touch_files
+
+DATASETS = {"1m": 30, "1y": 365, "5y": 1826}
+
+# (nom, fonction(dernier jour, nb de jours du jeu) -> url | None)
+ENDPOINTS = [
+    ("daydata", lambda last, n: f"/data/daydata/{last.year}/{last.month}/{last.day}/json/"),
+    ("range_30d", lambda last, n: f"/data/range/{last - dt.timedelta(days=29)}/{last}/json/" if n >= 30 else None),
+    ("range_365d", lambda last, n: f"/data/range/{last - dt.timedelta(days=364)}/{last}/json/" if n >= 365 else None),
+    ("lastdays_7d", lambda last, n: "/data/lastdays/7/json/"),
+]
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _environment() -> dict:
+    import django
+    import numpy
+    import pandas
+
+    return {
+        "created_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "django": django.__version__,
+        "pandas": pandas.__version__,
+        "numpy": numpy.__version__,
+    }
+
+
+def _timed(fn, repeat: int = 1) -> tuple[list[float], object]:
+    times, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return times, result
+
+
+def _entry(dataset: str, step: str, times: list[float], rows: int | None = None, **extra) -> dict:
+    entry = {
+        "dataset": dataset,
+        "step": step,
+        "seconds": min(times),
+        "median_seconds": statistics.median(times),
+        "runs": len(times),
+    }
+    if rows is not None:
+        entry["rows"] = rows
+        entry["rows_per_sec"] = rows / entry["seconds"] if entry["seconds"] > 0 else None
+    entry.update(extra)
+    return entry
+
+
+def _dataset_files(data_root: str, name: str, start: dt.date, days: int) -> list[str]:
+    directory = os.path.join(data_root, f"{name}_{start:%Y%m%d}")
+    if os.path.isdir(directory):
+        existing = sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".csv"))
+        if len(existing) == days:
+            return existing
+    return generate_touch_files(directory, start, days, replicated_headers=1)
+
+
+def run_dataset(name: str, days: int, data_root: str, args, client) -> list[dict]:
+    from okofen_data import daily_stats
+    from okofen_data.models import DailyStat, IngestedFile, RawData
+    from okofen_data.update_db import update_db
+
+    RawData.objects.all().delete()
+    DailyStat.objects.all().delete()
+    IngestedFile.objects.all().delete()
+
+    last = dt.date.today() - dt.timedelta(days=1)
+    start = last - dt.timedelta(days=days - 1)
+    t0 = time.perf_counter()
+    files = _dataset_files(data_root, name, start, days)
+    print(f"[{name}] {len(files)} fichiers ({time.perf_counter() - t0:.1f}s de génération)", file=sys.stderr)
+
+    directory = os.path.dirname(files[0])
+    config_path = os.path.join(directory, "config_okofen.json")
+    with open(config_path, "w") as fp:
+        json.dump(
+            {
+                "data_dir": directory,
+                "gmail_acount": "bench@example.com",
+                "gmail_passwd": "",
+                "email_subject_key_serach": "",
+                "gmail_box": "INBOX",
+            },
+            fp,
+        )
+    schema_cache = os.path.join(directory, "okofen_schemas.json")
+    if os.path.exists(schema_cache):
+        os.remove(schema_cache)
+
+    def _update():
+        update_db(
+            config_path=config_path,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            engine=args.engine,
+            csv_engine=args.csv_engine,
+        )
+
+    results = []
+    times, _ = _timed(_update)
+    rows = RawData.objects.count()
+    results.append(_entry(name, "update_db", times, rows, files=len(files)))
+    times, _ = _timed(_update, args.repeat)
+    results.append(_entry(name, "update_db_noop", times, files=len(files)))
+
+    times, stats = _timed(daily_stats.recompute_all)
+    results.append(_entry(name, "recompute_all", times, days=len(stats)))
+
+    for endpoint, make_url in ENDPOINTS:
+        url = make_url(last, days)
+        if url is None:
+            continue
+
+        def _get():
+            response = client.get(url)
+            assert response.status_code == 200, f"{url}: HTTP {response.status_code}"
+            return response
+
+        times, response = _timed(_get, args.repeat)
+        count = json.loads(response.content)["count"]
+        results.append(_entry(name, endpoint, times, count, bytes=len(response.content)))
+
+    for r in results:
+        rate = f"  {r['rows_per_sec']:10.0f} lignes/s" if r.get("rows_per_sec") else ""
+        print(f"[{name}] {r['step']:15s} {r['seconds']:8.3f}s{rate}", file=sys.stderr)
+    return results
+
+
+def _compare(results: list[dict], previous_path: str) -> None:
+    with open(previous_path) as fp:
+        previous = {(r["dataset"], r["step"]): r for r in json.load(fp)["results"]}
+    print(f"\nComparaison avec {previous_path} (ratio > 1 = plus lent):")
+    for r in results:
+        old = previous.get((r["dataset"], r["step"]))
+        if old and old["seconds"]:
+            ratio = r["seconds"] / old["seconds"]
+            print(f"  {r['dataset']:3s} {r['step']:15s} {old['seconds']:8.3f}s -> {r['seconds']:8.3f}s  x{ratio:.2f}")
+
+
+def main(argv=None):
+    setup_django()
+    from okofen_data.bulk_load import ENGINES
+    from src.okofen import CSV_ENGINES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", default=",".join(DATASETS), help=f"Jeux à mesurer parmi {', '.join(DATASETS)}")
+    parser.add_argument("--data-dir", default=None, help="Répertoire où générer (et réutiliser) les CSV synthétiques")
+    parser.add_argument("--output", default=None, help="Fichier du rapport JSON (défaut: sortie standard)")
+    parser.add_argument("--compare", default=None, help="Rapport JSON précédent à comparer")
+    parser.add_argument("--repeat", type=int, default=3, help="Répétitions des mesures courtes (endpoints, no-op)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--engine", choices=ENGINES, default="native")
+    parser.add_argument("--csv-engine", choices=CSV_ENGINES, default="c")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.datasets.split(",") if n.strip()]
+    unknown = [n for n in names if n not in DATASETS]
+    if unknown:
+        parser.error(f"jeux inconnus: {', '.join(unknown)}")
+
+    setup_django(migrate=True)
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    user, _ = get_user_model().objects.get_or_create(username="bench")
+    client = Client()
+    client.force_login(user)
+
+    report = {
+        "environment": _environment(),
+        "options": {
+            "database": connection.vendor,
+            "batch_size": args.batch_size,
+            "workers": args.workers,
+            "engine": args.engine,
+            "csv_engine": args.csv_engine,
+            "repeat": args.repeat,
+        },
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        data_root = args.data_dir or tmp
+        for name in names:
+            report["results"].extend(run_dataset(name, DATASETS[name], data_root, args, client))
+
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            fp.write(payload + "\n")
+        print(f"Rapport écrit dans {args.output}")
+    else:
+        print(payload)
+    if args.compare:
+        _compare(report["results"], args.compare)
+
+
+if __name__ == "__main__":
+    main()
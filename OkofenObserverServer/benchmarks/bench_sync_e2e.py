@@ -0,0 +1,132 @@
+"""
+Test de charge de bout en bout de `manage.py okofen_sync`, sans compte Gmail.
+
+Un serveur IMAP local (`benchmarks.fake_imap`) est alimenté de `--emails` rapports
+Okofen synthétiques (un CSV journalier chacun); la commande est lancée telle quelle
+sur une base SQLite vierge, avec un fichier de configuration pointant sur ce
+serveur (`imap_host`, `imap_port`, `imap_ssl: false`).
+
+Le rapport donne le débit (emails/s), les octets transférés et la répartition du
+temps entre fetch IMAP (attente réseau), décodage (BODYSTRUCTURE, base64),
+écriture des CSV, suppression des emails (STORE) et import en base. Les temps fetch / décodage sont cumulés sur
+toutes les connexions avec `--mail-workers` > 1.
+
+    python -m benchmarks.bench_sync_e2e --emails 365 --latency 0.02
+    python -m benchmarks.bench_sync_e2e --emails 365 --mail-workers 4 --stream --output e2e.json
+"""
+from __future__ import annotations
+
+import argparse
+import filecmp
+import json
+import os
+import sys
+import tempfile
+
+from benchmarks import setup_django
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emails", type=int, default=365, help="Nombre d'emails (un CSV journalier chacun)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Délai simulé par commande IMAP (s)")
+    parser.add_argument("--mail-workers", type=int, default=1, help="Connexions IMAP parallèles (mode parts)")
+    parser.add_argument("--fetch-mode", choices=("parts", "rfc822"), default="parts")
+    parser.add_argument("--stream", action="store_true", help="Import en flux (okofen_sync --stream)")
+    parser.add_argument("--engine", choices=("orm", "native"), default="native")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--output", default=None, help="Fichier du rapport JSON (défaut: sortie standard)")
+    args = parser.parse_args(argv)
+
+    setup_django(migrate=True)
+    from django.core.management import call_command
+
+    from benchmarks.fake_imap import OKOFEN_SENDER, FakeImapServer, seed_synthetic_mailbox
+    from okofen_data.management.commands.okofen_sync import Command
+    from okofen_data.models import RawData
+
+    with tempfile.TemporaryDirectory() as tmp, FakeImapServer(latency=args.latency) as server:
+        files, seeded = seed_synthetic_mailbox(server, os.path.join(tmp, "src"), args.emails)
+        data_dir = os.path.join(tmp, "data")
+        os.makedirs(data_dir)
+        config_path = os.path.join(tmp, "config_okofen.json")
+        with open(config_path, "w") as fp:
+            json.dump(
+                {
+                    "data_dir": data_dir,
+                    "gmail_acount": server.username,
+                    "gmail_passwd": server.password,
+                    "email_subject_key_serach": OKOFEN_SENDER,
+                    "gmail_box": "INBOX",
+                    "imap_host": "127.0.0.1",
+                    "imap_port": server.port,
+                    "imap_ssl": False,
+                },
+                fp,
+            )
+        print(f"{args.emails} emails ({seeded / 1e6:.1f} Mo), latence {args.latency * 1000:.0f} ms/commande", file=sys.stderr)
+
+        command = Command(stdout=sys.stderr, stderr=sys.stderr)
+        options = {
+            "config": config_path,
+            "verbose": 0,
+            "fetch_mode": args.fetch_mode,
+            "mail_workers": args.mail_workers,
+            "engine": args.engine,
+            "batch_size": args.batch_size,
+        }
+        if args.stream:
+            options["stream"] = True
+        call_command(command, **options)
+        metrics = command.metrics
+
+        downloaded = sorted(os.listdir(data_dir))
+        assert all(
+            filecmp.cmp(f, os.path.join(data_dir, os.path.basename(f)), shallow=False) for f in files
+        ), "fichiers téléchargés différents des CSV déposés"
+        rows = RawData.objects.count()
+
+    mail = metrics["mail"]
+    total = metrics["total_seconds"]
+    download = metrics["download_seconds"]
+    # Avec --stream, l'import se fait pendant le téléchargement (mesuré à part)
+    ingest = metrics["import_seconds"]
+    report = {
+        "options": vars(args),
+        "emails": mail["messages"],
+        "files": mail["files"],
+        "csv_files": len([f for f in downloaded if f.endswith(".csv")]),
+        "rows": rows,
+        "bytes_seeded": seeded,
+        "bytes_transferred": server.bytes_sent,
+        "bytes_received": mail["bytes"],
+        "total_seconds": total,
+        "download_seconds": download,
+        "emails_per_sec": mail["messages"] / download if download > 0 else None,
+        "rows_per_sec": rows / total if total > 0 else None,
+        "split_seconds": {
+            "fetch": mail["fetch_seconds"],
+            "decode": mail["decode_seconds"],
+            "write": mail["write_seconds"],
+            "delete": mail["delete_seconds"],
+            "ingest": ingest,
+        },
+    }
+    split = ", ".join(f"{k} {v:.2f}s" for k, v in report["split_seconds"].items())
+    print(
+        f"{report['emails']} emails en {download:.2f}s ({report['emails_per_sec']:.1f} emails/s), "
+        f"{report['bytes_received'] / 1e6:.1f} Mo reçus, {rows} lignes, total {total:.2f}s | {split}",
+        file=sys.stderr,
+    )
+
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            fp.write(payload + "\n")
+        print(f"Rapport écrit dans {args.output}")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,514 @@
+"""
+Serveur IMAP4rev1 minimal, en mémoire, pour tester et mesurer `EmailConnector`
+sans compte Gmail.
+
+Sous-ensemble implémenté: CAPABILITY, LOGIN, LOGOUT, NOOP, LIST, SELECT, EXAMINE,
+STATUS, SEARCH, FETCH, STORE, EXPUNGE, CLOSE et leurs variantes UID. FETCH gère
+UID, FLAGS, RFC822, RFC822.SIZE, BODYSTRUCTURE et BODY[...] / BODY.PEEK[...]
+(message entier ou section numérotée). Chaque connexion est servie dans son thread.
+
+    with FakeImapServer(latency=0.02) as server:
+        seed_mailbox(server, touch_files)
+        connector = EmailConnector(server.username, server.password, "127.0.0.1", server.port, use_ssl=False)
+"""
+from __future__ import annotations
+
+import datetime as dt
+import email
+import os
+import socketserver
+import ssl
+import threading
+import time
+from dataclasses import dataclass, field
+from email.message import EmailMessage, Message
+
+from benchmarks.synthetic import generate_touch_files
+
+OKOFEN_SENDER = "okofen@pellematic.example"
+OKOFEN_SUBJECT = "P0060B5_41F11E"
+
+
+@dataclass
+class StoredMessage:
+    uid: int
+    raw: bytes
+    flags: set[str] = field(default_factory=set)
+    _parsed: Message | None = None
+
+    @property
+    def message(self) -> Message:
+        if self._parsed is None:
+            self._parsed = email.message_from_bytes(self.raw)
+        return self._parsed
+
+
+class Mailbox:
+    def __init__(self, uidvalidity: int = 1):
+        self.uidvalidity = uidvalidity
+        self.messages: list[StoredMessage] = []
+        self.next_uid = 1
+        self.lock = threading.RLock()
+
+    def append(self, raw: bytes) -> int:
+        with self.lock:
+            uid = self.next_uid
+            self.messages.append(StoredMessage(uid, raw))
+            self.next_uid += 1
+            return uid
+
+
+def _quote(value) -> str:
+    if value is None:
+        return "NIL"
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _params(pairs) -> str:
+    pairs = [(k, v) for k, v in pairs if v is not None]
+    if not pairs:
+        return "NIL"
+    return "(" + " ".join(f"{_quote(k.upper())} {_quote(v)}" for k, v in pairs) + ")"
+
+
+def _payload_bytes(part: Message) -> bytes:
+    payload = part.get_payload()
+    if isinstance(payload, str):
+        return payload.encode("utf-8", "surrogateescape")
+    return part.as_bytes()
+
+
+def _disposition(part: Message) -> str:
+    disposition = part.get_content_disposition()
+    if not disposition:
+        return ""
+    filename = part.get_param("filename", header="content-disposition")
+    return f" NIL ({_quote(disposition.upper())} {_params([('filename', filename)])}) NIL NIL"
+
+
+def bodystructure(part: Message) -> str:
+    """BODYSTRUCTURE (RFC 3501 §7.4.2) d'une partie, extensions de disposition incluses."""
+    if part.get_content_type() == "message/rfc822":
+        # Email joint: enveloppe (date, sujet, message-id) puis structure du message imbriqué
+        inner = part.get_payload(0)
+        body = inner.as_bytes()
+        envelope = f"({_quote(inner.get('Date'))} {_quote(inner.get('Subject'))}{' NIL' * 7} {_quote(inner.get('Message-ID'))})"
+        encoding = (part.get("Content-Transfer-Encoding") or "7BIT").upper()
+        lines = body.count(b"\n") + 1
+        fields = (
+            f'"MESSAGE" "RFC822" NIL NIL NIL {_quote(encoding)} {len(body)} {envelope} '
+            f"{bodystructure(inner)} {lines}"
+        )
+        return f"({fields}{_disposition(part)})"
+    if part.is_multipart():
+        children = "".join(bodystructure(p) for p in part.get_payload())
+        return f'({children} {_quote(part.get_content_subtype().upper())})'
+    maintype = part.get_content_maintype().upper()
+    subtype = part.get_content_subtype().upper()
+    params = _params(part.get_params()[1:] if part.get_params() else [])
+    encoding = (part.get("Content-Transfer-Encoding") or "7BIT").upper()
+    body = _payload_bytes(part)
+    fields = f"{_quote(maintype)} {_quote(subtype)} {params} NIL NIL {_quote(encoding)} {len(body)}"
+    if maintype == "TEXT":
+        lines = body.count(b"\n") + 1
+        fields += f" {lines}"
+    return f"({fields}{_disposition(part)})"
+
+
+def _section(message: Message, section: str) -> bytes:
+    if section == "":
+        return message.as_bytes()
+    part = message
+    for index in section.split("."):
+        if part.get_content_type() == "message/rfc822":
+            # Sections d'un email joint: numérotées dans le message imbriqué
+            part = part.get_payload(0)
+        if not part.is_multipart():
+            if index == "1":
+                continue
+            raise KeyError(section)
+        part = part.get_payload()[int(index) - 1]
+    return _payload_bytes(part)
+
+
+def _tokenize(text: str) -> list:
+    """Découpe des arguments IMAP: atomes, chaînes entre guillemets, listes entre parenthèses."""
+    tokens: list = []
+    stack = [tokens]
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if c == " ":
+            i += 1
+        elif c == "(":
+            new: list = []
+            stack[-1].append(new)
+            stack.append(new)
+            i += 1
+        elif c == ")":
+            stack.pop()
+            i += 1
+        elif c == '"':
+            j, buf = i + 1, []
+            while text[j] != '"':
+                if text[j] == "\\":
+                    j += 1
+                buf.append(text[j])
+                j += 1
+            stack[-1].append("".join(buf))
+            i = j + 1
+        else:
+            j = i
+            depth = 0
+            while j < len(text) and (text[j] not in " ()" or depth):
+                if text[j] == "[":
+                    depth += 1
+                elif text[j] == "]":
+                    depth -= 1
+                j += 1
+            stack[-1].append(text[i:j])
+            i = j
+    return tokens
+
+
+def _parse_set(spec: str, largest: int) -> list[tuple[int, int]]:
+    ranges = []
+    for item in spec.split(","):
+        if ":" in item:
+            a, b = item.split(":")
+            a = largest if a == "*" else int(a)
+            b = largest if b == "*" else int(b)
+            ranges.append((min(a, b), max(a, b)))
+        else:
+            n = largest if item == "*" else int(item)
+            ranges.append((n, n))
+    return ranges
+
+
+def _in_set(n: int, ranges) -> bool:
+    return any(a <= n <= b for a, b in ranges)
+
+
+class ImapHandler(socketserver.StreamRequestHandler):
+    server: "FakeImapServer"
+
+    def send(self, line: str | bytes):
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+        self.wfile.write(line + b"\r\n")
+
+    def handle(self):
+        self.selected: Mailbox | None = None
+        self.readonly = True
+        self.authenticated = False
+        self.send("* OK [CAPABILITY IMAP4rev1] fake IMAP ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if self.server.drop_after is not None and b" FETCH " in line.upper():
+                with self.server.stats_lock:
+                    self.server.fetches += 1
+                    drop = self.server.fetches % self.server.drop_after == 0
+                if drop:
+                    return  # coupe la connexion sans réponse
+            if self.server.latency:
+                time.sleep(self.server.latency)
+            line = line.rstrip(b"\r\n").decode("utf-8", "replace")
+            tag, _, rest = line.partition(" ")
+            command, _, args = rest.partition(" ")
+            command = command.upper()
+            uid_mode = False
+            if command == "UID":
+                uid_mode = True
+                command, _, args = args.partition(" ")
+                command = command.upper()
+            handler = getattr(self, f"cmd_{command.lower()}", None)
+            if handler is None:
+                self.send(f"{tag} BAD unknown command {command}")
+                continue
+            try:
+                done = handler(tag, args, uid_mode)
+            except Exception as exc:  # réponse BAD plutôt que de couper la connexion
+                self.send(f"{tag} BAD {type(exc).__name__}: {exc}")
+                continue
+            self.wfile.flush()
+            if done:
+                return
+
+    # --- commandes sans état ---
+    def cmd_capability(self, tag, args, uid_mode):
+        self.send("* CAPABILITY IMAP4rev1 UIDPLUS")
+        self.send(f"{tag} OK CAPABILITY completed")
+
+    def cmd_noop(self, tag, args, uid_mode):
+        self.send(f"{tag} OK NOOP completed")
+
+    def cmd_logout(self, tag, args, uid_mode):
+        self.send("* BYE logging out")
+        self.send(f"{tag} OK LOGOUT completed")
+        return True
+
+    def cmd_login(self, tag, args, uid_mode):
+        user, password = _tokenize(args)[:2]
+        if (user, password) != (self.server.username, self.server.password):
+            self.send(f"{tag} NO [AUTHENTICATIONFAILED] Invalid credentials")
+            return
+        self.authenticated = True
+        self.send(f"{tag} OK LOGIN completed")
+
+    def cmd_list(self, tag, args, uid_mode):
+        for name in self.server.mailboxes:
+            self.send(f'* LIST (\\HasNoChildren) "/" {_quote(name)}')
+        self.send(f"{tag} OK LIST completed")
+
+    # --- boîtes ---
+    def _mailbox(self, name: str) -> Mailbox:
+        return self.server.mailboxes[name]
+
+    def _select(self, tag, args, readonly):
+        name = _tokenize(args)[0]
+        if name not in self.server.mailboxes:
+            self.send(f"{tag} NO no such mailbox")
+            return
+        box = self._mailbox(name)
+        self.selected, self.readonly = box, readonly
+        with box.lock:
+            self.send(f"* {len(box.messages)} EXISTS")
+            self.send("* 0 RECENT")
+            self.send(f"* OK [UIDVALIDITY {box.uidvalidity}] UIDs valid")
+            self.send(f"* OK [UIDNEXT {box.next_uid}] Predicted next UID")
+        mode = "READ-ONLY" if readonly else "READ-WRITE"
+        self.send(f"{tag} OK [{mode}] completed")
+
+    def cmd_select(self, tag, args, uid_mode):
+        self._select(tag, args, readonly=False)
+
+    def cmd_examine(self, tag, args, uid_mode):
+        self._select(tag, args, readonly=True)
+
+    def cmd_status(self, tag, args, uid_mode):
+        name, items = _tokenize(args)[:2]
+        box = self._mailbox(name)
+        values = {
+            "MESSAGES": len(box.messages),
+            "UIDNEXT": box.next_uid,
+            "UIDVALIDITY": box.uidvalidity,
+            "RECENT": 0,
+            "UNSEEN": sum("\\Seen" not in m.flags for m in box.messages),
+        }
+        body = " ".join(f"{i.upper()} {values[i.upper()]}" for i in items)
+        self.send(f"* STATUS {_quote(name)} ({body})")
+        self.send(f"{tag} OK STATUS completed")
+
+    # --- messages ---
+    def _targets(self, spec: str, uid_mode: bool) -> list[tuple[int, StoredMessage]]:
+        msgs = self.selected.messages
+        if uid_mode:
+            largest = msgs[-1].uid if msgs else 0
+            ranges = _parse_set(spec, largest)
+            return [(i + 1, m) for i, m in enumerate(msgs) if _in_set(m.uid, ranges)]
+        ranges = _parse_set(spec, len(msgs))
+        return [(i + 1, m) for i, m in enumerate(msgs) if _in_set(i + 1, ranges)]
+
+    def cmd_search(self, tag, args, uid_mode):
+        tokens = _tokenize(args)
+        if tokens and str(tokens[0]).upper() == "CHARSET":
+            tokens = tokens[2:]
+        with self.selected.lock:
+            matches = list(enumerate(self.selected.messages, start=1))
+            i = 0
+            while i < len(tokens):
+                key = str(tokens[i]).upper()
+                if key == "ALL":
+                    i += 1
+                elif key in ("FROM", "SUBJECT", "TO"):
+                    needle = tokens[i + 1].lower()
+                    matches = [(n, m) for n, m in matches if needle in str(m.message.get(key, "")).lower()]
+                    i += 2
+                elif key == "UID":
+                    allowed = {m.uid for _, m in self._targets(tokens[i + 1], True)}
+                    matches = [(n, m) for n, m in matches if m.uid in allowed]
+                    i += 2
+                elif key == "UNDELETED":
+                    matches = [(n, m) for n, m in matches if "\\Deleted" not in m.flags]
+                    i += 1
+                else:
+                    allowed = {m.uid for _, m in self._targets(tokens[i], False)}
+                    matches = [(n, m) for n, m in matches if m.uid in allowed]
+                    i += 1
+        ids = [str(m.uid if uid_mode else n) for n, m in matches]
+        self.send("* SEARCH" + "".join(" " + x for x in ids))
+        self.send(f"{tag} OK SEARCH completed")
+
+    def cmd_fetch(self, tag, args, uid_mode):
+        spec, _, items = args.partition(" ")
+        items = _tokenize(items)
+        if items and isinstance(items[0], list):
+            items = items[0]
+        items = [str(i).upper() for i in items]
+        if uid_mode and "UID" not in items:
+            items.insert(0, "UID")
+        with self.selected.lock:
+            targets = self._targets(spec, uid_mode)
+        for seq, msg in targets:
+            out = [f"* {seq} FETCH (".encode()]
+            first = True
+            for item in items:
+                prefix = b"" if first else b" "
+                first = False
+                if item == "UID":
+                    out.append(prefix + f"UID {msg.uid}".encode())
+                elif item == "FLAGS":
+                    out.append(prefix + f"FLAGS ({' '.join(sorted(msg.flags))})".encode())
+                elif item == "RFC822.SIZE":
+                    out.append(prefix + f"RFC822.SIZE {len(msg.raw)}".encode())
+                elif item == "BODYSTRUCTURE":
+                    out.append(prefix + f"BODYSTRUCTURE {bodystructure(msg.message)}".encode())
+                elif item in ("RFC822",) or item.startswith("BODY[") or item.startswith("BODY.PEEK["):
+                    section = "" if item == "RFC822" else item[item.index("[") + 1:item.index("]")]
+                    data = msg.raw if section == "" else _section(msg.message, section)
+                    name = "RFC822" if item == "RFC822" else f"BODY[{section}]"
+                    if not item.startswith("BODY.PEEK") and not self.readonly:
+                        msg.flags.add("\\Seen")
+                    out.append(prefix + f"{name} {{{len(data)}}}\r\n".encode() + data)
+                    with self.server.stats_lock:
+                        self.server.bytes_sent += len(data)
+                else:
+                    raise ValueError(f"unsupported FETCH item {item}")
+            out.append(b")")
+            self.send(b"".join(out))
+        self.send(f"{tag} OK FETCH completed")
+
+    def cmd_store(self, tag, args, uid_mode):
+        spec, mode, flags = args.split(" ", 2)
+        if self.readonly:
+            self.send(f"{tag} NO mailbox is read-only")
+            return
+        flags = set(_tokenize(flags)[0]) if flags.startswith("(") else {flags}
+        silent = mode.upper().endswith(".SILENT")
+        with self.selected.lock:
+            for seq, msg in self._targets(spec, uid_mode):
+                if mode.upper().startswith("+"):
+                    msg.flags |= flags
+                elif mode.upper().startswith("-"):
+                    msg.flags -= flags
+                else:
+                    msg.flags = set(flags)
+                if not silent:
+                    uid = f"UID {msg.uid} " if uid_mode else ""
+                    self.send(f"* {seq} FETCH ({uid}FLAGS ({' '.join(sorted(msg.flags))}))")
+        self.send(f"{tag} OK STORE completed")
+
+    def cmd_expunge(self, tag, args, uid_mode):
+        if self.readonly:
+            self.send(f"{tag} NO mailbox is read-only")
+            return
+        with self.selected.lock:
+            seq = 1
+            kept = []
+            for msg in self.selected.messages:
+                if "\\Deleted" in msg.flags:
+                    self.send(f"* {seq} EXPUNGE")
+                else:
+                    kept.append(msg)
+                    seq += 1
+            self.selected.messages[:] = kept
+        self.send(f"{tag} OK EXPUNGE completed")
+
+    def cmd_close(self, tag, args, uid_mode):
+        self.selected = None
+        self.send(f"{tag} OK CLOSE completed")
+
+
+class FakeImapServer(socketserver.ThreadingTCPServer):
+    """
+    Serveur IMAP en mémoire (thread d'arrière-plan). `latency` (secondes) simule le
+    temps réseau de chaque commande; `drop_after=n` coupe la connexion à chaque
+    n-ième commande FETCH reçue, pour tester les reprises.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        username: str = "okofen@example.com",
+        password: str = "secret",
+        ssl_context: ssl.SSLContext | None = None,
+        drop_after: int | None = None,
+        latency: float = 0.0,
+    ):
+        super().__init__((host, port), ImapHandler)
+        self.username = username
+        self.password = password
+        self.ssl_context = ssl_context
+        self.drop_after = drop_after
+        self.latency = latency
+        self.mailboxes: dict[str, Mailbox] = {"INBOX": Mailbox()}
+        self.stats_lock = threading.Lock()
+        self.fetches = 0
+        self.bytes_sent = 0
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def get_request(self):
+        sock, addr = super().get_request()
+        if self.ssl_context is not None:
+            sock = self.ssl_context.wrap_socket(sock, server_side=True)
+        return sock, addr
+
+    def start(self) -> "FakeImapServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-imap", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def make_okofen_email(path: str, sender: str = OKOFEN_SENDER, subject: str = OKOFEN_SUBJECT) -> bytes:
+    """Email de rapport Okofen: un court texte et le CSV `path` en pièce jointe (base64)."""
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = "okofen@example.com"
+    message["Subject"] = subject
+    message.set_content("Rapport Pellematic")
+    with open(path, "rb") as fp:
+        message.add_attachment(fp.read(), maintype="application", subtype="octet-stream", filename=os.path.basename(path))
+    return message.as_bytes()
+
+
+def seed_mailbox(server: FakeImapServer, paths: list[str], mailbox: str = "INBOX") -> int:
+    """Dépose un email Okofen par fichier dans `mailbox`; retourne le nombre d'octets déposés."""
+    box = server.mailboxes.setdefault(mailbox, Mailbox())
+    total = 0
+    for path in paths:
+        raw = make_okofen_email(path)
+        box.append(raw)
+        total += len(raw)
+    return total
+
+
+
+def seed_synthetic_mailbox(
+    server: FakeImapServer, directory: str, emails: int, start: dt.date = dt.date(2023, 1, 1), mailbox: str = "INBOX"
+) -> tuple[list[str], int]:
+    """Génère `emails` CSV journaliers synthétiques dans `directory` et les dépose, un par email.
+
+    Retourne les chemins des CSV (pour comparer avec les fichiers téléchargés) et les octets déposés.
+    """
+    paths = generate_touch_files(directory, start, emails)
+    return paths, seed_mailbox(server, paths, mailbox)
@@ -0,0 +1,11 @@
+"""Réglages Django pour les benchmarks: identiques au serveur, mais sur SQLite."""
+import os
+
+from OkofenObserverServer.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.getenv("BENCH_DB_NAME", ":memory:"),
+    }
+}
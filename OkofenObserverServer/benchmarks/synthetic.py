@@ -0,0 +1,120 @@
+"""
+Générateur de fichiers `touch_YYYYMMDD.csv` synthétiques au format Okofen:
+séparateur `;`, encodage ISO-8859-1, virgule décimale, une ligne par minute,
+avec éventuellement des lignes d'entête répliquées en cours de fichier (comme
+après un redémarrage de la chaudière).
+"""
+from __future__ import annotations
+
+import datetime as dt
+import os
+
+import numpy as np
+
+from okofen_data.parsing import KNOWN_HEADER_LINES
+from src.okofen import OKOFEN_CSV_ENCODING
+
+# Entête d'une chaudière Pellematic (firmware touch), y compris les colonnes non importées.
+HEADER = KNOWN_HEADER_LINES[0].split(';')
+
+# Colonnes d'état (pompes, statuts, contacts) écrites en entiers
+INTEGER_COLUMNS = {'PE1_BR1 ', 'HK1 Pumpe', 'HK1 Status', 'WW1 Pumpe', 'WW1 Status'}
+
+
+def _day_values(day: dt.date, rng: np.random.Generator, silo_kg: float) -> dict[str, np.ndarray]:
+    minutes = np.arange(1440)
+    hours = minutes / 60.0
+    season = np.cos(2 * np.pi * (day.timetuple().tm_yday - 15) / 365.0)  # 1 en hiver, -1 en été
+    ext = 8.0 - 10.0 * season + 4.0 * np.sin(2 * np.pi * (hours - 9) / 24) + rng.normal(0, 0.3, 1440)
+    heating = (ext < 16.0).astype(float)
+    room_target = np.where((hours >= 7) & (hours < 22), 20.0, 17.5)
+    room = room_target - 0.5 + rng.normal(0, 0.2, 1440)
+    # Cycles brûleur: allumé ~ 1 période sur 3 quand le chauffage est demandé
+    burner = (((minutes // 40) % 3) == 0) & (heating > 0)
+    flame = np.where(burner, 450.0 + rng.normal(0, 40, 1440), 60.0 + rng.normal(0, 5, 1440))
+    boiler = np.where(burner, 72.0, 55.0) + rng.normal(0, 1.5, 1440)
+    depart = np.where(heating > 0, 35.0 + (16.0 - ext), 20.0)
+    hopper = 45.0 - np.cumsum(burner * 0.02) % 30.0
+    ecs_target = np.where((hours >= 5) & (hours < 7), 55.0, 45.0)
+    ecs = ecs_target - 3.0 + rng.normal(0, 0.5, 1440)
+    return {
+        'AT [°C]': ext,
+        'ATakt [°C]': ext,
+        'PE1_BR1 ': burner.astype(float),
+        'HK1 VL Ist[°C]': depart + rng.normal(0, 0.5, 1440),
+        'HK1 VL Soll[°C]': depart,
+        'HK1 RT Ist[°C]': room,
+        'HK1 RT Soll[°C]': room_target,
+        'HK1 Pumpe': heating,
+        'HK1 Status': heating,
+        'WW1 EinT Ist[°C]': ecs,
+        'WW1 AusT Ist[°C]': ecs + 2.0,
+        'WW1 Soll[°C]': ecs_target,
+        'WW1 Pumpe': (ecs_target > 50).astype(float),
+        'WW1 Status': (ecs_target > 50).astype(float),
+        'PE1 KT[°C]': boiler,
+        'PE1 KT_SOLL[°C]': np.where(heating > 0, 70.0, 0.0),
+        'PE1 Modulation[%]': np.where(burner, 100.0, 0.0),
+        'PE1 FRT Ist[°C]': flame,
+        'PE1 FRT Soll[°C]': np.where(burner, 400.0, 0.0),
+        'PE1 Fuellstand[kg]': np.full(1440, silo_kg),
+        'PE1 Fuellstand ZWB[kg]': hopper,
+    }
+
+
+def write_touch_file(
+    directory: str,
+    day: dt.date,
+    rng: np.random.Generator,
+    silo_kg: float = 2500.0,
+    replicated_headers: int = 0,
+) -> str:
+    """
+    Écrit `touch_YYYYMMDD.csv` pour une journée (1440 lignes) et retourne son chemin.
+    `replicated_headers` lignes d'entête supplémentaires sont réparties dans le fichier.
+    """
+    values = _day_values(day, rng, silo_kg)
+    columns = []
+    for name in HEADER[2:]:
+        col = values.get(name)
+        if col is None:
+            columns.append(['0'] * 1440)
+        elif name in INTEGER_COLUMNS:
+            columns.append([str(int(v)) for v in col])
+        else:
+            columns.append([f"{v:.1f}".replace('.', ',') for v in col])
+    date_str = day.strftime('%d.%m.%Y')
+    header = ';'.join(HEADER)
+    step = 1440 // (replicated_headers + 1)
+    repeat_at = {step * (i + 1) for i in range(replicated_headers)}
+    lines = [header]
+    for minute, row in enumerate(zip(*columns)):
+        if minute in repeat_at:
+            lines.append(header)
+        lines.append(f"{date_str};{minute // 60:02d}:{minute % 60:02d}:00;" + ';'.join(row))
+    path = os.path.join(directory, f"touch_{day.strftime('%Y%m%d')}.csv")
+    with open(path, 'w', encoding=OKOFEN_CSV_ENCODING, newline='') as fp:
+        fp.write('\r\n'.join(lines) + '\r\n')
+    return path
+
+
+def generate_touch_files(
+    directory: str,
+    start: dt.date,
+    days: int,
+    seed: int = 0,
+    replicated_headers: int = 0,
+) -> list[str]:
+    """Génère `days` fichiers journaliers consécutifs à partir de `start`."""
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    return [
+        write_touch_file(
+            directory,
+            start + dt.timedelta(days=i),
+            rng,
+            silo_kg=2500.0 - (5.0 * i) % 2000.0,
+            replicated_headers=replicated_headers,
+        )
+        for i in range(days)
+    ]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Sequence
+
+from django.db import DatabaseError, connection, transaction
+
+from okofen_data.models import RawData
+
+# "orm": RawData.objects.bulk_create(ignore_conflicts=True)
+# "native": chargeur natif du backend (LOAD DATA LOCAL INFILE sur MySQL,
+#           executemany INSERT OR IGNORE dans une transaction sur SQLite)
+ENGINES = ("orm", "native")
+
+
+def _columns() -> list[str]:
+    return [f.column for f in RawData._meta.concrete_fields if f.name != "id"]
+
+
+def _insert_orm(rows: Sequence[tuple], batch_size: int) -> None:
+    objs = [RawData(None, *row) for row in rows]
+    RawData.objects.bulk_create(objs, batch_size=batch_size, ignore_conflicts=True)
+
+
+def _adapt(rows: Sequence[tuple]) -> list[tuple]:
+    adapt = connection.ops.adapt_datetimefield_value
+    return [(adapt(row[0]), *row[1:]) for row in rows]
+
+
+def _insert_executemany(rows: Sequence[tuple], batch_size: int, verb: str) -> None:
+    table = connection.ops.quote_name(RawData._meta.db_table)
+    cols = ", ".join(connection.ops.quote_name(c) for c in _columns())
+    placeholders = ", ".join(["%s"] * len(_columns()))
+    sql = f"{verb} INTO {table} ({cols}) VALUES ({placeholders})"
+    values = _adapt(rows)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for i in range(0, len(values), batch_size):
+            cursor.executemany(sql, values[i:i + batch_size])
+
+
+def _tsv_value(value) -> str:
+    return "\\N" if value is None else str(value)
+
+
+def _insert_mysql_load_data(rows: Sequence[tuple]) -> None:
+    table = connection.ops.quote_name(RawData._meta.db_table)
+    cols = ", ".join(connection.ops.quote_name(c) for c in _columns())
+    fd, path = tempfile.mkstemp(prefix="okofen_rawdata_", suffix=".tsv")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as fp:
+            for row in _adapt(rows):
+                fp.write("\t".join(_tsv_value(v) for v in row))
+                fp.write("\n")
+        # IGNORE: les doublons de clé unique (datetime) sont ignorés, comme ignore_conflicts=True
+        sql = (
+            f"LOAD DATA LOCAL INFILE %s IGNORE INTO TABLE {table} "
+            f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({cols})"
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, [path])
+    finally:
+        os.remove(path)
+
+
+def insert_rows(rows: Sequence[tuple], batch_size: int = 1000, engine: str = "orm") -> None:
+    """
+    Insère des tuples (datetime, *champs RawData) en ignorant les datetimes déjà présents.
+
+    Le moteur "native" retombe sur un executemany INSERT IGNORE si LOAD DATA LOCAL INFILE
+    est refusé par MySQL (option local_infile désactivée), et sur l'ORM pour les autres backends.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Moteur d'insertion inconnu: {engine} (attendu: {', '.join(ENGINES)})")
+    if not rows:
+        return
+    vendor = connection.vendor
+    if engine == "orm" or vendor not in ("mysql", "sqlite"):
+        _insert_orm(rows, batch_size)
+    elif vendor == "sqlite":
+        _insert_executemany(rows, batch_size, "INSERT OR IGNORE")
+    else:
+        try:
+            _insert_mysql_load_data(rows)
+        except DatabaseError:
+            _insert_executemany(rows, batch_size, "INSERT IGNORE")
@@ -0,0 +1,91 @@
+"""
+Compression des réponses de données: brotli si le client l'accepte et que le paquet
+`brotli` est installé (optionnel), sinon gzip (compress_string / compress_sequence
+de Django, comme GZipMiddleware).
+"""
+from __future__ import annotations
+
+import re
+from functools import wraps
+
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# En dessous, la compression ne fait rien gagner
+MIN_SIZE = 200
+BROTLI_QUALITY = 5
+
+_accepts = {
+    name: re.compile(rf"\b{name}\b(?!\s*;\s*q=0(\.0*)?\s*(,|$))") for name in ("br", "gzip")
+}
+
+
+def accepted_encoding(accept_encoding: str) -> str | None:
+    if brotli is not None and _accepts["br"].search(accept_encoding):
+        return "br"
+    if _accepts["gzip"].search(accept_encoding):
+        return "gzip"
+    return None
+
+
+def _brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for item in sequence:
+        chunk = compressor.process(item)
+        if chunk:
+            yield chunk
+    yield compressor.finish()
+
+
+def compress_streaming(response, accept_encoding: str):
+    """Compresse au fil de l'eau le contenu d'une StreamingHttpResponse."""
+    if response.has_header("Content-Encoding"):
+        return response
+    patch_vary_headers(response, ("Accept-Encoding",))
+    encoding = accepted_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    if encoding == "br":
+        response.streaming_content = _brotli_sequence(response.streaming_content)
+    else:
+        response.streaming_content = compress_sequence(response.streaming_content)
+    response["Content-Encoding"] = encoding
+    return response
+
+
+def compress(response, accept_encoding: str):
+    """Compresse le contenu d'une réponse selon Accept-Encoding."""
+    if response.streaming:
+        return compress_streaming(response, accept_encoding)
+    if response.has_header("Content-Encoding") or len(response.content) < MIN_SIZE:
+        return response
+    patch_vary_headers(response, ("Accept-Encoding",))
+    encoding = accepted_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    if encoding == "br":
+        content = brotli.compress(response.content, quality=BROTLI_QUALITY)
+    else:
+        content = compress_string(response.content)
+    if len(content) >= len(response.content):
+        return response
+    response.content = content
+    response["Content-Length"] = str(len(content))
+    response["Content-Encoding"] = encoding
+    return response
+
+
+def compress_response(view):
+    """Décorateur de vue: compression brotli / gzip de la réponse."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        return compress(response, request.headers.get("Accept-Encoding", ""))
+
+    return wrapper
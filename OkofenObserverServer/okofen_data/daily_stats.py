@@ -102,13 +102,28 @@ def _ecs_means(df: pd.DataFrame) -> tuple[float | None, float | None]:
     return heating_mean, global_mean
 
 
+# Colonnes utiles au calcul des statistiques journalières (seules lues en base)
+DAILY_METRICS: tuple[str, ...] = (
+    'T°C Flamme',
+    'Status Chauff.',
+    'T°C Départ Consigne',
+    'Circulateur Chauffage (On/Off)',
+    'T°C ECS',
+    'T°C ECS Consigne',
+    'Niveau tremis kg',
+    'T°C Extérieure',
+    'T°C Chaudière',
+    'T°C Départ',
+    'T°C Ambiante',
+)
+
+
 def _fetch_dataframe(window: DayWindow) -> pd.DataFrame:
     qs = RawData.objects.filter(datetime__gte=window.start, datetime__lt=window.end).order_by('datetime')
-    objs = list(qs)
-    if not objs:
+    df = data_api.query_values(qs, list(DAILY_METRICS))
+    if df.empty:
         return pd.DataFrame()
-    df = data_api.get_values(objs)
-    return df.sort_index()
+    return df
 
 
 @transaction.atomic
@@ -1,6 +1,9 @@
 from okofen_data.models import RawData
 from datetime import datetime, timedelta
+from itertools import islice
+import numpy as np
 import pandas as pd
+from django.db.models import QuerySet
 from django.utils.timezone import make_aware
 
 '''
@@ -8,67 +11,132 @@ import okofen_data.data_api as api
 start_date=datetime(2023, 1, 1)
 end_date=datetime(2023,1,30)
 df = api.get_data_by_dates(start_date,end_date)
-'''    
-def get_values(objs:list[RawData])->pd.DataFrame():
-    output={'datetime':[] ,
-    'T°C Extérieure':[] ,
-    'T°C Ambiante':[] ,
-    'T°C Ambiante Consigne':[] ,
-    'Niveau Sillo kg':[] ,
-    'Niveau tremis kg':[] ,  
-    'T°C Chaudière':[] ,
-    'T°C Chaudière Consigne':[] ,
-    'PE1 Modulation[%]':[] ,
-    'T°C Flamme':[],
-    'T°C Flamme Consigne':[] ,
-    'T°C Départ':[] ,
-    'T°C Départ Consigne':[] ,
-    'Circulateur Chauffage (On/Off)':[] ,
-    'Status Chauff.':[] ,
-    'T°C ECS':[] ,
-    'T°C ECS (arret)':[] ,
-    'T°C ECS Consigne':[] ,
-    'Circulateur ECS':[] ,
-    'Status ESC':[] }
-    for obj in objs:
-        output['datetime'].append(obj.datetime)
-        output['T°C Extérieure'].append(obj.ext_temp)
-        output['T°C Ambiante'].append(obj.house_temp)
-        output['T°C Ambiante Consigne'].append(obj.house_temp_target)
-        output['Niveau Sillo kg'].append(obj.silo_level)
-        output['Niveau tremis kg'].append(obj.hopper_level)  
-        output['T°C Chaudière'].append(obj.boiler_water_temp)
-        output['T°C Chaudière Consigne'].append(obj.boiler_water_temp_target)
-        output['PE1 Modulation[%]'].append(obj.boiler_modulation)
-        output['T°C Flamme'].append(obj.boiler_fire_temps),
-        output['T°C Flamme Consigne'].append(obj.boiler_fire_temps_atrget)
-        output['T°C Départ'].append(obj.heating_start_circulation_temp)
-        output['T°C Départ Consigne'].append(obj.heating_start_circulation_temp_target)
-        output['Circulateur Chauffage (On/Off)'].append(obj.heating_circulation)
-        output['Status Chauff.'].append(obj.heating_status)
-        output['T°C ECS'].append(obj.water_temp)
-        output['T°C ECS (arret)'].append(obj.water_stop_temp)
-        output['T°C ECS Consigne'].append(obj.water_temp_target)
-        output['Circulateur ECS'].append(obj.water_circulation)
-        output['Status ESC'].append(obj.water_status)
-    return pd.DataFrame(output).set_index('datetime')
-
-def get_data_by_dates(start_date:datetime,end_date:datetime)->pd.DataFrame:
-    objs = RawData.objects.filter(datetime__range=[make_aware(start_date),make_aware(end_date)]).order_by('datetime')
-    return get_values(objs)
+df = api.get_data_by_dates(start_date,end_date,metrics=['T°C Extérieure','T°C Ambiante'])
+df = api.get_data_by_dates(start_date,end_date,max_points=1000)  # agrégats 5 min / horaires
+'''
+
+# Libellé français (verbose_name) -> champ RawData, dans l'ordre du modèle
+METRIC_FIELDS: dict[str, str] = {
+    str(f.verbose_name): f.name
+    for f in RawData._meta.concrete_fields
+    if f.name not in ('id', 'datetime')
+}
+INT_METRICS: frozenset[str] = frozenset(
+    str(f.verbose_name) for f in RawData._meta.concrete_fields if f.get_internal_type() == 'IntegerField'
+)
+QUERY_CHUNK_SIZE = 5000
+
+def query_values(qs: QuerySet, metrics: list[str] | None = None, chunk_size: int = QUERY_CHUNK_SIZE) -> pd.DataFrame:
+    """
+    DataFrame (index datetime, colonnes = libellés `metrics`, toutes par défaut) d'un
+    QuerySet RawData trié, sans instancier de modèles: seules les colonnes demandées sont
+    lues (values_list + iterator), par blocs de `chunk_size` lignes copiés dans des
+    tableaux NumPy préalloués.
+    """
+    labels = _check_metrics(metrics)
+    df = _read_frame(qs, 'datetime', [METRIC_FIELDS[m] for m in labels], labels, chunk_size)
+    for label in labels:
+        if label in INT_METRICS:
+            df[label] = df[label].astype(np.int64)
+    return df
+
+def _check_metrics(metrics: list[str] | None) -> list[str]:
+    labels = list(METRIC_FIELDS) if metrics is None else list(metrics)
+    unknown = [m for m in labels if m not in METRIC_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+    return labels
+
+def _read_frame(qs: QuerySet, time_field: str, fields: list[str], labels: list[str], chunk_size: int) -> pd.DataFrame:
+    n = qs.count()
+    times = np.empty(n, dtype=object)
+    values = np.empty((n, len(fields)), dtype=np.float64)
+    rows = qs.values_list(time_field, *fields).iterator(chunk_size=chunk_size)
+    filled = 0
+    while filled < n:
+        # Lignes ajoutées après le count(): ignorées (instantané au moment du count)
+        chunk = list(islice(rows, min(chunk_size, n - filled)))
+        if not chunk:
+            break
+        block = np.array(chunk, dtype=object)
+        times[filled:filled + len(chunk)] = block[:, 0]
+        # None (tranche d'agrégat sans valeur) -> NaN
+        values[filled:filled + len(chunk)] = block[:, 1:].astype(np.float64)
+        filled += len(chunk)
+    index = pd.DatetimeIndex(times[:filled].tolist() if filled else [], name='datetime')
+    return pd.DataFrame(values[:filled], index=index, columns=labels)
+
+# Valeur lue dans les agrégats: une statistique, ou 'minmax' (min et max de chaque tranche)
+ROLLUP_VALUES: tuple[str, ...] = ('mean', 'min', 'max', 'last', 'minmax')
+
+def query_rollup(tier, start_date: datetime, end_date: datetime, metrics: list[str] | None = None, stat: str = 'mean', chunk_size: int = QUERY_CHUNK_SIZE) -> pd.DataFrame:
+    """
+    DataFrame des tranches de `tier` (voir okofen_data.rollups) sur [start_date, end_date)
+    (dates timezone-aware), une colonne par libellé avec la statistique `stat`.
+    Avec 'minmax', chaque tranche donne deux lignes: le min au début de la tranche, le
+    max à mi-tranche, pour que les pics restent visibles.
+    """
+    if stat not in ROLLUP_VALUES:
+        raise ValueError(f"Unknown rollup value: {stat}")
+    labels = _check_metrics(metrics)
+    qs = tier.model.objects.filter(bucket__gte=start_date, bucket__lt=end_date).order_by('bucket')
+    if stat != 'minmax':
+        return _read_frame(qs, 'bucket', [f'{METRIC_FIELDS[m]}_{stat}' for m in labels], labels, chunk_size)
+    lows = _read_frame(qs, 'bucket', [f'{METRIC_FIELDS[m]}_min' for m in labels], labels, chunk_size)
+    highs = _read_frame(qs, 'bucket', [f'{METRIC_FIELDS[m]}_max' for m in labels], labels, chunk_size)
+    highs.index = highs.index + pd.Timedelta(seconds=tier.seconds / 2)
+    return pd.concat([lows, highs]).sort_index(kind='stable')
+
+
+def get_data_by_dates(start_date:datetime,end_date:datetime,metrics:list[str]|None=None,max_points:int|None=None,stat:str='mean')->pd.DataFrame:
+    '''
+    Sans max_points: lignes brutes (minute). Avec max_points: lit le niveau d'agrégats le plus
+    grossier qui donne encore au moins max_points tranches (statistique `stat`), s'il couvre toute
+    la période (rollups.covers), sinon les lignes brutes. Le niveau lu est dans df.attrs['tier'].
+    '''
+    # Import local: rollups dépend de ce module
+    from okofen_data import rollups
+    start_aware, end_aware = make_aware(start_date), make_aware(end_date)
+    tier = rollups.select_tier(start_aware, end_aware, max_points)
+    if tier.model is not None and rollups.covers(tier, start_aware, end_aware):
+        df = query_rollup(tier, start_aware, end_aware, metrics, stat)
+    else:
+        tier = rollups.RAW_TIER
+        qs = RawData.objects.filter(datetime__range=[start_aware,end_aware]).order_by('datetime')
+        df = query_values(qs, metrics)
+    df.attrs['tier'] = tier.name
+    return df
+
+def iter_data_by_days(start_date:datetime,end_date:datetime,metrics:list[str]|None=None,chunk_size:int=QUERY_CHUNK_SIZE):
+    '''
+    Mêmes lignes que get_data_by_dates, une journée (fenêtre de 24h depuis start_date) à la fois:
+    un DataFrame par fenêtre, la mémoire reste bornée quelle que soit la longueur de la plage
+    '''
+    day = start_date
+    while day < end_date:
+        next_day = min(day+timedelta(days=1), end_date)
+        window = RawData.objects.filter(datetime__gte=make_aware(day))
+        # Borne de fin incluse sur la dernière fenêtre, comme datetime__range
+        window = window.filter(datetime__lte=make_aware(next_day)) if next_day == end_date else window.filter(datetime__lt=make_aware(next_day))
+        yield query_values(window.order_by('datetime'), metrics, chunk_size)
+        day = next_day
 
 def get_start_day_datetime(date:datetime)->datetime:
     return datetime(year=date.year, month=date.month, day= date.day, hour=3, minute=0, second=0)
 
-def get_data_for_one_day(date:datetime)->pd.DataFrame:
+def get_data_for_one_day(date:datetime,metrics:list[str]|None=None)->pd.DataFrame:
     start_date = get_start_day_datetime(date)
     end_date   = start_date+timedelta(days=1)
-    return get_data_by_dates(start_date,end_date)
+    return get_data_by_dates(start_date,end_date,metrics)
 
-def get_data_for_n_last_days(days:int)->pd.DataFrame:
+def get_n_last_days_dates(days:int)->tuple[datetime,datetime]:
     date = datetime.now()
     end_date = get_start_day_datetime(date)+timedelta(days=1)
     start_date   = end_date-timedelta(days=days)
-    return get_data_by_dates(start_date,end_date)
+    return start_date,end_date
+
+def get_data_for_n_last_days(days:int,metrics:list[str]|None=None,max_points:int|None=None,stat:str='mean')->pd.DataFrame:
+    start_date,end_date = get_n_last_days_dates(days)
+    return get_data_by_dates(start_date,end_date,metrics,max_points,stat)
 
 
@@ -0,0 +1,110 @@
+"""
+Réduction côté serveur des séries minute par minute avant envoi au graphique.
+
+Deux méthodes, appliquées à chaque colonne sur les tableaux NumPy du DataFrame:
+
+- `lttb` (Largest-Triangle-Three-Buckets): garde dans chaque bucket le point qui forme
+  le plus grand triangle avec le point retenu précédemment et la moyenne du bucket
+  suivant; conserve l'allure de la courbe avec `max_points` points.
+- `minmax`: garde le premier et le dernier point, et le minimum et le maximum de chaque
+  bucket (`(max_points - 2) / 2` buckets); aucun pic (flamme, départ chaudière) n'est perdu.
+
+Les lignes retenues sont l'union des points choisis pour chaque colonne: toutes les
+valeurs renvoyées sont des échantillons réels, `max_points` est un nombre de points
+par série.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+METHODS = ("lttb", "minmax")
+DEFAULT_METHOD = "lttb"
+MIN_POINTS = 3
+
+
+def _buckets(n: int, n_buckets: int) -> np.ndarray:
+    """Bornes de `n_buckets` buckets de tailles quasi égales sur `range(n)`."""
+    return np.linspace(0, n, n_buckets + 1).astype(np.int64)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices des `max_points` points retenus par LTTB (premier et dernier inclus).
+    `y` est une série (n,) ou plusieurs séries (n, k) traitées ensemble: indices (max_points, k).
+    """
+    n = len(y)
+    if max_points >= n or n <= 2:
+        idx = np.arange(n)
+        return idx if y.ndim == 1 else np.repeat(idx[:, None], y.shape[1], axis=1)
+    max_points = max(max_points, MIN_POINTS)
+    y2 = y.astype(np.float64, copy=False).reshape(n, -1)
+    cols = np.arange(y2.shape[1])
+    # Buckets intérieurs sur [1, n-1), le premier et le dernier point sont toujours gardés
+    edges = 1 + _buckets(n - 2, max_points - 2)
+    # Moyenne de chaque bucket (le "troisième" sommet), plus le dernier point
+    inner = y2[1:n - 1]
+    valid = ~np.isnan(inner)
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(np.where(valid, inner, 0.0), edges[:-1] - 1, axis=0)
+    counts = np.add.reduceat(valid, edges[:-1] - 1, axis=0)
+    avg_x = np.append(sums_x / np.diff(edges), x[n - 1])
+    avg_y = np.vstack((np.where(counts > 0, sums_y / np.maximum(counts, 1), np.nan), y2[n - 1]))
+
+    selected = np.empty((max_points, y2.shape[1]), dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = np.zeros(y2.shape[1], dtype=np.int64)
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        xa, ya = x[a], y2[a, cols]
+        # Aire (au facteur 1/2 près) du triangle (a, point du bucket, moyenne du bucket suivant)
+        with np.errstate(invalid="ignore"):
+            areas = np.abs(
+                (xa - avg_x[i + 1]) * (y2[lo:hi] - ya)
+                - (xa - x[lo:hi, None]) * (avg_y[i + 1] - ya)
+            )
+        a = lo + np.argmax(np.nan_to_num(areas, nan=-1.0), axis=0)
+        selected[i + 1] = a
+    return selected[:, 0] if y.ndim == 1 else selected
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices du premier et du dernier point, et du minimum et du maximum de chaque bucket
+    intérieur (`(max_points - 2) // 2` buckets): au plus `max_points` indices.
+    """
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+    n_buckets = (max_points - 2) // 2
+    if n_buckets < 1:
+        return np.array([0, n - 1])
+    size = -(-(n - 2) // n_buckets)
+    y = y[1:n - 1].astype(np.float64, copy=False)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n - 2] = y
+    padded = padded.reshape(n_buckets, size)
+    offsets = 1 + np.arange(n_buckets) * size
+    lows = offsets + np.argmin(np.where(np.isnan(padded), np.inf, padded), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(padded), -np.inf, padded), axis=1)
+    indices = np.unique(np.concatenate((lows, highs, [0, n - 1])))
+    return indices[indices < n]
+
+
+def downsample(df: pd.DataFrame, max_points: int, method: str = DEFAULT_METHOD) -> pd.DataFrame:
+    """
+    Lignes de `df` (index datetime trié) retenues par `method` pour au plus `max_points`
+    points par colonne.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    if df.empty or max_points >= len(df):
+        return df
+    if method == "lttb":
+        x = df.index.asi8.astype(np.float64) / 1e9
+        keep = np.unique(lttb_indices(x, df.to_numpy(dtype=np.float64), max_points))
+    else:
+        picks = [minmax_indices(df[col].to_numpy(), max_points) for col in df.columns]
+        keep = np.unique(np.concatenate(picks)) if picks else np.arange(len(df))
+    return df.iloc[keep]
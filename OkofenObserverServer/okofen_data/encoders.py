@@ -0,0 +1,74 @@
+"""
+Formats de sortie des endpoints de séries temporelles.
+
+- `records` (défaut): `{"count", "data": [{"datetime": ISO8601, <mesure>: valeur, ...}]}`
+- `columns`: JSON en colonnes, `{"count", "datetime": [epoch ms], "series": {<mesure>: [...]}}`;
+  chaque libellé n'apparaît qu'une fois, valeurs manquantes à `null`.
+- `binary`: tableaux compacts pour le navigateur (`application/octet-stream`, little-endian):
+
+      uint32        H, longueur de l'en-tête JSON (espaces de remplissage inclus)
+      H octets      en-tête JSON UTF-8 {"count", "metrics": [...], ...}, complété pour
+                    que les tableaux commencent sur un multiple de 8 octets
+      count float64 horodatages epoch ms (Float64Array)
+      count float32 par mesure, dans l'ordre de "metrics" (Float32Array, NaN = absent)
+
+Le format est choisi par le paramètre `format`, sinon par l'en-tête Accept.
+"""
+from __future__ import annotations
+
+import json
+import struct
+
+import numpy as np
+import pandas as pd
+from django.core.serializers.json import DjangoJSONEncoder
+
+FORMATS = ("records", "columns", "binary")
+DEFAULT_FORMAT = "records"
+MEDIA_TYPES = {
+    "columns": "application/vnd.okofen.columns+json",
+    "binary": "application/octet-stream",
+}
+
+
+def negotiate_format(request) -> str:
+    """Format demandé: paramètre `format`, puis en-tête Accept, sinon `records`."""
+    fmt = request.GET.get("format")
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+        return fmt
+    accept = request.headers.get("Accept", "")
+    for name, media_type in MEDIA_TYPES.items():
+        if media_type in accept:
+            return name
+    return DEFAULT_FORMAT
+
+
+def epoch_ms(df: pd.DataFrame) -> np.ndarray:
+    if df.empty:
+        return np.empty(0, dtype=np.int64)
+    return df.index.as_unit("ms").asi8
+
+
+def columns_payload(df: pd.DataFrame | None) -> dict:
+    if df is None:
+        return {"count": 0, "datetime": [], "series": {}}
+    series = {}
+    for col in df.columns:
+        values = df[col]
+        series[col] = values.astype(object).where(values.notna(), None).tolist()
+    return {"count": len(df), "datetime": epoch_ms(df).tolist(), "series": series}
+
+
+def binary_payload(df: pd.DataFrame | None, **meta) -> bytes:
+    metrics = [] if df is None else [str(col) for col in df.columns]
+    count = 0 if df is None else len(df)
+    header = json.dumps({"count": count, "metrics": metrics, **meta}, cls=DjangoJSONEncoder).encode("utf-8")
+    header += b" " * (-(4 + len(header)) % 8)
+    parts = [struct.pack("<I", len(header)), header]
+    if count:
+        parts.append(epoch_ms(df).astype("<f8").tobytes())
+        # Colonne par colonne: (count, k) transposé en k tableaux contigus
+        parts.append(np.ascontiguousarray(df.to_numpy(dtype=np.float64).T, dtype="<f4").tobytes())
+    return b"".join(parts)
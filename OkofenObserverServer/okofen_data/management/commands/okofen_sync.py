@@ -1,9 +1,13 @@
 import os
+import time
 from django.core.management.base import BaseCommand
 from django.conf import settings
 
-from src.okofen import read_OkofenConfig, Okofen
-from okofen_data.update_db import update_db
+from src.mailler import FETCH_RETRIES
+from src.offline_sources import SOURCE_TYPES, format_source_stats
+from src.okofen import CSV_ENGINES, FETCH_MODES, read_OkofenConfig, Okofen
+from okofen_data.bulk_load import ENGINES
+from okofen_data.update_db import import_offline_source, sync_streaming, update_db
 
 
 class Command(BaseCommand):
@@ -22,6 +26,22 @@ class Command(BaseCommand):
             dest="no_download",
             help="N'exécute pas le téléchargement Gmail; importe seulement les CSV locaux.",
         )
+        parser.add_argument(
+            "--source",
+            dest="source",
+            default=None,
+            help=(
+                "Importe une source hors ligne (export mbox, répertoire Maildir ou archive zip) "
+                "au lieu de Gmail."
+            ),
+        )
+        parser.add_argument(
+            "--source-type",
+            choices=SOURCE_TYPES,
+            dest="source_type",
+            default="auto",
+            help="Type de la source --source (défaut: détection automatique).",
+        )
         parser.add_argument(
             "--keep-emails",
             action="store_true",
@@ -35,6 +55,55 @@ class Command(BaseCommand):
             default=1,
             help="Niveau de verbosité (0 silencieux, 1 verbeux)",
         )
+        parser.add_argument(
+            "--full-mail-sync",
+            action="store_true",
+            dest="full_mail_sync",
+            help="Ignore l'état de synchro IMAP (dernier UID traité) et relit tous les emails Okofen.",
+        )
+        parser.add_argument(
+            "--fetch-mode",
+            choices=FETCH_MODES,
+            dest="fetch_mode",
+            default="parts",
+            help=(
+                "Téléchargement des emails: parts (défaut, seules les pièces jointes touch_*.csv "
+                "via BODYSTRUCTURE) ou rfc822 (message complet)."
+            ),
+        )
+        parser.add_argument(
+            "--mail-workers",
+            type=int,
+            dest="mail_workers",
+            default=1,
+            help="Nombre de connexions IMAP parallèles pour le téléchargement (mode parts, défaut 1).",
+        )
+        parser.add_argument(
+            "--mail-retries",
+            type=int,
+            dest="mail_retries",
+            default=FETCH_RETRIES,
+            help=(
+                f"Reprises d'un lot d'emails après une coupure de connexion (mode parts, défaut {FETCH_RETRIES}), "
+                "avec un délai doublé à chaque reprise."
+            ),
+        )
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            dest="stream",
+            help=(
+                "Importe chaque CSV dès son téléchargement (file bornée entre téléchargement "
+                "et import) au lieu d'enchaîner les deux étapes."
+            ),
+        )
+        parser.add_argument(
+            "--queue-size",
+            type=int,
+            dest="queue_size",
+            default=8,
+            help="Nombre maximal de CSV téléchargés en attente d'import avec --stream (défaut 8).",
+        )
         parser.add_argument(
             "--batch-size",
             type=int,
@@ -42,6 +111,36 @@ class Command(BaseCommand):
             default=1000,
             help="Taille des lots pour l'insertion en base (bulk_create)",
         )
+        parser.add_argument(
+            "--rescan",
+            action="store_true",
+            dest="rescan",
+            help="Ignore le manifeste d'import et relit tous les CSV locaux.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            dest="workers",
+            default=1,
+            help="Nombre de processus pour le parsing des CSV (défaut 1, séquentiel).",
+        )
+        parser.add_argument(
+            "--engine",
+            choices=ENGINES,
+            dest="engine",
+            default="orm",
+            help=(
+                "Moteur d'insertion: orm (bulk_create, défaut) ou native "
+                "(LOAD DATA LOCAL INFILE sur MySQL, executemany sur SQLite)."
+            ),
+        )
+        parser.add_argument(
+            "--csv-engine",
+            choices=CSV_ENGINES,
+            dest="csv_engine",
+            default="c",
+            help="Moteur de lecture des CSV: c (pandas, défaut) ou pyarrow (nécessite pyarrow).",
+        )
 
     def handle(self, *args, **options):
         config_path = options["config"]
@@ -49,22 +148,81 @@ class Command(BaseCommand):
         do_download = not options["no_download"]
         delete_emails = not options.get("keep_emails")
 
+        # Mesures de la synchro (lisibles par un appelant via Command().metrics)
+        self.metrics = {}
+        t_start = time.perf_counter()
+
         if not os.path.isfile(config_path):
             self.stderr.write(self.style.ERROR(f"Fichier de configuration introuvable: {config_path}"))
             return
 
         self.stdout.write(f"Config: {config_path}")
+        # Import en flux déjà fait (--stream, --source): l'étape 2 n'a plus rien à lire
+        streamed = False
 
-        if do_download:
+        if options["source"]:
+            self.stdout.write(f"[1/2] Import de la source hors ligne {options['source']}…")
+            try:
+                result = import_offline_source(
+                    options["source"],
+                    config_path=config_path,
+                    source_type=options["source_type"],
+                    verbose=verbose,
+                    batch_size=options["batch_size"],
+                    engine=options["engine"],
+                    csv_engine=options["csv_engine"],
+                    queue_size=options["queue_size"],
+                )
+                self.metrics["stream"] = result
+                self.metrics["import_seconds"] = result["ingest_seconds"]
+                streamed = True
+                self.stdout.write(format_source_stats(result["source"], result["total_seconds"]))
+                self.stdout.write(self.style.SUCCESS(
+                    f"Source importée: {result['files']} fichier(s), {result['rows']} ligne(s) "
+                    f"en {result['total_seconds']:.1f}s ({result['rows'] / max(result['total_seconds'], 1e-9):.0f} lignes/s)."
+                ))
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f"Erreur pendant l'import de la source: {e}"))
+                raise
+        elif do_download:
             self.stdout.write("[1/2] Téléchargement des CSV depuis Gmail…")
             try:
                 cfg = read_OkofenConfig(config_path)
-                okofen = Okofen(cfg, verbose=verbose, delete_emails=delete_emails)
+                okofen = Okofen(
+                    cfg,
+                    verbose=verbose,
+                    delete_emails=delete_emails,
+                    fetch_mode=options["fetch_mode"],
+                    mail_workers=options["mail_workers"],
+                    mail_retries=options["mail_retries"],
+                )
                 if delete_emails:
                     self.stdout.write("Suppression des emails après téléchargement activée.")
                 else:
                     self.stdout.write("Les emails seront conservés (--keep-emails).")
-                okofen.download_data_from_gmail()
+                if options["stream"]:
+                    self.stdout.write("Import en flux des CSV téléchargés (--stream)…")
+                    result = sync_streaming(
+                        okofen,
+                        verbose=verbose,
+                        batch_size=options["batch_size"],
+                        engine=options["engine"],
+                        csv_engine=options["csv_engine"],
+                        queue_size=options["queue_size"],
+                        full_mail_sync=options["full_mail_sync"],
+                    )
+                    self.metrics["stream"] = result
+                    # Durées du thread de téléchargement et de l'import, mesurées séparément
+                    self.metrics["download_seconds"] = result["source_seconds"]
+                    self.metrics["import_seconds"] = result["ingest_seconds"]
+                    streamed = True
+                else:
+                    t0 = time.perf_counter()
+                    okofen.download_data_from_gmail(full_sync=options["full_mail_sync"])
+                    self.metrics["download_seconds"] = time.perf_counter() - t0
+                self.metrics["mail"] = dict(okofen.gmail.stats, **okofen.stats)
+                if verbose > 0:
+                    self.stdout.write(format_mail_stats(self.metrics["mail"], self.metrics["download_seconds"]))
                 self.stdout.write(self.style.SUCCESS("Téléchargement terminé."))
             except Exception as e:
                 self.stderr.write(self.style.ERROR(f"Erreur pendant le téléchargement Gmail: {e}"))
@@ -72,10 +230,37 @@ class Command(BaseCommand):
         else:
             self.stdout.write("Étape Gmail ignorée (--no-download).")
 
+        if streamed and not options["rescan"]:
+            self.stdout.write("[2/2] Import des CSV locaux ignoré: les fichiers ont été importés en flux.")
+            self.metrics["total_seconds"] = time.perf_counter() - t_start
+            return
+
         self.stdout.write("[2/2] Import des CSV locaux vers la base Django…")
+        t0 = time.perf_counter()
         try:
-            update_db(verbose=verbose, config_path=config_path, batch_size=options["batch_size"])
+            update_db(
+                verbose=verbose,
+                config_path=config_path,
+                batch_size=options["batch_size"],
+                rescan=options["rescan"],
+                workers=options["workers"],
+                engine=options["engine"],
+                csv_engine=options["csv_engine"],
+            )
+            self.metrics["import_seconds"] = self.metrics.get("import_seconds", 0.0) + time.perf_counter() - t0
             self.stdout.write(self.style.SUCCESS("Import terminé."))
         except Exception as e:
             self.stderr.write(self.style.ERROR(f"Erreur pendant l'import DB: {e}"))
             raise
+        self.metrics["total_seconds"] = time.perf_counter() - t_start
+
+
+def format_mail_stats(stats: dict, elapsed: float) -> str:
+    elapsed = max(elapsed, 1e-9)
+    return (
+        f"{stats['messages']} email(s), {stats['bytes'] / 1e6:.1f} Mo reçus, {stats['files']} fichier(s) écrits "
+        f"(dont {stats['conflicts']} nouvelle(s) version(s)), {stats['duplicates']} doublon(s) ignoré(s) "
+        f"en {elapsed:.1f}s ({stats['messages'] / elapsed:.1f} emails/s) | "
+        f"fetch {stats['fetch_seconds']:.2f}s, décodage {stats['decode_seconds']:.2f}s, "
+        f"écriture {stats['write_seconds']:.2f}s, suppression {stats['delete_seconds']:.2f}s"
+    )
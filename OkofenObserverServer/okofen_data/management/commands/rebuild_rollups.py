@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from okofen_data import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit les agrégats 5 minutes et horaires (RawData5Min, RawDataHourly) "
+        "à partir des données RawData. Par défaut, toutes les journées sont recalculées."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--from",
+            dest="start",
+            help="Date de début incluse au format YYYY-MM-DD (journée pivot 03:00).",
+        )
+        parser.add_argument(
+            "--to",
+            dest="end",
+            help="Date de fin incluse au format YYYY-MM-DD (optionnelle).",
+        )
+
+    def handle(self, *args, **options):
+        start_opt = options.get("start")
+        end_opt = options.get("end")
+
+        if not start_opt:
+            if end_opt:
+                raise CommandError("--to nécessite --from.")
+            self.stdout.write("Reconstruction complète des agrégats…")
+            written = rollups.rebuild_all()
+        else:
+            try:
+                start_day = datetime.strptime(start_opt, "%Y-%m-%d").date()
+            except ValueError as exc:
+                raise CommandError(f"Date de début invalide: {start_opt}") from exc
+            if end_opt:
+                try:
+                    end_day = datetime.strptime(end_opt, "%Y-%m-%d").date()
+                except ValueError as exc:
+                    raise CommandError(f"Date de fin invalide: {end_opt}") from exc
+            else:
+                end_day = start_day
+            if end_day < start_day:
+                raise CommandError("La date de fin doit être >= date de début.")
+            days = [start_day + timedelta(days=i) for i in range((end_day - start_day).days + 1)]
+            written = rollups.compute_for_days(days)
+
+        detail = ", ".join(f"{count} tranche(s) {name}" for name, count in written.items())
+        self.stdout.write(self.style.SUCCESS(f"Agrégats recalculés: {detail}."))
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.2 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('okofen_data', '0003_dailystat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestedFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('mtime', models.FloatField(default=0.0)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('first_datetime', models.DateTimeField(blank=True, null=True)),
+                ('last_datetime', models.DateTimeField(blank=True, null=True)),
+                ('imported_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['file_name'],
+            },
+        ),
+    ]
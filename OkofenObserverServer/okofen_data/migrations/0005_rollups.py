@@ -0,0 +1,236 @@
+# Generated by Django 4.2.2 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+def build_rollups(apps, schema_editor):
+    # Remplit les agrégats des données déjà importées (sinon les lectures retombent sur RawData
+    # jusqu'au prochain `rebuild_rollups`). Utilise le module rollups (modèles courants).
+    from okofen_data import rollups
+
+    rollups.rebuild_all()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('okofen_data', '0004_ingestedfile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RawData5Min',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(unique=True)),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('ext_temp_count', models.PositiveIntegerField(default=0)),
+                ('ext_temp_min', models.FloatField(blank=True, null=True)),
+                ('ext_temp_max', models.FloatField(blank=True, null=True)),
+                ('ext_temp_mean', models.FloatField(blank=True, null=True)),
+                ('ext_temp_last', models.FloatField(blank=True, null=True)),
+                ('house_temp_count', models.PositiveIntegerField(default=0)),
+                ('house_temp_min', models.FloatField(blank=True, null=True)),
+                ('house_temp_max', models.FloatField(blank=True, null=True)),
+                ('house_temp_mean', models.FloatField(blank=True, null=True)),
+                ('house_temp_last', models.FloatField(blank=True, null=True)),
+                ('house_temp_target_count', models.PositiveIntegerField(default=0)),
+                ('house_temp_target_min', models.FloatField(blank=True, null=True)),
+                ('house_temp_target_max', models.FloatField(blank=True, null=True)),
+                ('house_temp_target_mean', models.FloatField(blank=True, null=True)),
+                ('house_temp_target_last', models.FloatField(blank=True, null=True)),
+                ('silo_level_count', models.PositiveIntegerField(default=0)),
+                ('silo_level_min', models.FloatField(blank=True, null=True)),
+                ('silo_level_max', models.FloatField(blank=True, null=True)),
+                ('silo_level_mean', models.FloatField(blank=True, null=True)),
+                ('silo_level_last', models.FloatField(blank=True, null=True)),
+                ('hopper_level_count', models.PositiveIntegerField(default=0)),
+                ('hopper_level_min', models.FloatField(blank=True, null=True)),
+                ('hopper_level_max', models.FloatField(blank=True, null=True)),
+                ('hopper_level_mean', models.FloatField(blank=True, null=True)),
+                ('hopper_level_last', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_count', models.PositiveIntegerField(default=0)),
+                ('boiler_water_temp_min', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_max', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_mean', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_last', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_target_count', models.PositiveIntegerField(default=0)),
+                ('boiler_water_temp_target_min', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_target_max', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_target_mean', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_target_last', models.FloatField(blank=True, null=True)),
+                ('boiler_modulation_count', models.PositiveIntegerField(default=0)),
+                ('boiler_modulation_min', models.FloatField(blank=True, null=True)),
+                ('boiler_modulation_max', models.FloatField(blank=True, null=True)),
+                ('boiler_modulation_mean', models.FloatField(blank=True, null=True)),
+                ('boiler_modulation_last', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_count', models.PositiveIntegerField(default=0)),
+                ('boiler_fire_temps_min', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_max', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_mean', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_last', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_atrget_count', models.PositiveIntegerField(default=0)),
+                ('boiler_fire_temps_atrget_min', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_atrget_max', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_atrget_mean', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_atrget_last', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_count', models.PositiveIntegerField(default=0)),
+                ('heating_start_circulation_temp_min', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_max', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_mean', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_last', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_target_count', models.PositiveIntegerField(default=0)),
+                ('heating_start_circulation_temp_target_min', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_target_max', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_target_mean', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_target_last', models.FloatField(blank=True, null=True)),
+                ('heating_circulation_count', models.PositiveIntegerField(default=0)),
+                ('heating_circulation_min', models.FloatField(blank=True, null=True)),
+                ('heating_circulation_max', models.FloatField(blank=True, null=True)),
+                ('heating_circulation_mean', models.FloatField(blank=True, null=True)),
+                ('heating_circulation_last', models.FloatField(blank=True, null=True)),
+                ('heating_status_count', models.PositiveIntegerField(default=0)),
+                ('heating_status_min', models.FloatField(blank=True, null=True)),
+                ('heating_status_max', models.FloatField(blank=True, null=True)),
+                ('heating_status_mean', models.FloatField(blank=True, null=True)),
+                ('heating_status_last', models.FloatField(blank=True, null=True)),
+                ('water_temp_count', models.PositiveIntegerField(default=0)),
+                ('water_temp_min', models.FloatField(blank=True, null=True)),
+                ('water_temp_max', models.FloatField(blank=True, null=True)),
+                ('water_temp_mean', models.FloatField(blank=True, null=True)),
+                ('water_temp_last', models.FloatField(blank=True, null=True)),
+                ('water_stop_temp_count', models.PositiveIntegerField(default=0)),
+                ('water_stop_temp_min', models.FloatField(blank=True, null=True)),
+                ('water_stop_temp_max', models.FloatField(blank=True, null=True)),
+                ('water_stop_temp_mean', models.FloatField(blank=True, null=True)),
+                ('water_stop_temp_last', models.FloatField(blank=True, null=True)),
+                ('water_temp_target_count', models.PositiveIntegerField(default=0)),
+                ('water_temp_target_min', models.FloatField(blank=True, null=True)),
+                ('water_temp_target_max', models.FloatField(blank=True, null=True)),
+                ('water_temp_target_mean', models.FloatField(blank=True, null=True)),
+                ('water_temp_target_last', models.FloatField(blank=True, null=True)),
+                ('water_circulation_count', models.PositiveIntegerField(default=0)),
+                ('water_circulation_min', models.FloatField(blank=True, null=True)),
+                ('water_circulation_max', models.FloatField(blank=True, null=True)),
+                ('water_circulation_mean', models.FloatField(blank=True, null=True)),
+                ('water_circulation_last', models.FloatField(blank=True, null=True)),
+                ('water_status_count', models.PositiveIntegerField(default=0)),
+                ('water_status_min', models.FloatField(blank=True, null=True)),
+                ('water_status_max', models.FloatField(blank=True, null=True)),
+                ('water_status_mean', models.FloatField(blank=True, null=True)),
+                ('water_status_last', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['bucket'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RawDataHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(unique=True)),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('ext_temp_count', models.PositiveIntegerField(default=0)),
+                ('ext_temp_min', models.FloatField(blank=True, null=True)),
+                ('ext_temp_max', models.FloatField(blank=True, null=True)),
+                ('ext_temp_mean', models.FloatField(blank=True, null=True)),
+                ('ext_temp_last', models.FloatField(blank=True, null=True)),
+                ('house_temp_count', models.PositiveIntegerField(default=0)),
+                ('house_temp_min', models.FloatField(blank=True, null=True)),
+                ('house_temp_max', models.FloatField(blank=True, null=True)),
+                ('house_temp_mean', models.FloatField(blank=True, null=True)),
+                ('house_temp_last', models.FloatField(blank=True, null=True)),
+                ('house_temp_target_count', models.PositiveIntegerField(default=0)),
+                ('house_temp_target_min', models.FloatField(blank=True, null=True)),
+                ('house_temp_target_max', models.FloatField(blank=True, null=True)),
+                ('house_temp_target_mean', models.FloatField(blank=True, null=True)),
+                ('house_temp_target_last', models.FloatField(blank=True, null=True)),
+                ('silo_level_count', models.PositiveIntegerField(default=0)),
+                ('silo_level_min', models.FloatField(blank=True, null=True)),
+                ('silo_level_max', models.FloatField(blank=True, null=True)),
+                ('silo_level_mean', models.FloatField(blank=True, null=True)),
+                ('silo_level_last', models.FloatField(blank=True, null=True)),
+                ('hopper_level_count', models.PositiveIntegerField(default=0)),
+                ('hopper_level_min', models.FloatField(blank=True, null=True)),
+                ('hopper_level_max', models.FloatField(blank=True, null=True)),
+                ('hopper_level_mean', models.FloatField(blank=True, null=True)),
+                ('hopper_level_last', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_count', models.PositiveIntegerField(default=0)),
+                ('boiler_water_temp_min', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_max', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_mean', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_last', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_target_count', models.PositiveIntegerField(default=0)),
+                ('boiler_water_temp_target_min', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_target_max', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_target_mean', models.FloatField(blank=True, null=True)),
+                ('boiler_water_temp_target_last', models.FloatField(blank=True, null=True)),
+                ('boiler_modulation_count', models.PositiveIntegerField(default=0)),
+                ('boiler_modulation_min', models.FloatField(blank=True, null=True)),
+                ('boiler_modulation_max', models.FloatField(blank=True, null=True)),
+                ('boiler_modulation_mean', models.FloatField(blank=True, null=True)),
+                ('boiler_modulation_last', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_count', models.PositiveIntegerField(default=0)),
+                ('boiler_fire_temps_min', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_max', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_mean', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_last', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_atrget_count', models.PositiveIntegerField(default=0)),
+                ('boiler_fire_temps_atrget_min', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_atrget_max', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_atrget_mean', models.FloatField(blank=True, null=True)),
+                ('boiler_fire_temps_atrget_last', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_count', models.PositiveIntegerField(default=0)),
+                ('heating_start_circulation_temp_min', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_max', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_mean', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_last', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_target_count', models.PositiveIntegerField(default=0)),
+                ('heating_start_circulation_temp_target_min', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_target_max', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_target_mean', models.FloatField(blank=True, null=True)),
+                ('heating_start_circulation_temp_target_last', models.FloatField(blank=True, null=True)),
+                ('heating_circulation_count', models.PositiveIntegerField(default=0)),
+                ('heating_circulation_min', models.FloatField(blank=True, null=True)),
+                ('heating_circulation_max', models.FloatField(blank=True, null=True)),
+                ('heating_circulation_mean', models.FloatField(blank=True, null=True)),
+                ('heating_circulation_last', models.FloatField(blank=True, null=True)),
+                ('heating_status_count', models.PositiveIntegerField(default=0)),
+                ('heating_status_min', models.FloatField(blank=True, null=True)),
+                ('heating_status_max', models.FloatField(blank=True, null=True)),
+                ('heating_status_mean', models.FloatField(blank=True, null=True)),
+                ('heating_status_last', models.FloatField(blank=True, null=True)),
+                ('water_temp_count', models.PositiveIntegerField(default=0)),
+                ('water_temp_min', models.FloatField(blank=True, null=True)),
+                ('water_temp_max', models.FloatField(blank=True, null=True)),
+                ('water_temp_mean', models.FloatField(blank=True, null=True)),
+                ('water_temp_last', models.FloatField(blank=True, null=True)),
+                ('water_stop_temp_count', models.PositiveIntegerField(default=0)),
+                ('water_stop_temp_min', models.FloatField(blank=True, null=True)),
+                ('water_stop_temp_max', models.FloatField(blank=True, null=True)),
+                ('water_stop_temp_mean', models.FloatField(blank=True, null=True)),
+                ('water_stop_temp_last', models.FloatField(blank=True, null=True)),
+                ('water_temp_target_count', models.PositiveIntegerField(default=0)),
+                ('water_temp_target_min', models.FloatField(blank=True, null=True)),
+                ('water_temp_target_max', models.FloatField(blank=True, null=True)),
+                ('water_temp_target_mean', models.FloatField(blank=True, null=True)),
+                ('water_temp_target_last', models.FloatField(blank=True, null=True)),
+                ('water_circulation_count', models.PositiveIntegerField(default=0)),
+                ('water_circulation_min', models.FloatField(blank=True, null=True)),
+                ('water_circulation_max', models.FloatField(blank=True, null=True)),
+                ('water_circulation_mean', models.FloatField(blank=True, null=True)),
+                ('water_circulation_last', models.FloatField(blank=True, null=True)),
+                ('water_status_count', models.PositiveIntegerField(default=0)),
+                ('water_status_min', models.FloatField(blank=True, null=True)),
+                ('water_status_max', models.FloatField(blank=True, null=True)),
+                ('water_status_mean', models.FloatField(blank=True, null=True)),
+                ('water_status_last', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['bucket'],
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
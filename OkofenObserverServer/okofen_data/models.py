@@ -47,3 +47,59 @@ class DailyStat(models.Model):
 
     def __str__(self) -> str:
         return f"DailyStat({self.day})"
+
+
+class IngestedFile(models.Model):
+    file_name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    mtime = models.FloatField(default=0.0)
+    content_hash = models.CharField(max_length=64)
+    row_count = models.PositiveIntegerField(default=0)
+    first_datetime = models.DateTimeField(null=True, blank=True)
+    last_datetime = models.DateTimeField(null=True, blank=True)
+    imported_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["file_name"]
+
+    def __str__(self) -> str:
+        return f"IngestedFile({self.file_name})"
+
+
+# Agrégats des mesures RawData par intervalle (voir okofen_data/rollups.py)
+ROLLUP_STATS: tuple[str, ...] = ("count", "min", "max", "mean", "last")
+
+
+class RollupBase(models.Model):
+    bucket = models.DateTimeField(unique=True)
+    samples = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+        ordering = ["bucket"]
+
+
+# Pour chaque mesure RawData: <champ>_count, <champ>_min, <champ>_max, <champ>_mean, <champ>_last
+for _field in RawData._meta.concrete_fields:
+    if _field.name in ("id", "datetime"):
+        continue
+    for _stat in ROLLUP_STATS:
+        RollupBase.add_to_class(
+            f"{_field.name}_{_stat}",
+            models.PositiveIntegerField(default=0) if _stat == "count" else models.FloatField(null=True, blank=True),
+        )
+del _field, _stat
+
+
+class RawData5Min(RollupBase):
+    """Agrégats RawData par tranche de 5 minutes (bucket = début de la tranche)."""
+
+    class Meta(RollupBase.Meta):
+        pass
+
+
+class RawDataHourly(RollupBase):
+    """Agrégats RawData par heure (bucket = début de l'heure)."""
+
+    class Meta(RollupBase.Meta):
+        pass
@@ -0,0 +1,317 @@
+"""
+Lecture et normalisation des CSV Okofen, sans dépendance à Django: ce module est
+importé par les processus de parsing parallèles de `update_db`.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+import pandas as pd
+
+import src.system as s
+from src.okofen import OKOFEN_CSV_ENCODING, OKOFEN_DICO, read_okfen_data, read_okofen_csv
+
+# Dictionnaires d'alias pour colonnes date/heure (noms normalisés, en minuscules)
+DATE_ALIASES = [
+    "datum", "date", "jour", "datum (date)", "date (local)", "date (utc)",
+    "date/ jour", "date jour"
+]
+TIME_ALIASES = [
+    "zeit", "time", "heure", "uhrzeit", "heure locale", "heure (local)", "heure (utc)",
+    "uhrzeit [hh:mm:ss]"
+]
+DATETIME_ALIASES = [
+    "datetime", "timestamp", "date time", "date_time", "date-heure", "dateheure",
+    "date/heure", "date-heure", "horodatage", "zeitstempel", "zeitpunkt",
+    "timestamp (utc)", "datetime (utc)", "datetime (local)", "date-time"
+]
+
+# Entêtes connus (firmware Pellematic touch): leur schéma est résolu à l'import du module,
+# sans aucun sniffing à la lecture des fichiers.
+KNOWN_HEADER_LINES = [
+    "Datum ;Zeit ;AT [°C];ATakt [°C];PE1_BR1 ;HK1 VL Ist[°C];HK1 VL Soll[°C];"
+    "HK1 RT Ist[°C];HK1 RT Soll[°C];HK1 Pumpe;HK1 Mischer;HK1 Fernb[°C];HK1 Status;"
+    "WW1 EinT Ist[°C];WW1 AusT Ist[°C];WW1 Soll[°C];WW1 Pumpe;WW1 Status;"
+    "PE1 KT[°C];PE1 KT_SOLL[°C];PE1 UW Freigabe[°C];PE1 Modulation[%];"
+    "PE1 FRT Ist[°C];PE1 FRT Soll[°C];PE1 FRT End[°C];"
+    "PE1 Einschublaufzeit[zs];PE1 Saugzugdrehzahl[zs];"
+    "PE1 Unterdruck Ist[EH];PE1 Unterdruck Soll[EH];"
+    "PE1 Fuellstand[kg];PE1 Fuellstand ZWB[kg];PE1 Status;"
+    "PE1 Motor ES;PE1 Motor RA;PE1 Motor ZUG;PE1 Motor AV;PE1 Fehler",
+]
+
+
+@dataclass(frozen=True)
+class HeaderSchema:
+    """Structure résolue d'un entête CSV: colonnes, stratégie date/heure et types."""
+    signature: str
+    columns: tuple[str, ...]                  # noms de colonnes normalisés
+    strategy: str                             # 'datetime' | 'date_time' | 'date_only' | 'scan'
+    date_col: str | None = None
+    time_col: str | None = None
+    datetime_col: str | None = None           # colonne unique (strategies 'datetime' et 'scan')
+    dtypes: dict[str, str] = field(default_factory=dict)  # colonnes de mesure -> dtype numpy
+
+    def to_dict(self) -> dict:
+        d = asdict(self)
+        d['columns'] = list(self.columns)
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "HeaderSchema":
+        return cls(**{**d, 'columns': tuple(d['columns'])})
+
+
+def header_signature(header_line: str) -> str:
+    return hashlib.sha1(header_line.lstrip("\ufeff").rstrip("\r\n").encode("utf-8")).hexdigest()
+
+
+def read_header_line(filename: str) -> str:
+    with open(filename, encoding=OKOFEN_CSV_ENCODING, newline='') as fp:
+        return fp.readline()
+
+
+def normalize_column(c: str) -> str:
+    c = str(c).lstrip("\ufeff").strip()
+    c = c.replace("\u00a0", " ")  # nbsp -> espace normal
+    c = " ".join(c.split())       # compresser espaces multiples
+    return c
+
+
+def _looks_like_datetime(values: pd.Series) -> pd.Series | None:
+    # Heuristique: contient un chiffre et un séparateur de date ou un 'T'
+    if values.str.contains(r"(\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}|T\d{2}:\d{2})", regex=True, na=False).mean() > 0.5:
+        dt_try = pd.to_datetime(values, errors="coerce", dayfirst=True, utc=False)
+        if dt_try.notna().mean() > 0.5:
+            return dt_try
+    return None
+
+
+def sniff_schema(columns: list[str], signature: str, current: pd.DataFrame | None = None) -> HeaderSchema:
+    """
+    Résout la stratégie date/heure d'un entête (noms déjà normalisés). Le scan des
+    données (`current`) n'est utilisé qu'en dernier recours, pour les entêtes sans
+    colonne date/heure reconnaissable.
+    """
+    lower_map = {c.lower(): c for c in columns}
+    dcol = next((lower_map[a] for a in DATE_ALIASES if a in lower_map), None)
+    tcol = next((lower_map[a] for a in TIME_ALIASES if a in lower_map), None)
+    dtcol = next((lower_map[a] for a in DATETIME_ALIASES if a in lower_map), None)
+    dtypes = {c: 'float64' for c in columns if c in OKOFEN_DICO and OKOFEN_DICO[c] != 'datetime'}
+    common = dict(signature=signature, columns=tuple(columns), dtypes=dtypes)
+
+    if dtcol:
+        return HeaderSchema(strategy='datetime', datetime_col=dtcol, **common)
+    if dcol and tcol:
+        return HeaderSchema(strategy='date_time', date_col=dcol, time_col=tcol, **common)
+    if dcol:
+        return HeaderSchema(strategy='date_only', date_col=dcol, **common)
+    # Sinon tenter de détecter une colonne candidate en scannant toutes les colonnes texte
+    if current is not None:
+        for cand in current.columns:
+            if _looks_like_datetime(current[cand].astype(str).str.strip()) is not None:
+                return HeaderSchema(strategy='scan', datetime_col=cand, **common)
+    raise ValueError("Colonnes date/heure introuvables dans le CSV (attendues: Datum/Date et Zeit/Time ou une colonne 'DateTime/Timestamp').")
+
+
+def schema_for_header_line(header_line: str, sep: str = ';') -> HeaderSchema:
+    columns = [normalize_column(c) for c in header_line.lstrip("\ufeff").rstrip("\r\n").split(sep)]
+    return sniff_schema(columns, header_signature(header_line))
+
+
+KNOWN_SCHEMAS: dict[str, HeaderSchema] = {
+    schema.signature: schema for schema in map(schema_for_header_line, KNOWN_HEADER_LINES)
+}
+
+
+class SchemaRegistry:
+    """
+    Cache des schémas d'entête, indexé par hash de la ligne d'entête brute.
+    Pré-rempli avec KNOWN_SCHEMAS; les nouveaux entêtes rencontrés sont ajoutés et,
+    si `path` est renseigné, persistés en JSON par `save()`.
+    """
+
+    def __init__(self, path: str | None = None, schemas: dict[str, HeaderSchema] | None = None):
+        self.path = path
+        self.schemas: dict[str, HeaderSchema] = dict(KNOWN_SCHEMAS)
+        self.schemas.update(schemas or {})
+        self.dirty = False
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as fp:
+                for d in json.load(fp):
+                    schema = HeaderSchema.from_dict(d)
+                    self.schemas.setdefault(schema.signature, schema)
+
+    def get(self, signature: str) -> HeaderSchema | None:
+        return self.schemas.get(signature)
+
+    def add(self, schema: HeaderSchema) -> None:
+        if schema.signature not in self.schemas:
+            self.schemas[schema.signature] = schema
+            self.dirty = True
+
+    def save(self) -> None:
+        if not self.path or not self.dirty:
+            return
+        learned = [s.to_dict() for sig, s in self.schemas.items() if sig not in KNOWN_SCHEMAS]
+        with open(self.path, 'w', encoding='utf-8') as fp:
+            json.dump(learned, fp, ensure_ascii=False, indent=1)
+        self.dirty = False
+
+
+@dataclass
+class ParsedFile:
+    """CSV d'une journée prêt à être inséré: colonnes NumPy alignées sur `labels`."""
+    filename: str
+    date: dt.date
+    datetimes: np.ndarray   # datetime64[ns] naïfs (heure locale chaudière), triés
+    values: np.ndarray      # float64 (n_lignes, n_labels), NaN si absent
+    schema: HeaderSchema | None = None
+
+    def __len__(self) -> int:
+        return len(self.datetimes)
+
+
+def get_date_from_filename(filename:str)->dt.date:
+    tmp = s.basename(filename).split('_')[1]
+    return dt.date(year=int(tmp[:4]), month=int(tmp[4:6]),day=int(tmp[6:8]))
+
+
+def _drop_replicated_headers(current: pd.DataFrame) -> pd.DataFrame:
+    # Les lignes d'entête répliquées sont des copies de l'entête: on ne compare
+    # cellule par cellule que les lignes dont la première colonne vaut le premier libellé.
+    header = np.array(current.columns, dtype=object)
+    first = current.iloc[:, 0].astype(str).str.strip()
+    candidates = (first == header[0]).to_numpy()
+    if not candidates.any():
+        return current
+    sub = current.loc[candidates].astype(str).apply(lambda c: c.str.strip())
+    dup = np.zeros(len(current), dtype=bool)
+    dup[np.flatnonzero(candidates)] = (sub.to_numpy(dtype=object) == header).all(axis=1)
+    return current.loc[~dup].copy() if dup.any() else current
+
+
+def _build_datetime(current: pd.DataFrame, schema: HeaderSchema) -> pd.Series:
+    if schema.strategy == 'date_time':
+        dt_str = (current[schema.date_col].astype(str).str.strip() + " " + current[schema.time_col].astype(str).str.strip()).str.strip()
+        dt_str = dt_str.replace({"": pd.NA, "NaN": pd.NA, "None": pd.NA})
+        parsed = pd.to_datetime(dt_str, format="%d.%m.%Y %H:%M:%S", errors="coerce", dayfirst=True)
+        if parsed.isna().any():
+            parsed.loc[parsed.isna()] = pd.to_datetime(dt_str[parsed.isna()], errors="coerce", dayfirst=True)
+        return parsed
+    if schema.strategy == 'date_only':
+        return pd.to_datetime(current[schema.date_col].astype(str).str.strip(), errors="coerce", dayfirst=True)
+    # 'datetime' et 'scan': colonne datetime unique
+    return pd.to_datetime(current[schema.datetime_col].astype(str).str.strip(), errors="coerce", dayfirst=True)
+
+
+def prepare_frame(current: pd.DataFrame, current_date: dt.date, filename: str = "", verbose=0, schema: HeaderSchema | None = None) -> pd.DataFrame:
+    """
+    Normalise un CSV Okofen brut: colonne 'datetime' naïve, libellés français,
+    uniquement les lignes du jour `current_date`. Sans `schema`, l'entête est analysé.
+    """
+    current.columns = [normalize_column(c) for c in current.columns]
+    if schema is None:
+        schema = sniff_schema(list(current.columns), "", current)
+
+    # Supprimer lignes d'entête répliquées
+    current = _drop_replicated_headers(current)
+
+    # Construire 'datetime'
+    current["datetime"] = _build_datetime(current, schema)
+
+    # Filtrer lignes invalides
+    invalid_count = int(current["datetime"].isna().sum())
+    if invalid_count and verbose>0:
+        print(f"Ignored {invalid_count} rows with invalid datetime in {filename}")
+    current = current.dropna(subset=['datetime'])
+
+    current = current.sort_values(['datetime'],ascending = [True]) # type: ignore
+    current = current.rename(columns={c: OKOFEN_DICO[c] for c in current.columns if c in OKOFEN_DICO}) # type: ignore
+    # Colonnes de mesure encore en texte (lecture non typée): virgule décimale -> point
+    text_cols = [c for c in current.columns if c in OKOFEN_DICO.values() and c != 'datetime' and current[c].dtype == object]
+    if text_cols:
+        current[text_cols] = current[text_cols].replace(',', '.', regex=True)
+
+    # Ne garder que les lignes du jour correspondant au fichier
+    current = current[current['datetime'].dt.date == current_date]
+
+    # Assurer la présence des colonnes ECS, sinon valeur par défaut 0
+    for col in ['T°C ECS', 'T°C ECS (arret)', 'T°C ECS Consigne', 'Circulateur ECS', 'Status ESC']:
+        if col not in current.columns:
+            current[col] = 0
+
+    return current
+
+
+def frame_to_parsed(current: pd.DataFrame, filename: str, current_date: dt.date, labels: tuple[str, ...], schema: HeaderSchema | None = None) -> ParsedFile:
+    n = len(current)
+    values = np.full((n, len(labels)), np.nan)
+    for i, label in enumerate(labels):
+        if label in current.columns:
+            values[:, i] = pd.to_numeric(current[label], errors='coerce').to_numpy(dtype=np.float64)
+    return ParsedFile(
+        filename=filename,
+        date=current_date,
+        datetimes=current['datetime'].to_numpy(dtype='datetime64[ns]'),
+        values=values,
+        schema=schema,
+    )
+
+
+def parse_file(filename: str, labels: tuple[str, ...], verbose=0, registry: SchemaRegistry | None = None, engine: str = 'c') -> ParsedFile | None:
+    """
+    Lit, normalise et convertit un `touch_YYYYMMDD.csv`. Retourne None si illisible.
+    Le schéma d'entête est pris dans `registry` (hash de la ligne d'entête): seules les
+    colonnes utiles sont alors parsées, typées selon schema.dtypes (lecteur read_okofen_csv).
+    Un entête inconnu est lu en texte, analysé puis ajouté au registre; le schéma est
+    renvoyé dans ParsedFile.schema.
+    """
+    try:
+        signature = header_signature(read_header_line(filename))
+    except (OSError, UnicodeDecodeError):
+        print(f'[ERROR] Fail to read {filename}')
+        return None
+    schema = registry.get(signature) if registry is not None else None
+    if schema is not None:
+        text_cols = tuple(c for c in (schema.date_col, schema.time_col, schema.datetime_col) if c)
+        current = read_okofen_csv(
+            filename,
+            columns=[*text_cols, *schema.dtypes],
+            dtype=schema.dtypes,
+            engine=engine,
+            text_columns=text_cols,
+        )
+    else:
+        current = read_okfen_data(filename)
+        if current is not None:
+            current.columns = [normalize_column(c) for c in current.columns]
+            schema = sniff_schema(list(current.columns), signature, current)
+            if registry is not None:
+                registry.add(schema)
+    if current is None:
+        return None
+    current_date = get_date_from_filename(filename)
+    current = prepare_frame(current, current_date, filename, verbose, schema)
+    return frame_to_parsed(current, filename, current_date, labels, schema)
+
+
+# Registre de schémas propre à chaque processus de parsing (voir init_worker). Les fonctions
+# du pool vivent ici, hors de Django: avec spawn / forkserver, chaque processus réimporte ce
+# module sans avoir configuré Django.
+_worker_registry: SchemaRegistry | None = None
+
+
+def init_worker(schemas: dict[str, HeaderSchema]):
+    global _worker_registry
+    _worker_registry = SchemaRegistry(schemas=schemas)
+
+
+def parse_job(job: tuple[str, tuple[str, ...], int, str]) -> ParsedFile | None:
+    filename, labels, verbose, csv_engine = job
+    return parse_file(filename, labels, verbose, _worker_registry, engine=csv_engine)
@@ -0,0 +1,179 @@
+"""
+Agrégats pré-calculés de RawData (count, min, max, mean, last par mesure) à 5 minutes
+et à l'heure, pour que les graphiques sur de longues périodes ne lisent pas les lignes
+minute par minute.
+
+Les deux niveaux sont calculés à partir des lignes brutes, sur des fenêtres alignées
+sur l'heure: `compute_for_days` (appelé par `update_db` pour les journées importées)
+remplace les tranches des journées concernées, `rebuild_all` reconstruit tout
+(commande `rebuild_rollups`).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone as djtz
+
+from okofen_data import data_api
+from okofen_data.models import ROLLUP_STATS, RawData, RawData5Min, RawDataHourly, RollupBase
+
+# Nombre maximal de journées consécutives lues en une requête
+MAX_RUN_DAYS = 31
+
+
+@dataclass(frozen=True)
+class Tier:
+    name: str
+    model: type[RollupBase] | None
+    seconds: int
+
+    @property
+    def freq(self) -> str:
+        return f"{self.seconds}s"
+
+
+RAW_TIER = Tier("raw", None, 60)
+TIERS: tuple[Tier, ...] = (
+    RAW_TIER,
+    Tier("5min", RawData5Min, 300),
+    Tier("hour", RawDataHourly, 3600),
+)
+ROLLUP_TIERS: tuple[Tier, ...] = TIERS[1:]
+ALIGN_SECONDS = max(tier.seconds for tier in TIERS)
+
+
+def _floor(value: datetime, seconds: int = ALIGN_SECONDS) -> datetime:
+    # Alignement en UTC, comme les tranches (l'heure locale peut être décalée d'une demi-heure)
+    return pd.Timestamp(value).tz_convert("UTC").floor(f"{seconds}s").to_pydatetime()
+
+
+def _ceil(value: datetime, seconds: int = ALIGN_SECONDS) -> datetime:
+    return pd.Timestamp(value).tz_convert("UTC").ceil(f"{seconds}s").to_pydatetime()
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    """Fenêtre de la journée (pivot 03:00 local), comme daily_stats."""
+    start = djtz.make_aware(datetime(day.year, day.month, day.day, 3, 0, 0), timezone=djtz.get_current_timezone())
+    return start, start + timedelta(days=1)
+
+
+def _columns() -> list[str]:
+    """Champs des tables d'agrégats, dans l'ordre des tuples produits par _aggregate."""
+    return ["bucket", "samples"] + [
+        f"{field}_{stat}" for field in data_api.METRIC_FIELDS.values() for stat in ROLLUP_STATS
+    ]
+
+
+def _aggregate(df: pd.DataFrame, tier: Tier) -> list[tuple]:
+    """Tuples (bucket, samples, <champ>_<stat>...) des tranches de `tier` couvertes par `df`."""
+    grouped = df.groupby(df.index.floor(tier.freq))
+    samples = grouped.size()
+    stats = grouped.agg(list(ROLLUP_STATS))
+    adapt = connection.ops.adapt_datetimefield_value
+    columns = [[adapt(b) for b in samples.index.to_pydatetime()], samples.astype(np.int64).tolist()]
+    for label in data_api.METRIC_FIELDS:
+        for stat in ROLLUP_STATS:
+            values = stats[(label, stat)]
+            if stat == "count":
+                columns.append(values.astype(np.int64).tolist())
+            else:
+                columns.append(values.astype(object).where(values.notna(), None).tolist())
+    return list(zip(*columns))
+
+
+def _insert(model: type[RollupBase], rows: list[tuple], batch_size: int) -> None:
+    # executemany plutôt que bulk_create: ~100 champs par ligne, la préparation ORM domine
+    table = connection.ops.quote_name(model._meta.db_table)
+    cols = ", ".join(connection.ops.quote_name(model._meta.get_field(name).column) for name in _columns())
+    placeholders = ", ".join(["%s"] * len(_columns()))
+    sql = f"INSERT INTO {table} ({cols}) VALUES ({placeholders})"
+    with connection.cursor() as cursor:
+        for i in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[i:i + batch_size])
+
+
+@transaction.atomic
+def compute_range(start: datetime, end: datetime, batch_size: int = 1000) -> dict[str, int]:
+    """
+    Recalcule les tranches de tous les niveaux sur [start, end) élargi à l'heure.
+    Retourne le nombre de tranches écrites par niveau.
+    """
+    start, end = _floor(start), _ceil(end)
+    qs = RawData.objects.filter(datetime__gte=start, datetime__lt=end).order_by("datetime")
+    df = data_api.query_values(qs)
+    written = {}
+    for tier in ROLLUP_TIERS:
+        tier.model.objects.filter(bucket__gte=start, bucket__lt=end).delete()
+        rows = _aggregate(df, tier) if not df.empty else []
+        _insert(tier.model, rows, batch_size)
+        written[tier.name] = len(rows)
+    return written
+
+
+def _day_runs(days: Iterable[date]) -> list[tuple[date, date]]:
+    """Regroupe les journées en suites consécutives d'au plus MAX_RUN_DAYS jours."""
+    runs: list[tuple[date, date]] = []
+    for day in sorted({d for d in days if d is not None}):
+        if runs and day == runs[-1][1] + timedelta(days=1) and (day - runs[-1][0]).days < MAX_RUN_DAYS:
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+def compute_for_days(days: Iterable[date]) -> dict[str, int]:
+    """Recalcule les agrégats des journées (pivot 03:00) données."""
+    written = {tier.name: 0 for tier in ROLLUP_TIERS}
+    for first, last in _day_runs(days):
+        counts = compute_range(_day_bounds(first)[0], _day_bounds(last)[1])
+        for name, count in counts.items():
+            written[name] += count
+    return written
+
+
+def rebuild_all() -> dict[str, int]:
+    """Supprime et recalcule tous les agrégats à partir de RawData."""
+    for tier in ROLLUP_TIERS:
+        tier.model.objects.all().delete()
+    first = RawData.objects.order_by("datetime").values_list("datetime", flat=True).first()
+    last = RawData.objects.order_by("-datetime").values_list("datetime", flat=True).first()
+    if first is None:
+        return {tier.name: 0 for tier in ROLLUP_TIERS}
+    day_start = (djtz.localtime(first) - timedelta(hours=3)).date()
+    day_end = (djtz.localtime(last) - timedelta(hours=3)).date()
+    return compute_for_days(day_start + timedelta(days=i) for i in range((day_end - day_start).days + 1))
+
+
+def covers(tier: Tier, start: datetime, end: datetime) -> bool:
+    """
+    Vrai si les tranches de `tier` lues sur [start, end) (bucket >= start, bucket < end)
+    agrègent toutes les lignes brutes qu'elles recouvrent, soit [ceil(start), ceil(end)):
+    une journée importée avant la migration, ou pas encore agrégée, fait retomber sur RawData.
+    """
+    summary = tier.model.objects.filter(bucket__gte=start, bucket__lt=end).aggregate(buckets=Count("id"), samples=Sum("samples"))
+    if not summary["buckets"]:
+        return False
+    raw = RawData.objects.filter(
+        datetime__gte=_ceil(start, tier.seconds), datetime__lt=_ceil(end, tier.seconds)
+    ).count()
+    return summary["samples"] == raw
+
+
+def select_tier(start: datetime, end: datetime, max_points: int | None) -> Tier:
+    """
+    Niveau le plus grossier qui fournit encore au moins `max_points` tranches sur
+    [start, end]; données brutes si `max_points` est absent.
+    """
+    if max_points is None:
+        return RAW_TIER
+    span = (end - start).total_seconds()
+    for tier in reversed(TIERS):
+        if span / tier.seconds >= max_points:
+            return tier
+    return RAW_TIER
@@ -0,0 +1,74 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from src import attachment_index
+from src.attachment_index import ATTACHMENT_INDEX_FILE, CONFLICTS_DIR, AttachmentIndex, sha256_bytes
+
+DAY_1 = b"Datum ;Zeit ;AT [\xb0C]\r\n08.01.2024;00:00:00;-3,5\r\n"
+DAY_2 = b"Datum ;Zeit ;AT [\xb0C]\r\n09.01.2024;00:00:00;1,5\r\n"
+
+
+class AttachmentIndexTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def read(self, *parts: str) -> bytes:
+        with open(os.path.join(self.data_dir, *parts), "rb") as fp:
+            return fp.read()
+
+    def test_new_file_is_written(self):
+        index = AttachmentIndex(self.data_dir)
+        status, path = index.add("touch_20240108.csv", DAY_1)
+        self.assertEqual((status, path), ("new", os.path.join(self.data_dir, "touch_20240108.csv")))
+        self.assertEqual(self.read("touch_20240108.csv"), DAY_1)
+        self.assertIn("touch_20240108.csv", index)
+
+    def test_duplicate_content_is_not_written(self):
+        index = AttachmentIndex(self.data_dir)
+        index.add("touch_20240108.csv", DAY_1)
+        # Même contenu sous un autre nom (relevé renvoyé): rien n'est écrit
+        status, path = index.add("touch_20240108 (1).csv", DAY_1)
+        self.assertEqual((status, path), ("duplicate", os.path.join(self.data_dir, "touch_20240108.csv")))
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, "touch_20240108 (1).csv")))
+        self.assertEqual(index.add("touch_20240108.csv", DAY_1)[0], "duplicate")
+        self.assertEqual(len(index), 1)
+
+    def test_same_name_conflict_archives_previous_version(self):
+        index = AttachmentIndex(self.data_dir)
+        index.add("touch_20240108.csv", DAY_1)
+        status, path = index.add("touch_20240108.csv", DAY_2)
+        self.assertEqual(status, "conflict")
+        self.assertEqual(self.read("touch_20240108.csv"), DAY_2)
+        archived = f"touch_20240108.{sha256_bytes(DAY_1)[:12]}.csv"
+        self.assertEqual(os.listdir(os.path.join(self.data_dir, CONFLICTS_DIR)), [archived])
+        self.assertEqual(self.read(CONFLICTS_DIR, archived), DAY_1)
+        conflict = index.conflicts[0]
+        self.assertEqual(conflict["previous_sha256"], sha256_bytes(DAY_1))
+        self.assertEqual(conflict["sha256"], sha256_bytes(DAY_2))
+        self.assertEqual(conflict["archived_as"], os.path.join(CONFLICTS_DIR, archived))
+        # L'ancien contenu n'est plus connu: il redevient une nouvelle pièce jointe
+        self.assertEqual(index.lookup("touch_20240109.csv", DAY_1)[0], "new")
+
+    def test_saved_index_only_rehashes_changed_files(self):
+        index = AttachmentIndex(self.data_dir)
+        index.add("touch_20240108.csv", DAY_1)
+        index.add("touch_20240108.csv", DAY_2)
+        index.add("touch_20240109.csv", DAY_1)
+        self.assertTrue(index.save())
+        with open(os.path.join(self.data_dir, ATTACHMENT_INDEX_FILE)) as fp:
+            self.assertEqual(len(json.load(fp)["conflicts"]), 1)
+        with mock.patch.object(attachment_index, "sha256_file", wraps=attachment_index.sha256_file) as hashed:
+            reloaded = AttachmentIndex(self.data_dir)
+        hashed.assert_not_called()
+        self.assertEqual(reloaded.by_name, index.by_name)
+        self.assertEqual(len(reloaded.conflicts), 1)
+        # Le fichier archivé (conflicts/) est hors du motif touch_*.csv de data_dir
+        self.assertEqual(len(reloaded), 2)
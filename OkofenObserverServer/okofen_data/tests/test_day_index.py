@@ -0,0 +1,80 @@
+import datetime
+import os
+import tempfile
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from src.okofen import DAY_INDEX_FILE, Okofen, OkofenConfig
+from src.okofen_store import COMPLETE_DAY_ROWS, DayIndex
+
+from .test_okofen_store import make_frame
+
+
+def minutes(start: str, count: int) -> pd.DatetimeIndex:
+    return pd.date_range(start, periods=count, freq="min")
+
+
+class DayIndexTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "okofen_days.memmap.json")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_completeness_threshold(self):
+        index = DayIndex(self.path)
+        index.update(minutes("2024-01-08", COMPLETE_DAY_ROWS).append(minutes("2024-01-09", COMPLETE_DAY_ROWS + 1)))
+        self.assertFalse(index.entries["2024-01-08"]["complete"])
+        self.assertTrue(index.entries["2024-01-09"]["complete"])
+        self.assertEqual(index.entries["2024-01-09"]["rows"], COMPLETE_DAY_ROWS + 1)
+        self.assertEqual(index.lastest_complete_date(), (2024, 1, 9))
+
+    def test_incremental_update(self):
+        index = DayIndex(self.path)
+        index.rebuild(minutes("2024-01-08", 1440).append(minutes("2024-01-09", 600)))
+        self.assertEqual(index.lastest_complete_date(), (2024, 1, 8))
+        first_day = dict(index.entries["2024-01-08"])
+        # Le 9 est complété et le 10 commence: seuls ces jours sont recalculés
+        index.update(minutes("2024-01-09", 1440 + 30), days={datetime.date(2024, 1, 9), datetime.date(2024, 1, 10)})
+        index.save()
+        self.assertEqual(index.entries["2024-01-08"], first_day)
+        self.assertEqual(index.entries["2024-01-09"]["rows"], 1440)
+        self.assertEqual(index.entries["2024-01-10"]["rows"], 30)
+        self.assertEqual(index.entries["2024-01-10"]["last"], "2024-01-10T00:29:00")
+        reloaded = DayIndex(self.path)
+        self.assertTrue(reloaded.loaded)
+        self.assertEqual(reloaded.days(), [datetime.date(2024, 1, d) for d in (8, 9, 10)])
+        self.assertEqual(reloaded.lastest_complete_date(), (2024, 1, 9))
+
+    def test_update_drops_days_without_rows(self):
+        index = DayIndex(self.path)
+        index.update(minutes("2024-01-08", 1440))
+        index.update(pd.DatetimeIndex([]), days=[datetime.date(2024, 1, 8)])
+        self.assertEqual(index.days(), [])
+        self.assertIsNone(index.lastest_complete_date())
+
+    def test_unreadable_sidecar_is_not_loaded(self):
+        with open(self.path, "w") as fp:
+            fp.write("{not json")
+        self.assertFalse(DayIndex(self.path).loaded)
+
+
+class OkofenDayIndexTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.config = OkofenConfig(data_dir=self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_missing_sidecar_is_rebuilt_from_store(self):
+        okofen = Okofen(self.config, storage="memmap")
+        okofen.store.append(make_frame("2024-01-08", 1440 + 90))
+        sidecar = os.path.join(self._tmp.name, DAY_INDEX_FILE.format(storage="memmap"))
+        self.assertFalse(os.path.exists(sidecar))
+        self.assertEqual(okofen.get_day_list(), [datetime.date(2024, 1, 8), datetime.date(2024, 1, 9)])
+        self.assertTrue(os.path.exists(sidecar))
+        self.assertEqual(DayIndex(sidecar).entries["2024-01-09"]["rows"], 90)
+        self.assertEqual(okofen.get_day_index().lastest_complete_date(), (2024, 1, 8))
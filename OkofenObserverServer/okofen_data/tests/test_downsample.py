@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from okofen_data import downsample
+
+
+class DownsampleTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 5000
+        values = np.cumsum(rng.normal(0, 1, (n, 3)), axis=0)
+        values[rng.choice(n, 200, replace=False), 1] = np.nan
+        index = pd.date_range("2024-01-08 03:00", periods=n, freq="1min", tz="UTC")
+        self.df = pd.DataFrame(values, index=index, columns=["a", "b", "c"])
+
+    def test_indices_keep_endpoints_within_budget(self):
+        x = self.df.index.asi8.astype(np.float64) / 1e9
+        n = len(self.df)
+        for max_points in (3, 4, 7, 100, 999):
+            for col in self.df.columns:
+                y = self.df[col].to_numpy()
+                picks = {
+                    "lttb": downsample.lttb_indices(x, y, max_points),
+                    "minmax": downsample.minmax_indices(y, max_points),
+                }
+                for method, idx in picks.items():
+                    with self.subTest(method=method, max_points=max_points, column=col):
+                        self.assertLessEqual(len(idx), max_points)
+                        self.assertEqual(idx[0], 0)
+                        self.assertEqual(idx[-1], n - 1)
+                        self.assertTrue(np.all(np.diff(idx) > 0))
+                self.assertEqual(len(picks["lttb"]), max_points)
+
+    def test_downsample_single_series(self):
+        series = self.df[["a"]]
+        for method in downsample.METHODS:
+            for max_points in (3, 10, 250):
+                with self.subTest(method=method, max_points=max_points):
+                    out = downsample.downsample(series, max_points, method)
+                    self.assertLessEqual(len(out), max_points)
+                    self.assertEqual(out.index[0], series.index[0])
+                    self.assertEqual(out.index[-1], series.index[-1])
+                    pd.testing.assert_frame_equal(out, series.loc[out.index])
+
+    def test_minmax_keeps_extremes(self):
+        out = downsample.downsample(self.df, 100, "minmax")
+        for col in self.df.columns:
+            self.assertEqual(out[col].max(), self.df[col].max())
+            self.assertEqual(out[col].min(), self.df[col].min())
+
+    def test_small_frames_are_unchanged(self):
+        self.assertIs(downsample.downsample(self.df, len(self.df), "lttb"), self.df)
+        with self.assertRaises(ValueError):
+            downsample.downsample(self.df, 10, "mean")
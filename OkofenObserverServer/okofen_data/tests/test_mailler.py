@@ -0,0 +1,222 @@
+import email
+import imaplib
+import json
+import os
+import tempfile
+from datetime import date
+from email.message import EmailMessage
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from benchmarks.fake_imap import OKOFEN_SENDER, FakeImapServer, Mailbox, make_okofen_email, seed_mailbox
+from benchmarks.synthetic import generate_touch_files
+from src.mailler import EmailConnector, decode_part, find_attachment_parts, parse_fetch_response, retry_call
+
+
+# BODYSTRUCTURE multipart/mixed: texte + HTML (multipart/alternative imbriqué), puis
+# deux pièces jointes dont une seule est un relevé touch_*.csv
+NESTED_BODYSTRUCTURE = (
+    b'1 (UID 42 BODYSTRUCTURE ((("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" 12 1 NIL NIL NIL)'
+    b'("TEXT" "HTML" ("CHARSET" "utf-8") NIL NIL "QUOTED-PRINTABLE" 30 2 NIL NIL NIL) "ALTERNATIVE" '
+    b'("BOUNDARY" "b2") NIL NIL)'
+    b'("APPLICATION" "OCTET-STREAM" ("NAME" "touch_20240108.csv") NIL NIL "BASE64" 24 NIL '
+    b'("ATTACHMENT" ("FILENAME" "touch_20240108.csv")) NIL)'
+    b'("IMAGE" "PNG" ("NAME" "logo.png") NIL NIL "BASE64" 8 NIL ("INLINE" ("FILENAME" "logo.png")) NIL) '
+    b'"MIXED" ("BOUNDARY" "b1") NIL NIL))'
+)
+
+
+# Rapport transféré en pièce jointe: texte, puis message/rfc822 (enveloppe + multipart imbriqué)
+FORWARDED_BODYSTRUCTURE = (
+    b'3 (UID 43 BODYSTRUCTURE (("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" 10 1 NIL NIL NIL)'
+    b'("MESSAGE" "RFC822" NIL NIL NIL "7BIT" 900 '
+    b'("Mon, 8 Jan 2024 03:00:00 +0100" "P0060B5_41F11E" (("Okofen" NIL "okofen" "pellematic.example")) '
+    b'NIL NIL ((NIL NIL "me" "example.com")) NIL NIL NIL "<1@pellematic.example>") '
+    b'(("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" 18 1 NIL NIL NIL)'
+    b'("APPLICATION" "OCTET-STREAM" NIL NIL NIL "BASE64" 24 NIL ("ATTACHMENT" ("FILENAME" "touch_20240108.csv")) NIL) '
+    b'"MIXED" ("BOUNDARY" "b3") NIL NIL) 30 NIL ("ATTACHMENT" ("FILENAME" "Rapport.eml")) NIL NIL) '
+    b'"MIXED" ("BOUNDARY" "b1") NIL NIL))'
+)
+
+
+class FetchResponseTests(SimpleTestCase):
+    def test_literals_and_atoms(self):
+        data = [
+            (b'1 (UID 7 BODY[2] {12}', b"QUJDOzEyLDUK"),
+            b" FLAGS (\\Seen) RFC822.SIZE 1234)",
+            (b'2 (UID 8 BODY[2] {4}', b"RA==\r\n"[:4]),
+            b' INTERNALDATE "08-Jan-2024 03:00:00 +0100" BODY[3] NIL)',
+        ]
+        first, second = parse_fetch_response(data)
+        self.assertEqual(first["UID"], 7)
+        self.assertEqual(first["BODY[2]"], b"QUJDOzEyLDUK")
+        self.assertEqual(first["FLAGS"], ["\\Seen"])
+        self.assertEqual(first["RFC822.SIZE"], 1234)
+        self.assertEqual(decode_part(first["BODY[2]"], "BASE64"), b"ABC;12,5\n")
+        self.assertEqual(second["UID"], 8)
+        self.assertEqual(second["BODY[2]"], b"RA==")
+        self.assertEqual(second["INTERNALDATE"], "08-Jan-2024 03:00:00 +0100")
+        self.assertIsNone(second["BODY[3]"])
+
+    def test_nested_multipart(self):
+        (msg,) = parse_fetch_response([NESTED_BODYSTRUCTURE])
+        self.assertEqual(msg["UID"], 42)
+        structure = msg["BODYSTRUCTURE"]
+        self.assertEqual(find_attachment_parts(structure), [("2", "touch_20240108.csv", "BASE64")])
+        self.assertEqual(find_attachment_parts(structure, "logo"), [("3", "logo.png", "BASE64")])
+        self.assertEqual(find_attachment_parts(structure[0], "", "1"), [])
+
+    def test_single_part_message(self):
+        structure = ["TEXT", "CSV", ["NAME", "touch_20240109.csv"], None, None, "QUOTED-PRINTABLE", 10, 1, None, None, None]
+        self.assertEqual(find_attachment_parts(structure), [("1", "touch_20240109.csv", "QUOTED-PRINTABLE")])
+        self.assertEqual(find_attachment_parts(None), [])
+
+    def test_forwarded_message(self):
+        (msg,) = parse_fetch_response([FORWARDED_BODYSTRUCTURE])
+        self.assertEqual(find_attachment_parts(msg["BODYSTRUCTURE"]), [("2.2", "touch_20240108.csv", "BASE64")])
+        # message/rfc822 dont le corps n'est pas multipart: partie n.1
+        single = ["MESSAGE", "RFC822", None, None, None, "7BIT", 500, ["date", "subject"],
+                  ["TEXT", "CSV", ["NAME", "touch_20240109.csv"], None, None, "BASE64", 10, 1], 20]
+        self.assertEqual(find_attachment_parts([single, "MIXED"]), [("1.1", "touch_20240109.csv", "BASE64")])
+
+    def test_rfc2231_filenames(self):
+        def attachment(*params):
+            return ["APPLICATION", "OCTET-STREAM", None, None, None, "BASE64", 24, None, ["ATTACHMENT", list(params)], None]
+
+        cases = [
+            (("FILENAME*", "utf-8''touch_20240108.csv"), "touch_20240108.csv"),
+            (("FILENAME*0*", "utf-8''touch_2024", "FILENAME*1*", "0108%2Ecsv"), "touch_20240108.csv"),
+            (("FILENAME*0", "touch_", "FILENAME*1", "20240108.csv"), "touch_20240108.csv"),
+            (("FILENAME", "fallback.csv", "FILENAME*", "iso-8859-1'fr'touch_%E9t%E9.csv"), "touch_été.csv"),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                structure = [attachment(*params), "MIXED"]
+                self.assertEqual(find_attachment_parts(structure), [("1", expected, "BASE64")])
+
+
+class FakeImapTestCase(SimpleTestCase):
+    """Serveur IMAP local (benchmarks.fake_imap) et CSV synthétiques, un par email."""
+
+    server_options: dict = {}
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.files = generate_touch_files(tmp.name, date(2024, 1, 8), 6)
+        self.server = FakeImapServer(**self.server_options).start()
+        self.addCleanup(self.server.stop)
+
+    def connector(self, **kwargs) -> EmailConnector:
+        connector = EmailConnector(
+            self.server.username, self.server.password, "127.0.0.1", self.server.port, use_ssl=False, **kwargs
+        )
+        connector.verbose = False
+        self.assertTrue(connector.connect_mailbox())
+        connector.set_directory("INBOX", readonly=True)
+        self.addCleanup(connector.logout_mailbox)
+        return connector
+
+    def contents(self, path: str) -> bytes:
+        with open(path, "rb") as fp:
+            return fp.read()
+
+
+class ForwardedReportTests(FakeImapTestCase):
+    def test_parts_mode_finds_forwarded_report(self):
+        box = self.server.mailboxes["INBOX"]
+        forward = EmailMessage()
+        forward["From"] = OKOFEN_SENDER
+        forward["Subject"] = "Fwd: rapport"
+        forward.set_content("Voir le rapport joint")
+        forward.add_attachment(email.message_from_bytes(make_okofen_email(self.files[0])))
+        uid = box.append(forward.as_bytes())
+
+        ((got_uid, attachments),) = self.connector().fetch_attachment_parts([uid])
+        self.assertEqual(got_uid, uid)
+        self.assertEqual(attachments, [("touch_20240108.csv", self.contents(self.files[0]))])
+
+
+class ConnectionDropTests(FakeImapTestCase):
+    # Une commande FETCH sur trois coupe la connexion (toutes connexions confondues)
+    server_options = {"drop_after": 3}
+
+    def setUp(self):
+        super().setUp()
+        seed_mailbox(self.server, self.files)
+
+    def test_every_uid_returned_once(self):
+        expected = {os.path.basename(path): self.contents(path) for path in self.files}
+        for workers in (1, 3):
+            with self.subTest(workers=workers):
+                connector = self.connector()
+                uids = connector.search_new_emails("FROM", OKOFEN_SENDER)
+                self.assertEqual(len(uids), len(self.files))
+                results = list(connector.fetch_attachment_parts(uids, batch_size=2, workers=workers, backoff=0))
+                self.assertEqual([uid for uid, _ in results], uids)
+                received = {name: payload for _, attachments in results for name, payload in attachments}
+                self.assertEqual(received, expected)
+
+    def test_budget_exhausted_raises(self):
+        self.server.drop_after = 1
+        connector = self.connector()
+        uids = connector.search_new_emails("FROM", OKOFEN_SENDER)
+        with self.assertRaises(imaplib.IMAP4.abort):
+            list(connector.fetch_attachment_parts(uids, retries=2, backoff=0))
+
+    def test_exponential_backoff(self):
+        calls = []
+
+        def action(attempt):
+            calls.append(attempt)
+            if attempt < 3:
+                raise OSError("connection reset")
+            return "done"
+
+        with mock.patch("src.mailler.time.sleep") as sleep:
+            self.assertEqual(retry_call(action, retries=3, backoff=0.5), "done")
+        self.assertEqual(calls, [0, 1, 2, 3])
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [0.5, 1.0, 2.0])
+
+
+class IncrementalSyncTests(FakeImapTestCase):
+    def setUp(self):
+        super().setUp()
+        self.state_file = os.path.join(self.tmp, "okofen_imap_state.json")
+
+    def test_only_new_uids_after_saved_state(self):
+        seed_mailbox(self.server, self.files[:3])
+        connector = self.connector(state_file=self.state_file)
+        self.assertEqual(connector.current_uidvalidity, 1)
+        self.assertEqual(connector.search_new_emails("FROM", OKOFEN_SENDER), [1, 2, 3])
+        connector.set_last_uid(3)
+        connector.set_last_uid(2)  # jamais en arrière
+        self.assertTrue(connector.save_state())
+
+        # Nouveau passage: état relu depuis le fichier
+        connector = self.connector(state_file=self.state_file)
+        self.assertEqual(connector.get_last_uid(), 3)
+        # `UID 4:*` renvoie tout de même le dernier message: filtré
+        self.assertEqual(connector.search_new_emails("FROM", OKOFEN_SENDER), [])
+        seed_mailbox(self.server, self.files[3:])
+        self.assertEqual(connector.search_new_emails("FROM", OKOFEN_SENDER), [4, 5, 6])
+
+    def test_uidvalidity_change_resets_last_uid(self):
+        seed_mailbox(self.server, self.files)
+        connector = self.connector(state_file=self.state_file)
+        connector.set_last_uid(6)
+        connector.save_state()
+
+        # Répertoire recréé côté serveur: les UID repartent de 1 sous une autre UIDVALIDITY
+        self.server.mailboxes["INBOX"] = Mailbox(uidvalidity=2)
+        seed_mailbox(self.server, self.files[:2])
+        connector = self.connector(state_file=self.state_file)
+        self.assertEqual(connector.current_uidvalidity, 2)
+        self.assertEqual(connector.get_last_uid(), 0)
+        self.assertEqual(connector.search_new_emails("FROM", OKOFEN_SENDER), [1, 2])
+        connector.set_last_uid(1)
+        connector.save_state()
+        with open(self.state_file) as fp:
+            self.assertEqual(json.load(fp), {f"{self.server.username}/INBOX": {"uidvalidity": 2, "last_uid": 1}})
@@ -0,0 +1,96 @@
+import mailbox
+import os
+import tempfile
+import zipfile
+from datetime import date
+
+from django.test import SimpleTestCase
+
+from benchmarks.fake_imap import make_okofen_email
+from benchmarks.synthetic import generate_touch_files
+from src.offline_sources import detect_source_type, extract_source, iter_source
+
+
+class OfflineSourceTests(SimpleTestCase):
+    """Un fixture par type de source, construit à partir de trois CSV synthétiques."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.files = generate_touch_files(os.path.join(self.tmp, "reports"), date(2024, 1, 8), 3)
+        self.data_dir = os.path.join(self.tmp, "data")
+        os.makedirs(self.data_dir)
+
+    def expected(self) -> dict[str, bytes]:
+        out = {}
+        for path in self.files:
+            with open(path, "rb") as fp:
+                out[os.path.basename(path)] = fp.read()
+        return out
+
+    def extracted(self) -> dict[str, bytes]:
+        out = {}
+        for name in sorted(os.listdir(self.data_dir)):
+            if name.startswith("touch") and name.endswith(".csv"):
+                with open(os.path.join(self.data_dir, name), "rb") as fp:
+                    out[name] = fp.read()
+        return out
+
+    def make_mbox(self) -> str:
+        path = os.path.join(self.tmp, "takeout.mbox")
+        box = mailbox.mbox(path)
+        for f in self.files:
+            box.add(make_okofen_email(f))
+        box.add(make_okofen_email(self.files[0]))  # rapport renvoyé: doublon
+        box.flush()
+        box.close()
+        return path
+
+    def make_maildir(self) -> str:
+        path = os.path.join(self.tmp, "Maildir")
+        box = mailbox.Maildir(path)
+        for f in self.files:
+            box.add(make_okofen_email(f))
+        return path
+
+    def make_zip(self) -> str:
+        path = os.path.join(self.tmp, "export.zip")
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.write(self.files[0], f"2024/{os.path.basename(self.files[0])}")
+            archive.writestr("2024/report.eml", make_okofen_email(self.files[1]))
+            archive.writestr("2024/report2.eml", make_okofen_email(self.files[2]))
+            archive.writestr("2024/notes.txt", b"hors rapport")
+            archive.writestr("2024/empty/", b"")
+        return path
+
+    def test_detect_source_type(self):
+        self.assertEqual(detect_source_type(self.make_mbox()), "mbox")
+        self.assertEqual(detect_source_type(self.make_maildir()), "maildir")
+        self.assertEqual(detect_source_type(self.make_zip()), "zip")
+        with self.assertRaises(ValueError):
+            detect_source_type(self.data_dir)
+        with self.assertRaises(ValueError):
+            list(iter_source(self.make_zip(), source_type="tar"))
+
+    def test_mbox(self):
+        written = []
+        stats = extract_source(self.make_mbox(), self.data_dir, on_file=written.append)
+        self.assertEqual(self.extracted(), self.expected())
+        self.assertEqual((stats["messages"], stats["written"], stats["skipped"]), (4, 3, 1))
+        self.assertEqual(sorted(written), sorted(os.path.join(self.data_dir, n) for n in self.expected()))
+
+    def test_maildir(self):
+        stats = extract_source(self.make_maildir(), self.data_dir)
+        self.assertEqual(self.extracted(), self.expected())
+        self.assertEqual((stats["messages"], stats["written"]), (3, 3))
+
+    def test_zip(self):
+        source = self.make_zip()
+        stats = extract_source(source, self.data_dir)
+        self.assertEqual(self.extracted(), self.expected())
+        # Le CSV et les deux .eml; notes.txt et le répertoire sont ignorés
+        self.assertEqual((stats["messages"], stats["written"]), (3, 3))
+        # Deuxième passage: tout est déjà présent
+        again = extract_source(source, self.data_dir)
+        self.assertEqual((again["written"], again["skipped"]), (0, 3))
@@ -0,0 +1,69 @@
+import os
+import tempfile
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from benchmarks.synthetic import write_touch_file
+from src.okofen import OKOFEN_CSV_ENCODING, read_okofen_csv
+
+HEADER = "Datum ;Zeit ;AT [°C];PE1 KT[°C];HK1 Pumpe;"
+
+
+class ReadOkofenCsvTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, *rows: str) -> str:
+        path = os.path.join(self.tmp, "touch_20240108.csv")
+        with open(path, "w", encoding=OKOFEN_CSV_ENCODING, newline="") as fp:
+            fp.write("\r\n".join((HEADER, *rows)) + "\r\n")
+        return path
+
+    def test_float32_and_decimal_comma(self):
+        path = self.write("08.01.2024;00:00:00;-3,5;61,2;1;", "08.01.2024;00:01:00;-3,4;61,0;0;")
+        df = read_okofen_csv(path)
+        self.assertEqual(df["AT [°C]"].dtype, np.float32)
+        self.assertEqual(df["HK1 Pumpe"].dtype, np.float32)
+        self.assertEqual(df["Datum "].tolist(), ["08.01.2024", "08.01.2024"])
+        np.testing.assert_allclose(df["AT [°C]"], [-3.5, -3.4], rtol=1e-6)
+
+    def test_usecols_and_dtype_dict(self):
+        path = self.write("08.01.2024;00:00:00;-3,5;61,2;1;")
+        df = read_okofen_csv(path, columns=["Datum", "Zeit", "PE1 KT[°C]", "HK1 Pumpe"], dtype={"HK1 Pumpe": "int8"})
+        self.assertEqual(list(df.columns), ["Datum ", "Zeit ", "PE1 KT[°C]", "HK1 Pumpe"])
+        self.assertEqual(df["PE1 KT[°C]"].dtype, np.float32)
+        self.assertEqual(df["HK1 Pumpe"].dtype, np.int8)
+
+    def test_non_numeric_cell_becomes_nan(self):
+        path = self.write("08.01.2024;00:00:00;-3,5;61,2;1;", "08.01.2024;00:01:00;---;61,0;0;")
+        df = read_okofen_csv(path, columns=["Datum", "Zeit", "AT [°C]", "PE1 KT[°C]"])
+        self.assertEqual(df["AT [°C]"].dtype, np.float32)
+        self.assertAlmostEqual(float(df["AT [°C]"][0]), -3.5, places=5)
+        self.assertTrue(np.isnan(df["AT [°C]"][1]))
+        np.testing.assert_allclose(df["PE1 KT[°C]"], [61.2, 61.0], rtol=1e-6)
+
+    def test_replicated_headers_are_skipped(self):
+        path = write_touch_file(self.tmp, date(2024, 1, 8), np.random.default_rng(0), replicated_headers=3)
+        df = read_okofen_csv(path, columns=["Datum", "Zeit", "AT [°C]"])
+        self.assertEqual(len(df), 1440)
+        self.assertEqual(df["AT [°C]"].dtype, np.float32)
+        self.assertFalse((df["Datum "] == "Datum ").any())
+        # Colonnes texte seules: le parsing ne peut pas échouer, les entêtes sont filtrés après coup
+        self.assertEqual(len(read_okofen_csv(path, columns=["Datum", "Zeit"])), 1440)
+
+    def test_pyarrow_engine_matches_c(self):
+        path = write_touch_file(self.tmp, date(2024, 1, 8), np.random.default_rng(0))
+        columns = ["Datum", "Zeit", "AT [°C]", "PE1 KT[°C]", "HK1 Pumpe"]
+        expected = read_okofen_csv(path, columns=columns)
+        df = read_okofen_csv(path, columns=columns, engine="pyarrow")
+        pd.testing.assert_frame_equal(df.astype({"Datum ": object, "Zeit ": object}), expected)
+
+    def test_missing_file_returns_none(self):
+        self.assertIsNone(read_okofen_csv(os.path.join(self.tmp, "absent.csv")))
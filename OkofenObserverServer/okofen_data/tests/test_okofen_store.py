@@ -0,0 +1,120 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+
+from src.okofen_store import HDF5TableStore, MemmapStore, ParquetStore
+
+COLUMNS = ["T°C Extérieure", "T°C Chaudière", "Niveau Sillo kg"]
+
+
+def make_frame(start: str, minutes: int, offset: float = 0.0) -> pd.DataFrame:
+    """Mesures minute par minute à partir de `start` (valeurs déterministes, décalées de `offset`)."""
+    index = pd.date_range(start, periods=minutes, freq="min")
+    values = np.arange(minutes, dtype=np.float32)[:, None] + np.arange(len(COLUMNS), dtype=np.float32) * 1000
+    return pd.DataFrame(values + offset, index=index, columns=COLUMNS)
+
+
+class StoreTestMixin:
+    """Tests communs aux stockages: `make_store()` retourne un stockage vide."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_append_read_round_trip(self):
+        store = self.make_store()
+        self.assertTrue(store.is_empty())
+        frame = make_frame("2024-01-31 23:00", 120)
+        store.append(frame)
+        data = store.read()
+        self.assertFalse(store.is_empty())
+        self.assertEqual(store.last_timestamp(), frame.index[-1])
+        self.assertEqual(list(data.columns), COLUMNS)
+        self.assertTrue((data.dtypes == np.float32).all())
+        np.testing.assert_array_equal(data.index.values, frame.index.values)
+        np.testing.assert_array_equal(data.to_numpy(), frame.to_numpy())
+
+    def test_overlapping_append_replaces_rows(self):
+        store = self.make_store()
+        store.append(make_frame("2024-01-31 23:00", 120))
+        # Recouvre la dernière demi-heure et déborde d'une demi-heure
+        newer = make_frame("2024-02-01 00:30", 60, offset=0.5)
+        store.append(newer)
+        data = store.read()
+        expected_index = pd.date_range("2024-01-31 23:00", "2024-02-01 01:29", freq="min")
+        np.testing.assert_array_equal(data.index.values, expected_index.values)
+        self.assertFalse(data.index.duplicated().any())
+        np.testing.assert_array_equal(data.loc[newer.index].to_numpy(), newer.to_numpy())
+        self.assertEqual(float(data.iloc[0, 0]), 0.0)
+
+    def test_read_range_and_columns(self):
+        store = self.make_store()
+        store.append(make_frame("2024-01-31 23:00", 120))
+        start, end = pd.Timestamp("2024-01-31 23:50"), pd.Timestamp("2024-02-01 00:10")
+        data = store.read(start, end, columns=COLUMNS[1:2])
+        self.assertEqual(list(data.columns), COLUMNS[1:2])
+        self.assertEqual((data.index[0], data.index[-1], len(data)), (start, end, 21))
+        self.assertEqual(len(store.read(pd.Timestamp("2024-03-01"))), 0)
+
+
+class ParquetStoreTests(StoreTestMixin, SimpleTestCase):
+    def make_store(self):
+        return ParquetStore(os.path.join(self.tmp, "okofen_parquet"))
+
+    def test_partitions_by_month(self):
+        store = self.make_store()
+        touched = store.append(make_frame("2024-01-31 23:00", 120))
+        self.assertEqual(touched, [pd.Period("2024-01"), pd.Period("2024-02")])
+        self.assertEqual(store.append(make_frame("2024-02-01 00:30", 60, offset=0.5)), [pd.Period("2024-02")])
+        self.assertEqual(sorted(os.listdir(store.root)), ["2024-01.parquet", "2024-02.parquet"])
+
+    def test_read_only_missing_store(self):
+        with self.assertRaises(FileNotFoundError):
+            ParquetStore(os.path.join(self.tmp, "absent"), read_only=True)
+
+
+class HDF5TableStoreTests(StoreTestMixin, SimpleTestCase):
+    def make_store(self):
+        return HDF5TableStore(os.path.join(self.tmp, "okofen_table.h5"))
+
+    def test_index_only_read(self):
+        store = self.make_store()
+        store.append(make_frame("2024-01-31 23:00", 120))
+        data = store.read(pd.Timestamp("2024-02-01"), columns=[])
+        self.assertEqual((data.shape, data.index[0]), ((60, 0), pd.Timestamp("2024-02-01")))
+
+    def test_read_only_missing_store(self):
+        with self.assertRaises(FileNotFoundError):
+            HDF5TableStore(os.path.join(self.tmp, "absent.h5"), read_only=True)
+
+
+class MemmapStoreTests(StoreTestMixin, SimpleTestCase):
+    def make_store(self):
+        return MemmapStore(os.path.join(self.tmp, "okofen_memmap"))
+
+    def test_arrays_are_memmaps(self):
+        store = self.make_store()
+        store.append(make_frame("2024-01-31 23:00", 120))
+        index, values = store.arrays(pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-01 00:09"), columns=COLUMNS[:2])
+        self.assertEqual(index.dtype, np.dtype("datetime64[ns]"))
+        self.assertEqual(list(values), COLUMNS[:2])
+        for column in values.values():
+            # Tranche d'un np.memmap en lecture seule: aucune copie en mémoire
+            self.assertIsInstance(column, np.memmap)
+            self.assertFalse(column.flags.owndata)
+            self.assertFalse(column.flags.writeable)
+            self.assertEqual(len(column), 10)
+        np.testing.assert_array_equal(values[COLUMNS[0]], np.arange(60, 70, dtype=np.float32))
+
+    def test_reopen_keeps_columns(self):
+        store = self.make_store()
+        store.append(make_frame("2024-01-31 23:00", 120))
+        reopened = MemmapStore(store.root, read_only=True)
+        self.assertEqual(list(reopened.read().columns), COLUMNS)
+        self.assertEqual(reopened.last_timestamp(), pd.Timestamp("2024-02-01 00:59"))
@@ -0,0 +1,71 @@
+import json
+import os
+import tempfile
+from datetime import date
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from benchmarks.synthetic import write_touch_file
+from okofen_data import parsing
+from okofen_data.parsing import KNOWN_SCHEMAS, SchemaRegistry, header_signature, parse_file, read_header_line
+from src.okofen import OKOFEN_CSV_ENCODING
+
+LABELS = ("T°C Extérieure", "T°C Chaudière")
+
+# Autre firmware: colonnes Date / Heure séparées, mesures dans un autre ordre
+OTHER_HEADER = "Date;Heure;PE1 KT[°C];AT [°C];Remarque"
+
+
+class SchemaRegistryTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.registry_file = os.path.join(self.tmp, "okofen_schemas.json")
+
+    def write_other_layout(self) -> str:
+        path = os.path.join(self.tmp, "touch_20240109.csv")
+        rows = [f"09.01.2024;00:{m:02d}:00;6{m},5;-{m},5;ok" for m in range(3)]
+        with open(path, "w", encoding=OKOFEN_CSV_ENCODING, newline="") as fp:
+            fp.write("\r\n".join([OTHER_HEADER, *rows]) + "\r\n")
+        return path
+
+    def test_known_header_resolves_without_sniffing(self):
+        path = write_touch_file(self.tmp, date(2024, 1, 8), np.random.default_rng(0), replicated_headers=2)
+        self.assertIn(header_signature(read_header_line(path)), KNOWN_SCHEMAS)
+        registry = SchemaRegistry(self.registry_file)
+        with mock.patch.object(parsing, "sniff_schema") as sniff, mock.patch.object(parsing, "read_okfen_data") as untyped:
+            parsed = parse_file(path, LABELS, registry=registry)
+        sniff.assert_not_called()
+        untyped.assert_not_called()
+        self.assertEqual(len(parsed), 1440)
+        self.assertEqual(parsed.schema.strategy, "date_time")
+        self.assertFalse(np.isnan(parsed.values).any())
+        # Rien d'appris: aucun fichier écrit
+        registry.save()
+        self.assertFalse(os.path.exists(self.registry_file))
+
+    def test_new_layout_is_learned_and_persisted(self):
+        path = self.write_other_layout()
+        signature = header_signature(OTHER_HEADER)
+        registry = SchemaRegistry(self.registry_file)
+        self.assertIsNone(registry.get(signature))
+        parsed = parse_file(path, LABELS, registry=registry)
+        self.assertEqual((parsed.schema.date_col, parsed.schema.time_col), ("Date", "Heure"))
+        np.testing.assert_allclose(parsed.values[:, 0], [-0.5, -1.5, -2.5])
+        np.testing.assert_allclose(parsed.values[:, 1], [60.5, 61.5, 62.5])
+        self.assertTrue(registry.dirty)
+        registry.save()
+        with open(self.registry_file, encoding="utf-8") as fp:
+            self.assertEqual([d["signature"] for d in json.load(fp)], [signature])
+
+        # Registre relu depuis okofen_schemas.json: le fichier est lu par le lecteur typé
+        reloaded = SchemaRegistry(self.registry_file)
+        self.assertEqual(reloaded.get(signature), parsed.schema)
+        with mock.patch.object(parsing, "sniff_schema") as sniff:
+            again = parse_file(path, LABELS, registry=reloaded)
+        sniff.assert_not_called()
+        np.testing.assert_array_equal(again.values, parsed.values)
+        self.assertFalse(reloaded.dirty)
@@ -0,0 +1,67 @@
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from django.test import TestCase
+
+from okofen_data import data_api, rollups
+from okofen_data.models import ROLLUP_STATS, RawData, RawData5Min, RawDataHourly
+
+
+def make_rawdata(start: datetime, minutes: int) -> list[RawData]:
+    """Lignes RawData minute par minute à partir de `start` (valeurs déterministes)."""
+    rows = []
+    for i in range(minutes):
+        values = {field: float(np.sin(i / 37 + k) * 10 + k) for k, field in enumerate(data_api.METRIC_FIELDS.values())}
+        values["heating_status"] = i % 3
+        values["water_status"] = i % 2
+        rows.append(RawData(datetime=start + timedelta(minutes=i), **values))
+    return RawData.objects.bulk_create(rows)
+
+
+class RollupCoverageTests(TestCase):
+    def setUp(self):
+        # 3 journées (pivot 03:00 UTC) du 2024-01-08 au 2024-01-10
+        make_rawdata(datetime(2024, 1, 8, 3, tzinfo=timezone.utc), 3 * 1440)
+
+    def test_partial_rollups_fall_back_to_raw(self):
+        rollups.compute_for_days([date(2024, 1, 10)])
+        self.assertTrue(RawData5Min.objects.exists())
+        df = data_api.get_data_by_dates(datetime(2024, 1, 8, 3), datetime(2024, 1, 11, 3), max_points=500)
+        self.assertEqual(df.attrs["tier"], "raw")
+        self.assertEqual(df.index[0].date(), date(2024, 1, 8))
+        self.assertEqual(len(df), 3 * 1440)
+
+    def test_full_rollups_are_used(self):
+        rollups.rebuild_all()
+        df = data_api.get_data_by_dates(datetime(2024, 1, 8, 3), datetime(2024, 1, 11, 3), max_points=500)
+        self.assertEqual(df.attrs["tier"], "5min")
+        self.assertEqual(len(df), 3 * 288)
+
+
+class ComputeRangeTests(TestCase):
+    def test_matches_pandas_resample(self):
+        start = datetime(2024, 1, 8, 3, tzinfo=timezone.utc)
+        make_rawdata(start, 1440)
+        # Trou de 17 minutes: tranches partielles et tranches absentes
+        RawData.objects.filter(datetime__gte=start + timedelta(minutes=301), datetime__lt=start + timedelta(minutes=318)).delete()
+
+        written = rollups.compute_range(start + timedelta(minutes=10), start + timedelta(hours=23, minutes=50))
+        self.assertEqual(written, {"5min": 288 - 2, "hour": 24})
+
+        raw = data_api.query_values(RawData.objects.order_by("datetime"))
+        for model, freq in ((RawData5Min, "5min"), (RawDataHourly, "1h")):
+            resampled = raw.resample(freq)
+            expected = resampled.agg(list(ROLLUP_STATS))[resampled.size() > 0]
+            samples = resampled.size()[resampled.size() > 0]
+            stored = pd.DataFrame.from_records(model.objects.order_by("bucket").values()).set_index("bucket")
+            with self.subTest(tier=freq):
+                self.assertEqual(list(stored.index), list(expected.index.to_pydatetime()))
+                self.assertEqual(stored["samples"].tolist(), samples.tolist())
+                for label, field in data_api.METRIC_FIELDS.items():
+                    for stat in ROLLUP_STATS:
+                        np.testing.assert_allclose(
+                            stored[f"{field}_{stat}"].astype(float).to_numpy(),
+                            expected[(label, stat)].astype(float).to_numpy(),
+                            err_msg=f"{field}_{stat}",
+                        )
@@ -0,0 +1,130 @@
+import os
+import tempfile
+from datetime import date, timezone
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone as djtz
+
+from benchmarks.fake_imap import OKOFEN_SENDER, FakeImapServer, seed_synthetic_mailbox
+from benchmarks.synthetic import write_touch_file
+from okofen_data import update_db
+from okofen_data.models import IngestedFile, RawData
+from okofen_data.parsing import parse_file
+from okofen_data.update_db import RAW_FIELDS, RAW_LABELS, _localize_datetimes, build_rawdata_rows, upsert_rows
+from src.okofen import OKOFEN_CSV_ENCODING, Okofen, OkofenConfig
+
+
+class UpsertRowsTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = write_touch_file(tmp.name, date(2024, 1, 8), np.random.default_rng(0))
+
+    def rows(self) -> list[tuple]:
+        rows, _ = build_rawdata_rows(parse_file(self.path, RAW_LABELS))
+        return rows
+
+    def correct_lines(self, line_numbers: list[int]):
+        """Remplace la température extérieure (3e colonne) des lignes données du CSV."""
+        with open(self.path, encoding=OKOFEN_CSV_ENCODING, newline="") as fp:
+            lines = fp.read().split("\r\n")
+        for n in line_numbers:
+            cells = lines[n].split(";")
+            cells[2] = "-42,5"
+            lines[n] = ";".join(cells)
+        with open(self.path, "w", encoding=OKOFEN_CSV_ENCODING, newline="") as fp:
+            fp.write("\r\n".join(lines))
+
+    def test_reimport_is_noop(self):
+        self.assertEqual(upsert_rows(self.rows()), (1440, 0))
+        self.assertEqual(upsert_rows(self.rows()), (0, 0))
+        self.assertEqual(RawData.objects.count(), 1440)
+
+    def test_corrected_csv_updates_changed_rows_only(self):
+        before = self.rows()
+        upsert_rows(before)
+        self.correct_lines([11, 501, 1440])
+        after = self.rows()
+        changed = [new for old, new in zip(before, after) if old != new]
+        self.assertEqual(len(changed), 3)
+
+        self.assertEqual(upsert_rows(after), (0, 3))
+        self.assertEqual(RawData.objects.count(), 1440)
+        names = [name for name, _, _ in RAW_FIELDS]
+        for row in changed:
+            stored = RawData.objects.filter(datetime=row[0]).values_list(*names).get()
+            self.assertEqual(stored, row[1:])
+        self.assertEqual(upsert_rows(after), (0, 0))
+
+
+@override_settings(TIME_ZONE="Europe/Paris")
+class LocalizeDatetimesTests(SimpleTestCase):
+    def test_matches_make_aware_around_dst(self):
+        naive = pd.date_range("2024-03-31 01:00", "2024-03-31 04:00", freq="1min").append(
+            pd.date_range("2024-10-27 01:00", "2024-10-27 04:00", freq="1min")
+        )
+        aware = _localize_datetimes(naive.to_numpy())
+        # Comparaison en UTC: à tzinfo identique, datetime compare l'heure locale
+        expected = [djtz.make_aware(t).astimezone(timezone.utc) for t in naive.to_pydatetime()]
+        self.assertEqual(aware.tz_convert("UTC").to_pydatetime().tolist(), expected)
+        # 02:30 n'existe pas le 31 mars: 03:30 (CEST), pas 03:00
+        self.assertEqual(aware[90], pd.Timestamp("2024-03-31 03:30", tz="Europe/Paris"))
+
+
+class StreamIngestFailureTests(TestCase):
+    EMAILS = 5
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.server = FakeImapServer().start()
+        self.addCleanup(self.server.stop)
+        seed_synthetic_mailbox(self.server, os.path.join(tmp.name, "src"), self.EMAILS, start=date(2024, 1, 8))
+        self.data_dir = os.path.join(tmp.name, "data")
+        os.makedirs(self.data_dir)
+        self.config = OkofenConfig(
+            data_dir=self.data_dir,
+            gmail_acount=self.server.username,
+            gmail_passwd=self.server.password,
+            email_subject_key_serach=OKOFEN_SENDER,
+            imap_host="127.0.0.1",
+            imap_port=self.server.port,
+            imap_ssl=False,
+        )
+
+    def sync(self) -> Okofen:
+        okofen = Okofen(self.config, delete_emails=True)
+        update_db.sync_streaming(okofen, queue_size=2)
+        return okofen
+
+    def test_failed_ingest_keeps_emails_and_state(self):
+        ingest = update_db.ingest_parsed_file
+        calls = []
+
+        def failing_ingest(parsed, *args):
+            calls.append(parsed.filename)
+            if len(calls) == 2:
+                raise RuntimeError("base indisponible")
+            return ingest(parsed, *args)
+
+        okofen = Okofen(self.config, delete_emails=True)
+        with mock.patch.object(update_db, "ingest_parsed_file", failing_ingest):
+            with self.assertRaisesMessage(RuntimeError, "base indisponible"):
+                update_db.sync_streaming(okofen, queue_size=2)
+
+        # Seul le premier fichier est en base: seul son email est supprimé, l'état s'arrête à son UID
+        self.assertEqual(IngestedFile.objects.count(), 1)
+        self.assertEqual(okofen.gmail.get_last_uid(), 1)
+        kept = [m.uid for m in self.server.mailboxes["INBOX"].messages if "\\Deleted" not in m.flags]
+        self.assertEqual(kept, list(range(2, self.EMAILS + 1)))
+        okofen.gmail.logout_mailbox()
+
+        # Le run suivant importe les CSV déjà sur disque et relit les emails restants
+        okofen = self.sync()
+        self.assertEqual(IngestedFile.objects.count(), self.EMAILS)
+        self.assertEqual(RawData.objects.count(), self.EMAILS * 1440)
+        self.assertEqual(self.server.mailboxes["INBOX"].messages, [])
+        self.assertEqual(okofen.gmail.get_last_uid(), self.EMAILS)
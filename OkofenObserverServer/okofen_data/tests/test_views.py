@@ -0,0 +1,190 @@
+import gzip
+import json
+import struct
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from okofen_data import compression, encoders
+from okofen_data.data_api import METRIC_FIELDS
+
+from .test_rollups import make_rawdata
+
+RANGE_ROWS = 1441  # 03:00 -> 03:00 le lendemain, bornes incluses
+
+
+class DataViewTestCase(TestCase):
+    """Deux journées de mesures (2024-01-08 et 09, pivot 03:00 UTC) et un utilisateur connecté."""
+
+    @classmethod
+    def setUpTestData(cls):
+        make_rawdata(datetime(2024, 1, 8, 3, tzinfo=timezone.utc), 2 * 1440)
+        cls.user = User.objects.create_user("okofen", password="secret")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def range_url(self, start: str = "2024-01-08", end: str = "2024-01-08") -> str:
+        return reverse("rangejson", kwargs={"start": start, "end": end})
+
+
+class MetricsParamTests(DataViewTestCase):
+    def test_login_required(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.range_url()).status_code, 302)
+
+    def test_all_metrics_by_default(self):
+        data = self.client.get(self.range_url()).json()
+        self.assertEqual(data["count"], RANGE_ROWS)
+        self.assertEqual(set(data["data"][0]), {"datetime", *METRIC_FIELDS})
+
+    def test_projection(self):
+        response = self.client.get(self.range_url(), {"metrics": ["T°C Extérieure,T°C Chaudière", "T°C Extérieure"]})
+        data = response.json()
+        self.assertEqual(data["count"], RANGE_ROWS)
+        self.assertEqual(list(data["data"][0]), ["datetime", "T°C Extérieure", "T°C Chaudière"])
+        self.assertEqual(data["data"][0]["datetime"], "2024-01-08T03:00:00+00:00")
+
+    def test_unknown_metric_is_rejected(self):
+        for url in (self.range_url(), reverse("lastdaysjson", kwargs={"days": 2}),
+                    reverse("dayjson", kwargs={"year": 2024, "month": 1, "day": 8})):
+            with self.subTest(url=url):
+                response = self.client.get(url, {"metrics": "T°C Extérieure,ext_temp"})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"error": "Unknown metrics: ext_temp"})
+
+
+def parse_binary(payload: bytes) -> tuple[dict, np.ndarray, dict[str, np.ndarray]]:
+    """Décode le format binaire comme le navigateur: en-tête JSON, Float64Array, Float32Array."""
+    (size,) = struct.unpack_from("<I", payload)
+    meta = json.loads(payload[4:4 + size])
+    offset, count = 4 + size, meta["count"]
+    times = np.frombuffer(payload, dtype="<f8", count=count, offset=offset)
+    offset += 8 * count
+    series = {}
+    for name in meta["metrics"]:
+        series[name] = np.frombuffer(payload, dtype="<f4", count=count, offset=offset)
+        offset += 4 * count
+    assert offset == len(payload)
+    return meta, times, series
+
+
+class BinaryPayloadTests(SimpleTestCase):
+    def test_layout_and_padding(self):
+        index = pd.date_range("2024-01-08 03:00", periods=3, freq="min", tz="UTC")
+        df = pd.DataFrame({"T°C Extérieure": [-1.5, np.nan, 2.25], "Status ESC": [0, 1, 1]}, index=index)
+        for extra in ({}, {"start": "2024-01-08"}, {"start": "2024-01-08", "end": "x" * 13}):
+            with self.subTest(extra=extra):
+                payload = encoders.binary_payload(df, **extra)
+                (size,) = struct.unpack_from("<I", payload)
+                # Les tableaux commencent sur un multiple de 8 octets (Float64Array sans copie)
+                self.assertEqual((4 + size) % 8, 0)
+                meta, times, series = parse_binary(payload)
+                self.assertEqual(meta, {"count": 3, "metrics": ["T°C Extérieure", "Status ESC"], **extra})
+                self.assertEqual(times.tolist(), [1704682800000.0, 1704682860000.0, 1704682920000.0])
+                np.testing.assert_array_equal(series["T°C Extérieure"], np.array([-1.5, np.nan, 2.25], dtype=np.float32))
+                np.testing.assert_array_equal(series["Status ESC"], [0, 1, 1])
+
+    def test_empty_payload(self):
+        meta, times, series = parse_binary(encoders.binary_payload(None, days=2))
+        self.assertEqual((meta, len(times), series), ({"count": 0, "metrics": [], "days": 2}, 0, {}))
+
+
+class FormatTests(DataViewTestCase):
+    params = {"metrics": "T°C Extérieure,Status ESC"}
+
+    def test_columns_format(self):
+        response = self.client.get(self.range_url(), {**self.params, "format": "columns"})
+        data = response.json()
+        self.assertEqual(data["count"], RANGE_ROWS)
+        self.assertEqual(list(data["series"]), ["T°C Extérieure", "Status ESC"])
+        self.assertEqual(data["datetime"][:2], [1704682800000, 1704682860000])
+        self.assertEqual((data["start"], data["end"]), ("2024-01-08", "2024-01-08"))
+
+    def test_binary_format_matches_records(self):
+        records = self.client.get(self.range_url(), self.params).json()["data"]
+        for query, headers in (({"format": "binary"}, {}), ({}, {"HTTP_ACCEPT": encoders.MEDIA_TYPES["binary"]})):
+            with self.subTest(query=query, headers=headers):
+                response = self.client.get(self.range_url(), {**self.params, **query}, **headers)
+                self.assertEqual(response["Content-Type"], "application/octet-stream")
+                meta, times, series = parse_binary(response.content)
+                self.assertEqual(meta["count"], len(records))
+                self.assertEqual(times[0], pd.Timestamp(records[0]["datetime"]).value // 10**6)
+                np.testing.assert_allclose(series["T°C Extérieure"], [r["T°C Extérieure"] for r in records], rtol=1e-6)
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(self.range_url(), {"format": "csv"})
+        self.assertEqual(response.status_code, 400)
+
+
+class CompressionTests(DataViewTestCase):
+    def test_gzip(self):
+        plain = self.client.get(self.range_url())
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        response = self.client.get(self.range_url(), HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_refused_or_unknown_encoding(self):
+        for accept in ("gzip;q=0", "identity", "deflate"):
+            with self.subTest(accept=accept):
+                response = self.client.get(self.range_url(), HTTP_ACCEPT_ENCODING=accept)
+                self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get(self.range_url(), {"metrics": "nope"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_brotli_falls_back_to_gzip_when_not_installed(self):
+        with mock.patch.object(compression, "brotli", None):
+            response = self.client.get(self.range_url(), HTTP_ACCEPT_ENCODING="br, gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    @unittest.skipIf(compression.brotli is None, "brotli is not installed")
+    def test_brotli(self):
+        plain = self.client.get(self.range_url())
+        response = self.client.get(self.range_url(), HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(compression.brotli.decompress(response.content), plain.content)
+
+
+class StreamTests(DataViewTestCase):
+    def stream(self, response) -> bytes:
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_stream_matches_records(self):
+        params = {"metrics": "T°C Extérieure"}
+        expected = self.client.get(self.range_url("2024-01-08", "2024-01-09"), params).json()
+        response = self.client.get(self.range_url("2024-01-08", "2024-01-09"), {**params, "stream": "1"})
+        data = json.loads(self.stream(response))
+        self.assertEqual(list(data), ["start", "end", "data", "count"])
+        self.assertEqual(data["count"], 2 * 1440)
+        self.assertEqual(data, expected)
+
+    def test_empty_stream(self):
+        response = self.client.get(self.range_url("2023-06-01", "2023-06-02"), {"stream": "true"})
+        self.assertEqual(json.loads(self.stream(response)), {"start": "2023-06-01", "end": "2023-06-02", "data": [], "count": 0})
+
+    def test_gzip_stream(self):
+        response = self.client.get(self.range_url(), {"stream": "1"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(self.stream(response)))["count"], RANGE_ROWS)
+
+    def test_stream_rejects_max_points_and_other_formats(self):
+        urls = (self.range_url(), reverse("lastdaysjson", kwargs={"days": 2}))
+        for url in urls:
+            for params in ({"max_points": "500"}, {"format": "binary"}, {"format": "columns"}):
+                with self.subTest(url=url, params=params):
+                    response = self.client.get(url, {"stream": "1", **params})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertFalse(response.streaming)
@@ -1,213 +1,418 @@
 from src.okofen import *
-from okofen_data import daily_stats
-from okofen_data.models import RawData
-from django.db.models import Max
+from okofen_data import bulk_load, daily_stats, rollups
+from okofen_data.models import IngestedFile, RawData
+from src.offline_sources import extract_source
+from okofen_data.parsing import ParsedFile, SchemaRegistry, get_date_from_filename, init_worker, parse_file, parse_job
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
 import datetime as dt
+import hashlib
+import os
+import queue
+import threading
+import time
+import numpy as np
+import pandas as pd
 from django.utils import timezone as djtz
-from django.utils.timezone import make_aware
-
-dico = {
-    'datetime':'datetime',
-    'AT [°C]': 'T°C Extérieure',
-    'HK1 RT Ist[°C]': 'T°C Ambiante',
-    'HK1 RT Soll[°C]': 'T°C Ambiante Consigne',
-    'PE1 Fuellstand[kg]' : 'Niveau Sillo kg',
-    'PE1 Fuellstand ZWB[kg]' : 'Niveau tremis kg',
-    'PE1 KT[°C]': 'T°C Chaudière',
-    'PE1 KT_SOLL[°C]': 'T°C Chaudière Consigne',
-    'PE1 Modulation[%]':'PE1 Modulation[%]',
-    'PE1 FRT Ist[°C]':'T°C Flamme',
-    'PE1 FRT Soll[°C]':'T°C Flamme Consigne',
-    'HK1 VL Ist[°C]': 'T°C Départ',
-    'HK1 VL Soll[°C]': 'T°C Départ Consigne',
-    'HK1 Pumpe': 'Circulateur Chauffage (On/Off)',
-    'HK1 Status':"Status Chauff.",
-    'WW1 EinT Ist[°C]':'T°C ECS',
-    'WW1 AusT Ist[°C]':'T°C ECS (arret)',
-    'WW1 Soll[°C]':'T°C ECS Consigne',
-    'WW1 Pumpe':'Circulateur ECS',
-    'WW1 Status':'Status ESC',
-}
-
-def get_date_from_filename(filename:str)->dt.date:
-    tmp = s.basename(filename).split('_')[1]
-    return dt.date(year=int(tmp[:4]), month=int(tmp[4:6]),day=int(tmp[6:8]))
-
-def update_db(verbose=0, config_path: str = "../config_okofen.json", batch_size: int = 1000):
+
+# Champs RawData (hors id/datetime) dans l'ordre du modèle, avec leur libellé français
+# (verbose_name, valeurs de OKOFEN_DICO) et leur type entier ou non.
+RAW_FIELDS: list[tuple[str, str, bool]] = [
+    (f.name, str(f.verbose_name), f.get_internal_type() == 'IntegerField')
+    for f in RawData._meta.concrete_fields
+    if f.name not in ('id', 'datetime')
+]
+RAW_LABELS: tuple[str, ...] = tuple(label for _, label, _ in RAW_FIELDS)
+
+# Schémas d'entête appris (firmwares inconnus), persistés dans le répertoire des données
+SCHEMA_REGISTRY_FILE = 'okofen_schemas.json'
+
+def _localize_datetimes(naive: np.ndarray) -> pd.DatetimeIndex:
+    """
+    Rend la colonne datetime timezone-aware en une seule opération vectorisée.
+    Même convention que make_aware (zoneinfo, fold=0): heure ambiguë -> première
+    occurrence (DST), heure inexistante -> avancée d'une heure (02:30 -> 03:30), sans
+    ramener tout le trou du passage à l'heure d'été sur 03:00.
+    """
+    tz = djtz.get_current_timezone()
+    return pd.DatetimeIndex(naive).tz_localize(
+        tz,
+        ambiguous=np.ones(len(naive), dtype=bool),
+        nonexistent=pd.Timedelta('1h'),
+    )
+
+def _column_values(values: np.ndarray, is_int: bool) -> list:
+    missing = np.isnan(values)
+    if is_int:
+        out = np.where(missing, 0, values).astype(np.int64).tolist()
+    else:
+        out = values.tolist()
+    for i in np.flatnonzero(missing):
+        out[i] = None
+    return out
+
+def build_rawdata_rows(parsed: ParsedFile) -> tuple[list[tuple], set[dt.date]]:
+    """
+    Construit les tuples (datetime, *champs RawData) à partir des colonnes NumPy d'un
+    fichier parsé, ainsi que les journées (pivot 03:00) impactées.
+    """
+    if len(parsed) == 0:
+        return [], set()
+    aware = _localize_datetimes(parsed.datetimes)
+    days = set((aware - pd.Timedelta(hours=3)).date)
+    columns = [_column_values(parsed.values[:, i], is_int) for i, (_, _, is_int) in enumerate(RAW_FIELDS)]
+    return list(zip(aware.to_pydatetime().tolist(), *columns)), days
+
+def build_rawdata_objects(parsed: ParsedFile) -> tuple[list[RawData], set[dt.date]]:
+    rows, days = build_rawdata_rows(parsed)
+    # Construction positionnelle (id, datetime, champs...): évite le coût des kwargs
+    return [RawData(None, *row) for row in rows], days
+
+def _file_digest(filename: str) -> str:
+    h = hashlib.sha256()
+    with open(filename, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _needs_import(filename: str, manifest: dict[str, IngestedFile], rescan: bool) -> tuple[os.stat_result, str] | None:
+    """
+    (stat, sha256) si le fichier est nouveau ou modifié d'après le manifeste, None sinon.
+    """
+    name = os.path.basename(filename)
+    stat = os.stat(filename)
+    entry = manifest.get(name)
+    if not rescan and entry is not None and entry.size == stat.st_size and entry.mtime == stat.st_mtime:
+        return None
+    digest = _file_digest(filename)
+    if not rescan and entry is not None and entry.content_hash == digest:
+        # Fichier touché mais contenu identique: rafraîchir le manifeste sans relire le CSV
+        entry.size, entry.mtime = stat.st_size, stat.st_mtime
+        entry.save(update_fields=['size', 'mtime', 'imported_at'])
+        return None
+    return stat, digest
+
+def ingest_parsed_file(
+    parsed: ParsedFile,
+    stat: os.stat_result,
+    digest: str,
+    batch_size: int = 1000,
+    engine: str = "orm",
+    verbose=0,
+) -> set[dt.date]:
+    """
+    Ecrit un fichier parsé en base (lignes absentes ou modifiées) et l'enregistre dans
+    le manifeste. Retourne les journées impactées.
+    """
+    if verbose>0:
+        print(f"read {parsed.filename}: {len(parsed)} data")
+
+    # Construire les lignes (colonnes NumPy) puis insertion / mise à jour par lot
+    rows, days_batch = build_rawdata_rows(parsed)
+    created, updated = upsert_rows(rows, batch_size=batch_size, engine=engine)
+    if verbose>0:
+        print(f"{created} row(s) inserted, {updated} row(s) updated (batch_size={batch_size})")
+
+    IngestedFile.objects.update_or_create(
+        file_name=os.path.basename(parsed.filename),
+        defaults={
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'content_hash': digest,
+            'row_count': len(rows),
+            'first_datetime': rows[0][0] if rows else None,
+            'last_datetime': rows[-1][0] if rows else None,
+        },
+    )
+    return days_batch if created or updated else set()
+
+def upsert_rows(rows: list[tuple], batch_size: int = 1000, engine: str = "orm") -> tuple[int, int]:
+    """
+    Insère les lignes absentes (via le moteur `engine`, voir bulk_load.ENGINES) et met à
+    jour uniquement celles dont les valeurs diffèrent de la base.
+    Retourne (nb insérées, nb mises à jour).
+    """
+    if not rows:
+        return 0, 0
+    names = [name for name, _, _ in RAW_FIELDS]
+    existing = {
+        r[1]: (r[0], r[2:])
+        for r in RawData.objects.filter(datetime__range=(rows[0][0], rows[-1][0]))
+        .values_list('id', 'datetime', *names)
+        .iterator(chunk_size=batch_size)
+    }
+    to_create, to_update = [], []
+    for row in rows:
+        current = existing.get(row[0])
+        if current is None:
+            to_create.append(row)
+        elif current[1] != row[1:]:
+            to_update.append(RawData(current[0], *row))
+    if to_create:
+        bulk_load.insert_rows(to_create, batch_size=batch_size, engine=engine)
+    if to_update:
+        RawData.objects.bulk_update(to_update, names, batch_size=batch_size)
+    return len(to_create), len(to_update)
+
+def iter_parsed_files(
+    filenames: list[str],
+    workers: int = 1,
+    verbose=0,
+    registry: SchemaRegistry | None = None,
+    csv_engine: str = "c",
+):
+    """
+    Parse les fichiers dans l'ordre et produit les ParsedFile au fil de l'eau.
+    Avec workers > 1, le parsing tourne dans un pool de processus qui garde au plus
+    2 * workers fichiers d'avance sur le consommateur (mémoire bornée).
+    Les schémas d'entête détectés par les processus sont reportés dans `registry`.
+    `csv_engine` choisit le moteur pandas du lecteur typé ("c" ou "pyarrow").
+    """
+    if registry is None:
+        registry = SchemaRegistry()
+    if workers <= 1:
+        for filename in filenames:
+            yield filename, parse_file(filename, RAW_LABELS, verbose, registry, engine=csv_engine)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(registry.schemas,)) as pool:
+        todo = iter(filenames)
+        pending = deque((f, pool.submit(parse_job, (f, RAW_LABELS, verbose, csv_engine))) for f in islice(todo, 2 * workers))
+        while pending:
+            filename, future = pending.popleft()
+            for f in islice(todo, 1):
+                pending.append((f, pool.submit(parse_job, (f, RAW_LABELS, verbose, csv_engine))))
+            parsed = future.result()
+            if parsed is not None and parsed.schema is not None:
+                registry.add(parsed.schema)
+            yield filename, parsed
+
+def update_db(
+    verbose=0,
+    config_path: str = "../config_okofen.json",
+    batch_size: int = 1000,
+    rescan: bool = False,
+    workers: int = 1,
+    engine: str = "orm",
+    csv_engine: str = "c",
+):
     """
     Importe les fichiers CSV locaux Okofen dans la base Django (modèle RawData).
 
+    Seuls les fichiers nouveaux ou modifiés depuis le dernier import (manifeste
+    IngestedFile: taille, mtime, hash du contenu) sont relus; seules les lignes
+    absentes ou différentes en base sont écrites.
+
     - verbose: niveau de log (0 = silencieux)
     - config_path: chemin vers le fichier config_okofen.json
     - batch_size: taille des lots pour l'insertion en base
+    - rescan: ignore le manifeste et relit tous les fichiers
+    - workers: nombre de processus de parsing CSV (1 = séquentiel)
+    - engine: moteur d'insertion, "orm" (bulk_create) ou "native" (chargeur natif du backend)
+    - csv_engine: moteur de lecture CSV, "c" (pandas) ou "pyarrow" (si installé)
     """
     config = read_OkofenConfig(config_path)
-    okofen = Okofen(config)
-    #okofen.download_data_from_gmail()
-    agg_max = RawData.objects.aggregate(Max('datetime'))['datetime__max']
-    if agg_max is None:
-        # Table vide: démarrer à une date très ancienne pour importer tout
-        date_max = dt.date(1900, 1, 1)
-    else:
-        date_max = agg_max.date()
-    local_files = okofen.get_local_datafile_list()
+    # Import local uniquement: pas besoin d'instancier Okofen (connexion IMAP)
+    manifest = {entry.file_name: entry for entry in IngestedFile.objects.all()}
+    registry = SchemaRegistry(os.path.join(config.data_dir, SCHEMA_REGISTRY_FILE))
+    local_files = list_local_datafiles(config.data_dir)
     local_files.sort()
     files_by_date={}
     for filename in local_files:
         files_by_date[get_date_from_filename(filename)]=filename
 
-    impacted_days: set[dt.date] = set()
-
+    # Sélection des fichiers à (re)lire d'après le manifeste
+    to_parse: list[str] = []
+    file_info: dict[str, tuple[os.stat_result, str]] = {}
     for current_date in sorted(files_by_date.keys()):
         filename = files_by_date[current_date]
+        info = _needs_import(filename, manifest, rescan)
+        if info is not None:
+            to_parse.append(filename)
+            file_info[filename] = info
+
+    if verbose>0:
+        print(f"{len(to_parse)} file(s) to import (workers={workers})")
+
+    impacted_days: set[dt.date] = set()
+
+    # Parsing (éventuellement en parallèle), insertions en base dans l'ordre des dates
+    for filename, parsed in iter_parsed_files(
+        to_parse, workers=workers, verbose=verbose, registry=registry, csv_engine=csv_engine
+    ):
+        if parsed is None:
+            continue
+        impacted_days.update(ingest_parsed_file(parsed, *file_info[filename], batch_size, engine, verbose))
+    registry.save()
+    if impacted_days:
         if verbose>0:
-            print(f"read {filename}")
-        if current_date>date_max:
-            current = read_okfen_data(filename)
-            if current is None:
-                continue
-            if verbose>0:
-                print(f"Start to add {current.shape[0]} data")
-            # Normaliser fortement les noms de colonnes
-            def _norm(c: str) -> str:
-                c = str(c).lstrip("\ufeff").strip()
-                c = c.replace("\u00a0", " ")  # nbsp -> espace normal
-                c = " ".join(c.split())       # compresser espaces multiples
-                return c
-
-            current.columns = [_norm(c) for c in current.columns]
-
-            # Supprimer lignes d'entête répliquées: si une ligne contient exactement les libellés de colonnes
-            header_set = set(current.columns)
-            mask_header_dup = current.apply(lambda r: set(str(x).strip() for x in r.values) == header_set, axis=1)
-            if mask_header_dup.any():
-                current = current[~mask_header_dup]
-
-            # Dictionnaires d'alias pour colonnes date/heure
-            lower_map = {c.lower(): c for c in current.columns}
-            date_aliases = [
-                "datum", "date", "jour", "datum (date)", "date (local)", "date (utc)",
-                "date/ jour", "date jour"
-            ]
-            time_aliases = [
-                "zeit", "time", "heure", "uhrzeit", "heure locale", "heure (local)", "heure (utc)",
-                "uhrzeit [hh:mm:ss]"
-            ]
-            datetime_aliases = [
-                "datetime", "timestamp", "date time", "date_time", "date-heure", "dateheure",
-                "date/heure", "date-heure", "horodatage", "zeitstempel", "zeitpunkt",
-                "timestamp (utc)", "datetime (utc)", "datetime (local)", "date-time"
-            ]
-
-            # Trouver colonnes
-            dcol = next((lower_map[a] for a in date_aliases if a in lower_map), None)
-            tcol = next((lower_map[a] for a in time_aliases if a in lower_map), None)
-            dtcol = next((lower_map[a] for a in datetime_aliases if a in lower_map), None)
-
-            # Construire 'datetime'
-            import pandas as pd
-            if dtcol:
-                # Colonne datetime unique
-                dt_str = current[dtcol].astype(str).str.strip()
-                current["datetime"] = pd.to_datetime(dt_str, errors="coerce", dayfirst=True, infer_datetime_format=True)
-            elif dcol and tcol:
-                dt_str = (current[dcol].astype(str).str.strip() + " " + current[tcol].astype(str).str.strip()).str.strip()
-                dt_str = dt_str.replace({"": pd.NA, "NaN": pd.NA, "None": pd.NA})
-                current["datetime"] = pd.to_datetime(dt_str, format="%d.%m.%Y %H:%M:%S", errors="coerce", dayfirst=True)
-                if current["datetime"].isna().any():
-                    current.loc[current["datetime"].isna(), "datetime"] = pd.to_datetime(
-                        dt_str[current["datetime"].isna()],
-                        errors="coerce",
-                        dayfirst=True,
-                        infer_datetime_format=True,
-                    )
-            else:
-                # Fallbacks supplémentaires: essayer de parser la colonne Date seule comme datetime
-                parsed = False
-                if dcol:
-                    try:
-                        current["datetime"] = pd.to_datetime(current[dcol].astype(str).str.strip(), errors="coerce", dayfirst=True, infer_datetime_format=True)
-                        parsed = True
-                    except Exception:
-                        parsed = False
-                # Sinon tenter de détecter une colonne candidate en scannant toutes les colonnes texte
-                if not parsed:
-                    for cand in current.columns:
-                        s = current[cand].astype(str).str.strip()
-                        # Heuristique: contient un chiffre et un séparateur de date ou un 'T'
-                        if s.str.contains(r"(\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}|T\d{2}:\d{2})", regex=True, na=False).mean() > 0.5:
-                            dt_try = pd.to_datetime(s, errors="coerce", dayfirst=True, infer_datetime_format=True, utc=False)
-                            if dt_try.notna().mean() > 0.5:
-                                current["datetime"] = dt_try
-                                parsed = True
-                                break
-                if not parsed:
-                    raise ValueError("Colonnes date/heure introuvables dans le CSV (attendues: Datum/Date et Zeit/Time ou une colonne 'DateTime/Timestamp').")
-
-            # Filtrer lignes invalides
-            invalid_count = int(current["datetime"].isna().sum())
-            if invalid_count and verbose>0:
-                print(f"Ignored {invalid_count} rows with invalid datetime in {filename}")
-            current = current.dropna(subset=['datetime'])
-
-            # ... existing code ...
-            current = current.sort_values(['datetime'],ascending = [True]) # type: ignore
-            for col_name in dico:
-                if col_name in current.columns:
-                    current=current.rename(columns={col_name:dico[col_name]}) # type: ignore
-            current = current.replace(',', '.', regex=True)
-
-            # Ne garder que les lignes du jour correspondant au fichier
-            current = current[current['datetime'].dt.date == current_date]
-
-            # Assurer la présence des colonnes ECS, sinon valeur par défaut 0
-            for col in ['T°C ECS', 'T°C ECS (arret)', 'T°C ECS Consigne', 'Circulateur ECS', 'Status ESC']:
-                if col not in current.columns:
-                    current[col] = 0
-
-            # Construire les objets puis insertion par lot
-            objs = []
-            for idx in current.index:
-                if verbose>0 and (idx % 1000 == 0):
-                    print(f"building row {idx}    ", end='\r')
-                datetime_c = make_aware(current.loc[idx,'datetime'])
-                objs.append(
-                    RawData(
-                        datetime = datetime_c,
-                        ext_temp = current.loc[idx,'T°C Extérieure'] if 'T°C Extérieure' in current.columns else None,
-                        house_temp = current.loc[idx,'T°C Ambiante'] if 'T°C Ambiante' in current.columns else None,
-                        house_temp_target = current.loc[idx,'T°C Ambiante Consigne'] if 'T°C Ambiante Consigne' in current.columns else None,
-                        silo_level = current.loc[idx,'Niveau Sillo kg'] if 'Niveau Sillo kg' in current.columns else None,
-                        hopper_level = current.loc[idx,'Niveau tremis kg'] if 'Niveau tremis kg' in current.columns else None,
-                        boiler_water_temp = current.loc[idx,'T°C Chaudière'] if 'T°C Chaudière' in current.columns else None,
-                        boiler_water_temp_target = current.loc[idx,'T°C Chaudière Consigne'] if 'T°C Chaudière Consigne' in current.columns else None,
-                        boiler_modulation = current.loc[idx,'PE1 Modulation[%]'] if 'PE1 Modulation[%]' in current.columns else None,
-                        boiler_fire_temps = current.loc[idx,'T°C Flamme'] if 'T°C Flamme' in current.columns else None,
-                        boiler_fire_temps_atrget = current.loc[idx,'T°C Flamme Consigne'] if 'T°C Flamme Consigne' in current.columns else None,
-                        heating_start_circulation_temp = current.loc[idx,'T°C Départ'] if 'T°C Départ' in current.columns else None,
-                        heating_start_circulation_temp_target = current.loc[idx,'T°C Départ Consigne'] if 'T°C Départ Consigne' in current.columns else None,
-                        heating_circulation = current.loc[idx,'Circulateur Chauffage (On/Off)'] if 'Circulateur Chauffage (On/Off)' in current.columns else None,
-                        heating_status = current.loc[idx,'Status Chauff.'] if 'Status Chauff.' in current.columns else None,
-                        water_temp = current.loc[idx,'T°C ECS'] if 'T°C ECS' in current.columns else None,
-                        water_stop_temp = current.loc[idx,'T°C ECS (arret)'] if 'T°C ECS (arret)' in current.columns else None,
-                        water_temp_target = current.loc[idx,'T°C ECS Consigne'] if 'T°C ECS Consigne' in current.columns else None,
-                        water_circulation = current.loc[idx,'Circulateur ECS'] if 'Circulateur ECS' in current.columns else None,
-                        water_status = current.loc[idx,'Status ESC'] if 'Status ESC' in current.columns else None,
-                    )
-                )
-
-            if objs:
-                if verbose>0:
-                    print(f"\nBulk inserting {len(objs)} rows (batch_size={batch_size})…")
-                RawData.objects.bulk_create(objs, batch_size=batch_size, ignore_conflicts=True)
-                days_batch = {
-                    (djtz.localtime(obj.datetime) - dt.timedelta(hours=3)).date()
-                    for obj in objs
-                    if obj.datetime is not None
-                }
-                impacted_days.update(days_batch)
-        print("")
+            print(f"Computing daily stats and rollups for {len(impacted_days)} day(s)…")
+        daily_stats.compute_for_days(impacted_days)
+        rollups.compute_for_days(impacted_days)
+
+def stream_ingest(
+    produce,
+    data_dir: str,
+    verbose=0,
+    batch_size: int = 1000,
+    engine: str = "orm",
+    csv_engine: str = "c",
+    queue_size: int = 8,
+) -> dict:
+    """
+    Import en flux: `produce(on_file)` tourne dans un thread et appelle on_file(chemin)
+    pour chaque CSV écrit dans data_dir. Les chemins passent par une file bornée
+    (`queue_size` fichiers, le producteur attend quand elle est pleine) et sont importés
+    aussitôt (parsing, insertion, manifeste) par le thread appelant. Les statistiques
+    journalières sont calculées à la fin. Le temps total tend vers
+    max(production, import) au lieu de leur somme.
+
+    on_file retourne un Future résolu une fois le fichier importé, en échec si l'import
+    échoue ou s'arrête avant lui: le producteur ne supprime la source qu'après cet accusé.
+    Les CSV de data_dir absents du manifeste IngestedFile (import précédent interrompu)
+    sont importés en premier.
+
+    Retourne les mesures: fichiers, lignes, durées (source, ingest, total).
+    """
+    files: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors: list[BaseException] = []
+    timings = {'source': 0.0, 'ingest': 0.0}
+
+    def _on_file(path: str) -> Future:
+        if stop.is_set():
+            raise RuntimeError("Import interrompu, arrêt de la source")
+        ack: Future = Future()
+        files.put((path, ack))
+        return ack
+
+    def _run_source():
+        t0 = time.perf_counter()
+        try:
+            for path in leftovers:
+                _on_file(path)
+            produce(_on_file)
+        except BaseException as exc:
+            errors.append(exc)
+        finally:
+            timings['source'] = time.perf_counter() - t0
+            files.put(None)
+
+    def _cancel(item):
+        if item is not None:
+            item[1].set_exception(RuntimeError(f"Import interrompu, {item[0]} non importé"))
+
+    manifest = {entry.file_name: entry for entry in IngestedFile.objects.all()}
+    # CSV locaux absents du manifeste (import en flux interrompu, pièce jointe déjà
+    # présente sur disque): importés en premier
+    leftovers = sorted(f for f in list_local_datafiles(data_dir) if os.path.basename(f) not in manifest)
+    registry = SchemaRegistry(os.path.join(data_dir, SCHEMA_REGISTRY_FILE))
+    impacted_days: set[dt.date] = set()
+    nb_files = nb_rows = 0
+
+    t_start = time.perf_counter()
+    thread = threading.Thread(target=_run_source, name="okofen-stream-source", daemon=True)
+    thread.start()
+    try:
+        while (item := files.get()) is not None:
+            filename, ack = item
+            t0 = time.perf_counter()
+            try:
+                info = _needs_import(filename, manifest, rescan=False)
+                parsed = None if info is None else parse_file(filename, RAW_LABELS, verbose, registry, engine=csv_engine)
+                if parsed is not None:
+                    impacted_days.update(ingest_parsed_file(parsed, *info, batch_size, engine, verbose))
+                    nb_files += 1
+                    nb_rows += len(parsed)
+            except BaseException as exc:
+                ack.set_exception(exc)
+                raise
+            # Accusé pour le producteur: le fichier est en base (ou déjà à jour)
+            ack.set_result(filename)
+            timings['ingest'] += time.perf_counter() - t0
+    finally:
+        # En cas d'erreur d'import: débloquer puis arrêter le thread source; les fichiers
+        # encore en file sont signalés non importés
+        stop.set()
+        while thread.is_alive():
+            try:
+                _cancel(files.get(timeout=0.1))
+            except queue.Empty:
+                pass
+        thread.join()
+        while not files.empty():
+            _cancel(files.get_nowait())
+    registry.save()
+    if errors:
+        raise errors[0]
+
+    t0 = time.perf_counter()
     if impacted_days:
         if verbose>0:
-            print(f"Computing daily stats for {len(impacted_days)} day(s)…")
+            print(f"Computing daily stats and rollups for {len(impacted_days)} day(s)…")
         daily_stats.compute_for_days(impacted_days)
+        rollups.compute_for_days(impacted_days)
+    timings['ingest'] += time.perf_counter() - t0
+
+    result = {
+        'files': nb_files,
+        'rows': nb_rows,
+        'source_seconds': timings['source'],
+        'ingest_seconds': timings['ingest'],
+        'total_seconds': time.perf_counter() - t_start,
+    }
+    if verbose>0:
+        print(
+            f"{nb_files} file(s), {nb_rows} row(s): source {result['source_seconds']:.1f}s, "
+            f"ingest {result['ingest_seconds']:.1f}s, total {result['total_seconds']:.1f}s"
+        )
+    return result
+
+def sync_streaming(
+    okofen: Okofen,
+    verbose=0,
+    batch_size: int = 1000,
+    engine: str = "orm",
+    csv_engine: str = "c",
+    queue_size: int = 8,
+    full_mail_sync: bool = False,
+) -> dict:
+    """
+    Téléchargement Gmail et import en flux (voir stream_ingest): chaque pièce jointe
+    est importée dès qu'elle est écrite dans data_dir.
+    """
+    def _download(on_file):
+        okofen.download_data_from_gmail(full_sync=full_mail_sync, on_file=on_file)
+
+    return stream_ingest(
+        _download, okofen.data_dir, verbose=verbose, batch_size=batch_size,
+        engine=engine, csv_engine=csv_engine, queue_size=queue_size,
+    )
+
+def import_offline_source(
+    source_path: str,
+    config_path: str = "../config_okofen.json",
+    source_type: str = "auto",
+    verbose=0,
+    batch_size: int = 1000,
+    engine: str = "orm",
+    csv_engine: str = "c",
+    queue_size: int = 8,
+) -> dict:
+    """
+    Import d'une source hors ligne (mbox, Maildir, zip; voir src.offline_sources):
+    les touch_*.csv sont extraits un par un dans data_dir et importés en flux.
+    Retourne les mesures de stream_ingest complétées par celles de l'extraction.
+    """
+    config = read_OkofenConfig(config_path)
+    extracted: dict = {}
+
+    def _extract(on_file):
+        extracted.update(extract_source(source_path, config.data_dir, source_type, on_file=on_file, verbose=verbose))
+
+    result = stream_ingest(
+        _extract, config.data_dir, verbose=verbose, batch_size=batch_size,
+        engine=engine, csv_engine=csv_engine, queue_size=queue_size,
+    )
+    result['source'] = extracted
+    return result
@@ -4,11 +4,13 @@ from typing import Sequence
 
 from django.contrib.auth.decorators import login_required
 from django.core.serializers.json import DjangoJSONEncoder
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
 from django.utils import timezone as djtz
 
 from okofen_data.models import DailyStat
+from okofen_data import downsample, encoders
+from okofen_data.compression import compress_response
 
 import okofen_data.data_api as api
 
@@ -151,140 +153,258 @@ def _df_to_records(df):
     return d2.to_dict(orient='records')
 
 
+def _metrics_param(request) -> list[str] | None:
+    """
+    Paramètre `metrics` (répété ou séparé par des virgules), limité aux clés de
+    METRICS_CONFIG; absent = toutes les colonnes.
+    """
+    values = [m.strip() for raw in request.GET.getlist("metrics") for m in raw.split(",")]
+    metrics = list(dict.fromkeys(m for m in values if m))
+    if not metrics:
+        return None
+    unknown = [m for m in metrics if m not in METRICS_CONFIG]
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+    return metrics
+
+
+def _downsampling_params(request) -> tuple[int | None, str]:
+    """Paramètres `max_points` (points par série, absent = pas de réduction) et `method`."""
+    method = request.GET.get("method", downsample.DEFAULT_METHOD)
+    if method not in downsample.METHODS:
+        raise ValueError(f"method must be one of: {', '.join(downsample.METHODS)}")
+    raw = request.GET.get("max_points")
+    if raw in (None, ""):
+        return None, method
+    try:
+        max_points = int(raw)
+    except ValueError:
+        raise ValueError("max_points must be an integer") from None
+    if max_points < downsample.MIN_POINTS:
+        raise ValueError(f"max_points must be >= {downsample.MIN_POINTS}")
+    return max_points, method
+
+
+def _rollup_value(method: str) -> str:
+    """Statistique lue dans les agrégats: min et max avec minmax (pics conservés), sinon moyenne."""
+    return "minmax" if method == "minmax" else "mean"
+
+
+def _data_response(df, fmt: str, max_points: int | None = None, method: str = downsample.DEFAULT_METHOD, **extra) -> HttpResponse:
+    """Réponse au format `fmt` (voir okofen_data.encoders), après réduction éventuelle."""
+    if max_points is not None and df is not None:
+        extra["downsampling"] = {
+            "method": method,
+            "max_points": max_points,
+            "source_count": len(df),
+            "tier": df.attrs.get("tier", "raw"),
+        }
+        df = downsample.downsample(df, max_points, method)
+    if fmt == "binary":
+        return HttpResponse(encoders.binary_payload(df, **extra), content_type=encoders.MEDIA_TYPES["binary"])
+    if fmt == "columns":
+        return JsonResponse({**encoders.columns_payload(df), **extra})
+    records = _df_to_records(df)
+    return JsonResponse({"count": len(records), "data": records, **extra})
+
+
+def _stream_param(request) -> bool:
+    """Paramètre `stream` (1/true): réponse records produite journée par journée."""
+    stream = request.GET.get("stream", "").lower() in ("1", "true", "yes")
+    if stream and request.GET.get("max_points"):
+        raise ValueError("max_points is not supported with stream")
+    return stream
+
+
+def _stream_records(frames, **extra):
+    """
+    JSON records produit par morceaux, un DataFrame (une journée) à la fois:
+    `{<extra>, "data": [...], "count": <int>}`.
+    """
+    head = json.dumps(extra, cls=DjangoJSONEncoder)[:-1]
+    yield head + (', "data": [' if extra else '"data": [')
+    count = 0
+    for df in frames:
+        records = _df_to_records(df)
+        if not records:
+            continue
+        chunk = ", ".join(json.dumps(record, cls=DjangoJSONEncoder) for record in records)
+        yield (", " if count else "") + chunk
+        count += len(records)
+    yield f'], "count": {count}}}'
+
+
+def _streaming_response(start_dt: datetime, end_dt: datetime, metrics: list[str] | None, **extra) -> StreamingHttpResponse:
+    frames = api.iter_data_by_days(start_dt, end_dt, metrics)
+    return StreamingHttpResponse(_stream_records(frames, **extra), content_type="application/json")
+
+
 @login_required
+@compress_response
 def dayjson(request, year: int, month: int, day: int):
     date = datetime(year=year, month=month, day=day)
-    df = api.get_data_for_one_day(date)
-    records = _df_to_records(df)
-    return JsonResponse({"count": len(records), "data": records})
+    try:
+        metrics = _metrics_param(request)
+        fmt = encoders.negotiate_format(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    df = api.get_data_for_one_day(date, metrics)
+    return _data_response(df, fmt)
 
 
 @login_required
+@compress_response
 def rangejson(request, start: str, end: str):
     """Return JSON for inclusive date range [start, end] at day granularity.
     Dates must be in YYYY-MM-DD format.
     The day window starts at 03:00 (as per data_api convention).
+    Optional query parameters: `metrics` (series to return, keys of METRICS_CONFIG),
+    `max_points` and `method` (lttb, minmax) to reduce each series on the server to
+    about `max_points` points (read from the 5-min / hourly rollups when they are fine
+    enough, see okofen_data.rollups), `format` (records, columns, binary; see encoders),
+    `stream=1` to stream records one day window at a time (bounded memory).
     """
     try:
         start_d = datetime.strptime(start, "%Y-%m-%d")
         end_d = datetime.strptime(end, "%Y-%m-%d")
     except ValueError:
         return JsonResponse({"error": "Invalid date format. Use YYYY-MM-DD."}, status=400)
+    try:
+        metrics = _metrics_param(request)
+        max_points, method = _downsampling_params(request)
+        fmt = encoders.negotiate_format(request)
+        stream = _stream_param(request)
+        if stream and fmt != "records":
+            raise ValueError("stream only supports the records format")
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
     start_dt = api.get_start_day_datetime(start_d)
     end_dt = api.get_start_day_datetime(end_d) + timedelta(days=1)
-    df = api.get_data_by_dates(start_dt, end_dt)
-    records = _df_to_records(df)
-    return JsonResponse({"count": len(records), "data": records, "start": start, "end": end})
+    if stream:
+        return _streaming_response(start_dt, end_dt, metrics, start=start, end=end)
+    df = api.get_data_by_dates(start_dt, end_dt, metrics, max_points, _rollup_value(method))
+    return _data_response(df, fmt, max_points, method, start=start, end=end)
 
 
 @login_required
+@compress_response
 def lastdaysjson(request, days: int):
     if days <= 0:
         return JsonResponse({"error": "days must be > 0"}, status=400)
-    df = api.get_data_for_n_last_days(days)
-    records = _df_to_records(df)
-    return JsonResponse({"count": len(records), "data": records, "days": days})
+    try:
+        metrics = _metrics_param(request)
+        max_points, method = _downsampling_params(request)
+        fmt = encoders.negotiate_format(request)
+        stream = _stream_param(request)
+        if stream and fmt != "records":
+            raise ValueError("stream only supports the records format")
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    if stream:
+        return _streaming_response(*api.get_n_last_days_dates(days), metrics, days=days)
+    df = api.get_data_for_n_last_days(days, metrics, max_points, _rollup_value(method))
+    return _data_response(df, fmt, max_points, method, days=days)
+
+
+# Séries proposées par l'explorateur graphique (clé = libellé RawData)
+GRAPH_METRICS = [
+    {
+        "key": "T°C Ambiante Consigne",
+        "label": "Consigne température ambiante",
+        "default": True,
+        "color": "#2b8cf3",
+    },
+    {
+        "key": "T°C Ambiante",
+        "label": "Température ambiante",
+        "default": True,
+        "color": "#f37f2b",
+    },
+    {
+        "key": "T°C Extérieure",
+        "label": "Température extérieure",
+        "default": False,
+        "color": "#10b981",
+    },
+    {
+        "key": "T°C Chaudière",
+        "label": "Température chaudière",
+        "default": False,
+    },
+    {
+        "key": "T°C Chaudière Consigne",
+        "label": "Consigne chaudière",
+        "default": False,
+    },
+    {
+        "key": "PE1 Modulation[%]",
+        "label": "Modulation chaudière",
+        "default": False,
+    },
+    {
+        "key": "T°C Flamme",
+        "label": "Température flamme",
+        "default": False,
+    },
+    {
+        "key": "T°C Départ",
+        "label": "Température départ chauffage",
+        "default": False,
+    },
+    {
+        "key": "T°C Départ Consigne",
+        "label": "Consigne départ chauffage",
+        "default": False,
+    },
+    {
+        "key": "T°C ECS",
+        "label": "Température ECS",
+        "default": False,
+    },
+    {
+        "key": "T°C ECS Consigne",
+        "label": "Consigne ECS",
+        "default": False,
+    },
+    {
+        "key": "Niveau Sillo kg",
+        "label": "Niveau silo",
+        "default": False,
+    },
+    {
+        "key": "Niveau tremis kg",
+        "label": "Niveau trémie",
+        "default": False,
+    },
+    {
+        "key": "Circulateur Chauffage (On/Off)",
+        "label": "Circulateur chauffage",
+        "default": False,
+    },
+    {
+        "key": "Circulateur ECS",
+        "label": "Circulateur ECS",
+        "default": False,
+    },
+    {
+        "key": "Status Chauff.",
+        "label": "Statut chauffage",
+        "default": False,
+    },
+    {
+        "key": "Status ESC",
+        "label": "Statut ECS",
+        "default": False,
+    },
+]
+
+METRICS_CONFIG = {metric["key"]: metric for metric in GRAPH_METRICS}
 
 
 @login_required
 def graph_explorer(request):
-    metrics = [
-        {
-            "key": "T°C Ambiante Consigne",
-            "label": "Consigne température ambiante",
-            "default": True,
-            "color": "#2b8cf3",
-        },
-        {
-            "key": "T°C Ambiante",
-            "label": "Température ambiante",
-            "default": True,
-            "color": "#f37f2b",
-        },
-        {
-            "key": "T°C Extérieure",
-            "label": "Température extérieure",
-            "default": False,
-            "color": "#10b981",
-        },
-        {
-            "key": "T°C Chaudière",
-            "label": "Température chaudière",
-            "default": False,
-        },
-        {
-            "key": "T°C Chaudière Consigne",
-            "label": "Consigne chaudière",
-            "default": False,
-        },
-        {
-            "key": "PE1 Modulation[%]",
-            "label": "Modulation chaudière",
-            "default": False,
-        },
-        {
-            "key": "T°C Flamme",
-            "label": "Température flamme",
-            "default": False,
-        },
-        {
-            "key": "T°C Départ",
-            "label": "Température départ chauffage",
-            "default": False,
-        },
-        {
-            "key": "T°C Départ Consigne",
-            "label": "Consigne départ chauffage",
-            "default": False,
-        },
-        {
-            "key": "T°C ECS",
-            "label": "Température ECS",
-            "default": False,
-        },
-        {
-            "key": "T°C ECS Consigne",
-            "label": "Consigne ECS",
-            "default": False,
-        },
-        {
-            "key": "Niveau Sillo kg",
-            "label": "Niveau silo",
-            "default": False,
-        },
-        {
-            "key": "Niveau tremis kg",
-            "label": "Niveau trémie",
-            "default": False,
-        },
-        {
-            "key": "Circulateur Chauffage (On/Off)",
-            "label": "Circulateur chauffage",
-            "default": False,
-        },
-        {
-            "key": "Circulateur ECS",
-            "label": "Circulateur ECS",
-            "default": False,
-        },
-        {
-            "key": "Status Chauff.",
-            "label": "Statut chauffage",
-            "default": False,
-        },
-        {
-            "key": "Status ESC",
-            "label": "Statut ECS",
-            "default": False,
-        },
-    ]
-
-    metrics_config = {
-        metric["key"]: metric for metric in metrics
-    }
-
     context = {
-        "metrics_config": json.dumps(metrics_config, ensure_ascii=False),
+        "metrics_config": json.dumps(METRICS_CONFIG, ensure_ascii=False),
     }
     return render(request, "okofen_data/graph_explorer.html", context)
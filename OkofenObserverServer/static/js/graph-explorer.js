@@ -15,8 +15,15 @@ document.addEventListener("DOMContentLoaded", () => {
   const endInput = document.getElementById("end-date");
   const quickButtons = document.querySelectorAll(".quick-range button");
 
-  let currentData = [];
+  // Données en colonnes (format binaire): horodatages epoch ms et une série par mesure
+  let currentData = { count: 0, times: new Float64Array(0), series: {} };
   let currentUrl = null;
+  let currentRangeLabel = null;
+  let loadedKeys = new Set();
+
+  // Réduction côté serveur: environ un point par pixel de largeur du graphique
+  const DOWNSAMPLING_METHOD = "lttb";
+  const MIN_POINTS = 100;
 
   const colors = Object.fromEntries(
     Object.values(metricsConfig).map((metric, idx) => [
@@ -41,8 +48,24 @@ document.addEventListener("DOMContentLoaded", () => {
     return palette[index % palette.length];
   }
 
-  function formatDate(date) {
-    return luxon.DateTime.fromISO(date, { zone: "utc" }).toFormat("dd LLL yyyy HH:mm");
+  function formatDate(millis) {
+    return luxon.DateTime.fromMillis(millis, { zone: "utc" }).toFormat("dd LLL yyyy HH:mm");
+  }
+
+  function decodeBinary(buffer) {
+    // Voir okofen_data/encoders.py: uint32 H, en-tête JSON, Float64Array, Float32Array par mesure
+    const headerLength = new DataView(buffer).getUint32(0, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)));
+    const count = header.count;
+    let offset = 4 + headerLength;
+    const times = new Float64Array(buffer, offset, count);
+    offset += 8 * count;
+    const series = {};
+    header.metrics.forEach((key) => {
+      series[key] = new Float32Array(buffer, offset, count);
+      offset += 4 * count;
+    });
+    return { header, data: { count, times, series } };
   }
 
   function setStatus(online, message) {
@@ -68,6 +91,11 @@ document.addEventListener("DOMContentLoaded", () => {
           checkbox.checked = true; // always keep at least one dataset
           return;
         }
+        // Série cochée absente des données chargées: on la demande au serveur
+        if (checkbox.checked && currentUrl && !loadedKeys.has(metric.key)) {
+          fetchData(currentUrl, currentRangeLabel);
+          return;
+        }
         updateChart();
       });
 
@@ -138,8 +166,9 @@ document.addEventListener("DOMContentLoaded", () => {
           callbacks: {
             label: (context) => {
               const label = context.dataset.label || "";
-              const value = context.parsed.y ?? "";
-              return `${label}: ${value}`;
+              const value = context.parsed.y;
+              // Valeurs float32: arrondi à l'affichage
+              return `${label}: ${Number.isFinite(value) ? Math.round(value * 100) / 100 : ""}`;
             },
           },
         },
@@ -148,7 +177,7 @@ document.addEventListener("DOMContentLoaded", () => {
   });
 
   function updateChart() {
-    if (!currentData.length) {
+    if (!currentData.count) {
       chart.data.labels = [];
       chart.data.datasets = [];
       chart.update();
@@ -159,12 +188,10 @@ document.addEventListener("DOMContentLoaded", () => {
     const selectedKeys = getSelectedKeys();
     emptyState.hidden = selectedKeys.length > 0;
 
-    const labels = currentData.map((row) => luxon.DateTime.fromISO(row.datetime));
-
-    chart.data.labels = labels;
+    chart.data.labels = Array.from(currentData.times);
     chart.data.datasets = selectedKeys.map((key) => ({
       label: metricsConfig[key].label,
-      data: currentData.map((row) => row[key]),
+      data: Array.from(currentData.series[key] || []),
       borderColor: colors[key],
       backgroundColor: colors[key],
       borderWidth: 2,
@@ -177,21 +204,39 @@ document.addEventListener("DOMContentLoaded", () => {
     chart.update();
   }
 
+  function chartResolution() {
+    const width = chartCanvas.clientWidth || chartCanvas.parentElement.clientWidth || 1000;
+    return Math.max(MIN_POINTS, Math.round(width));
+  }
+
+  function withQuery(url, keys) {
+    const params = new URLSearchParams({
+      metrics: keys.join(","),
+      max_points: chartResolution(),
+      method: DOWNSAMPLING_METHOD,
+      format: "binary",
+    });
+    return `${url}?${params}`;
+  }
+
   async function fetchData(url, rangeLabel) {
     try {
       setStatus(false, "Chargement des données…");
       refreshButton.disabled = true;
 
-      const response = await fetch(url);
+      const keys = getSelectedKeys();
+      const response = await fetch(withQuery(url, keys));
       if (!response.ok) {
         throw new Error(`Erreur ${response.status}`);
       }
-      const payload = await response.json();
+      const { header: payload, data } = decodeBinary(await response.arrayBuffer());
 
-      currentData = payload.data || [];
+      currentData = data;
       currentUrl = url;
+      currentRangeLabel = rangeLabel;
+      loadedKeys = new Set(keys);
 
-      if (currentData.length === 0) {
+      if (currentData.count === 0) {
         emptyState.hidden = false;
         dataRangeEl.textContent = rangeLabel || "Aucune période";
         sampleCountEl.textContent = "0 échantillon";
@@ -201,13 +246,16 @@ document.addEventListener("DOMContentLoaded", () => {
         return;
       }
 
-      const firstDate = currentData[0].datetime;
-      const lastDate = currentData[currentData.length - 1].datetime;
+      const firstDate = currentData.times[0];
+      const lastDate = currentData.times[currentData.count - 1];
 
       dataRangeEl.textContent = `Période : ${formatDate(firstDate)} → ${formatDate(lastDate)}`;
-      sampleCountEl.textContent = `${currentData.length} échantillon${
-        currentData.length > 1 ? "s" : ""
+      sampleCountEl.textContent = `${currentData.count} échantillon${
+        currentData.count > 1 ? "s" : ""
       }`;
+      if (payload.downsampling && payload.downsampling.source_count > currentData.count) {
+        sampleCountEl.textContent += ` (sur ${payload.downsampling.source_count})`;
+      }
       lastUpdateEl.textContent = `Dernière mise à jour : ${new Date().toLocaleString()}`;
 
       emptyState.hidden = true;
@@ -0,0 +1,137 @@
+import datetime
+import glob
+import hashlib
+import json
+import os
+
+'''
+Index des pièces jointes touch_*.csv présentes dans data_dir, par nom et par
+empreinte SHA-256 du contenu (dictionnaires: tests d'appartenance en O(1)).
+
+- contenu déjà connu (même nom ou autre nom): la pièce jointe n'est pas écrite
+- même nom, contenu différent: conflit. La nouvelle version remplace le fichier
+  (le manifeste d'import voit le changement et le réimporte), l'ancienne est
+  conservée dans data_dir/conflicts/ et le conflit est noté dans l'index.
+
+L'index est enregistré dans ATTACHMENT_INDEX_FILE; au chargement, seuls les
+fichiers nouveaux ou modifiés (taille, mtime) depuis le dernier passage sont hachés.
+'''
+
+ATTACHMENT_INDEX_FILE = 'okofen_attachments.json'
+CONFLICTS_DIR = 'conflicts'
+
+def sha256_bytes(payload):
+    return hashlib.sha256(payload).hexdigest()
+
+def sha256_file(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+class AttachmentIndex():
+    def __init__(self, data_dir, prefix='touch', index_file=ATTACHMENT_INDEX_FILE):
+        self.data_dir = data_dir
+        self.prefix = prefix
+        self.index_file = os.path.join(data_dir, index_file) if index_file else None
+        self.by_name = {}
+        self.by_hash = {}
+        self.conflicts = []
+        self.load()
+
+    def load(self):
+        '''
+        Charge l'index enregistré et le met à jour d'après les fichiers présents dans data_dir
+        '''
+        known = {}
+        if self.index_file is not None and os.path.isfile(self.index_file):
+            try:
+                with open(self.index_file) as fp:
+                    saved = json.load(fp)
+                known = saved.get('files', {})
+                self.conflicts = saved.get('conflicts', [])
+            except (OSError, ValueError) as e:
+                print(f"ErrorType : {type(e).__name__}, Error : {e}")
+        self.by_name = {}
+        self.by_hash = {}
+        for path in glob.glob(os.path.join(self.data_dir, f'{self.prefix}*.csv')):
+            name = os.path.basename(path)
+            st = os.stat(path)
+            entry = known.get(name)
+            if entry is None or entry.get('size') != st.st_size or entry.get('mtime_ns') != st.st_mtime_ns:
+                entry = {'sha256': sha256_file(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+            self._register(name, entry)
+        return self
+
+    def save(self):
+        if self.index_file is None:
+            return False
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'w') as fp:
+            json.dump({'files': self.by_name, 'conflicts': self.conflicts}, fp, indent=2)
+        os.replace(tmp_file, self.index_file)
+        return True
+
+    def _register(self, name, entry):
+        self.by_name[name] = entry
+        # Le premier nom rencontré pour un contenu reste la référence
+        self.by_hash.setdefault(entry['sha256'], name)
+
+    def __contains__(self, name):
+        return name in self.by_name
+
+    def __len__(self):
+        return len(self.by_name)
+
+    def lookup(self, filename, payload):
+        '''
+        Retourne (statut, empreinte, nom connu): statut 'new', 'duplicate' (contenu
+        déjà présent, sous le nom connu) ou 'conflict' (même nom, autre contenu)
+        '''
+        digest = sha256_bytes(payload)
+        if digest in self.by_hash:
+            return 'duplicate', digest, self.by_hash[digest]
+        if filename in self.by_name:
+            return 'conflict', digest, filename
+        return 'new', digest, None
+
+    def add(self, filename, payload):
+        '''
+        Ecrit la pièce jointe dans data_dir selon l'index.
+        Retourne (statut, chemin): le fichier écrit, ou le fichier existant de même contenu
+        '''
+        status, digest, known_name = self.lookup(filename, payload)
+        if status == 'duplicate':
+            return status, os.path.join(self.data_dir, known_name)
+        path = os.path.join(self.data_dir, filename)
+        if status == 'conflict':
+            previous = self.by_name.pop(filename)
+            if self.by_hash.get(previous['sha256']) == filename:
+                del self.by_hash[previous['sha256']]
+            archived = self._archive(path, previous['sha256'])
+            self.conflicts.append({
+                'file_name': filename,
+                'previous_sha256': previous['sha256'],
+                'sha256': digest,
+                'archived_as': archived,
+                'detected_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            })
+        with open(path, 'wb') as fp:
+            fp.write(payload)
+        st = os.stat(path)
+        self._register(filename, {'sha256': digest, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns})
+        return status, path
+
+    def _archive(self, path, digest):
+        '''
+        Déplace la version remplacée dans data_dir/conflicts/ (hors du motif touch_*.csv)
+        '''
+        if not os.path.isfile(path):
+            return None
+        conflicts_dir = os.path.join(self.data_dir, CONFLICTS_DIR)
+        os.makedirs(conflicts_dir, exist_ok=True)
+        root, ext = os.path.splitext(os.path.basename(path))
+        archived = os.path.join(conflicts_dir, f'{root}.{digest[:12]}{ext}')
+        os.replace(path, archived)
+        return os.path.relpath(archived, self.data_dir)
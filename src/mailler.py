@@ -1,5 +1,18 @@
 import imaplib
 import email
+import base64
+import itertools
+import json
+import os
+import quopri
+import re
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from email.header import decode_header, make_header
+from urllib.parse import unquote_to_bytes
 
 
 '''
@@ -10,20 +23,273 @@ password = 'your app password'
 Generate it in your Google account security
 '''
 
+# Jetons d'une réponse FETCH: parenthèses, chaîne entre guillemets, annonce de littéral {n}
+# en fin de ligne, atome (y compris BODY[2] ou BODY[2]<0>)
+_FETCH_TOKEN = re.compile(rb'\(|\)|"((?:[^"\\]|\\.)*)"|\{(\d+)\}$|([^\s()"\[]+(?:\[[^\]]*\])?(?:<\d+>)?)')
+
+def _fetch_tokens(fetch_data):
+    for item in fetch_data:
+        text, literal = item if isinstance(item, tuple) else (item, None)
+        if text is None:
+            continue
+        for m in _FETCH_TOKEN.finditer(text):
+            token = m.group(0)
+            if token in (b'(', b')'):
+                yield token, None
+            elif m.group(1) is not None:
+                yield b'value', re.sub(rb'\\(.)', rb'\1', m.group(1)).decode('utf-8', 'replace')
+            elif m.group(2) is not None:
+                yield b'value', literal
+            else:
+                atom = m.group(3).decode('utf-8', 'replace')
+                yield b'value', None if atom.upper() == 'NIL' else int(atom) if atom.isdigit() else atom
+
+def parse_fetch_response(fetch_data):
+    '''
+    Analyse les données retournées par imaplib pour un FETCH:
+    une liste de dict {ITEM: valeur} par message (listes imbriquées, NIL -> None,
+    nombres -> int, littéraux -> bytes)
+    '''
+    stack = [[]]
+    for kind, value in _fetch_tokens(fetch_data):
+        if kind == b'(':
+            stack.append([])
+        elif kind == b')':
+            if len(stack) > 1:
+                done = stack.pop()
+                stack[-1].append(done)
+        else:
+            stack[-1].append(value)
+    messages = []
+    for item in stack[0]:
+        if isinstance(item, list):
+            messages.append({str(k).upper(): v for k, v in zip(item[::2], item[1::2])})
+    return messages
+
+def _decode_header_value(value):
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'replace')
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return value
+
+def _rfc2231_value(segments):
+    '''
+    Valeur d'un paramètre RFC 2231 à partir de ses segments {n: (encodé, valeur)}:
+    charset'langue'valeur en tête du premier segment encodé, %XX dans les segments encodés
+    '''
+    charset, data = 'us-ascii', b''
+    for n in sorted(segments):
+        encoded, value = segments[n]
+        if isinstance(value, bytes):
+            value = value.decode('utf-8', 'replace')
+        value = str(value)
+        if encoded:
+            if n == 0 and value.count("'") >= 2:
+                charset, _, value = value.split("'", 2)
+                charset = charset or 'us-ascii'
+            data += unquote_to_bytes(value)
+        else:
+            data += value.encode('utf-8')
+    try:
+        return data.decode(charset, 'replace')
+    except LookupError:
+        return data.decode('utf-8', 'replace')
+
+def _param(params, key):
+    '''
+    Paramètre `key` d'une liste BODYSTRUCTURE ("CLE" "valeur" ...): forme RFC 2231
+    (CLE*, CLE*0*, CLE*1 ...) en priorité, sinon CLE (éventuellement encodé RFC 2047)
+    '''
+    if not isinstance(params, list):
+        return None
+    plain, segments = None, {}
+    for k, v in zip(params[::2], params[1::2]):
+        if not isinstance(k, str) or v is None:
+            continue
+        name = k.upper()
+        if name == key:
+            plain = _decode_header_value(v)
+        elif name == f'{key}*':
+            segments[0] = (True, v)
+        else:
+            m = re.fullmatch(rf'{re.escape(key)}\*(\d+)(\*?)', name)
+            if m:
+                segments[int(m.group(1))] = (bool(m.group(2)), v)
+    if segments:
+        return _rfc2231_value(segments)
+    return plain
+
+def _part_filename(structure):
+    # Extension de disposition: ("ATTACHMENT" ("FILENAME" "...")) après les champs de base
+    for item in structure[7:]:
+        if isinstance(item, list) and len(item) >= 2 and isinstance(item[0], str) and isinstance(item[1], list):
+            filename = _param(item[1], 'FILENAME')
+            if filename:
+                return filename
+    return _param(structure[2], 'NAME')
+
+def _is_message_part(structure):
+    return (
+        len(structure) > 8
+        and str(structure[0]).upper() == 'MESSAGE'
+        and str(structure[1]).upper() in ('RFC822', 'GLOBAL')
+        and isinstance(structure[8], list)
+        and bool(structure[8])
+    )
+
+def find_attachment_parts(structure, prefix='touch', section=''):
+    '''
+    Parcourt un BODYSTRUCTURE et retourne les (section, nom de fichier, encodage)
+    des parties dont le nom commence par `prefix`, y compris dans les emails
+    transférés en pièce jointe (message/rfc822)
+    '''
+    if not structure:
+        return []
+    if isinstance(structure[0], list):
+        # multipart: les sous-parties sont les listes en tête, avant le sous-type
+        children = itertools.takewhile(lambda c: isinstance(c, list), structure)
+        parts = []
+        for i, child in enumerate(children, start=1):
+            parts += find_attachment_parts(child, prefix, f'{section}.{i}' if section else str(i))
+        return parts
+    if _is_message_part(structure):
+        # Email transféré en pièce jointe: enveloppe puis corps imbriqué (section n.1, n.2...)
+        nested = structure[8]
+        part = section or '1'
+        if isinstance(nested[0], list):
+            return find_attachment_parts(nested, prefix, part)
+        return find_attachment_parts(nested, prefix, f'{part}.1')
+    filename = _part_filename(structure)
+    if filename and filename.startswith(prefix):
+        encoding = str(structure[5] or '7BIT').upper() if len(structure) > 5 else '7BIT'
+        return [(section or '1', filename, encoding)]
+    return []
+
+# Coupures de connexion reprises par retry_call: nombre de reprises et délai initial
+# (doublé à chaque reprise, plafonné à MAX_RETRY_DELAY secondes)
+RETRY_ERRORS = (imaplib.IMAP4.abort, OSError)
+FETCH_RETRIES = 5
+RETRY_BACKOFF = 0.5
+MAX_RETRY_DELAY = 30.0
+
+def retry_call(action, retries=FETCH_RETRIES, backoff=RETRY_BACKOFF, label=''):
+    '''
+    Appelle action(tentative) (0, 1, ...) jusqu'à ce qu'elle aboutisse. Sur coupure de
+    connexion (RETRY_ERRORS), attend backoff * 2**tentative secondes puis réessaie,
+    au plus `retries` fois; l'action rouvre sa connexion quand tentative > 0.
+    '''
+    for attempt in range(retries + 1):
+        try:
+            return action(attempt)
+        except RETRY_ERRORS as e:
+            if attempt == retries:
+                raise
+            delay = min(backoff * 2 ** attempt, MAX_RETRY_DELAY)
+            print(f"ErrorType : {type(e).__name__}, Error : {e} ({label}retry {attempt + 1}/{retries} in {delay:.1f}s)")
+            time.sleep(delay)
+
+def decode_part(data, encoding):
+    if encoding == 'BASE64':
+        return base64.b64decode(data)
+    if encoding == 'QUOTED-PRINTABLE':
+        return quopri.decodestring(data)
+    return data
+
+class ImapConnectionPool():
+    '''
+    Pool borné de connexions IMAP ouvertes à la demande par `connector.open_worker_connexion`
+    '''
+    def __init__(self, connector, size):
+        self.connector = connector
+        self.size = size
+        self.created = 0
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            create = self.created < self.size
+            if create:
+                self.created += 1
+        if not create:
+            return self.idle.get()
+        try:
+            return self.connector.open_worker_connexion()
+        except Exception:
+            with self.lock:
+                self.created -= 1
+            raise
+
+    def release(self, imap, broken=False):
+        if not broken:
+            self.idle.put(imap)
+            return
+        try:
+            imap.shutdown()
+        except Exception:
+            pass
+        with self.lock:
+            self.created -= 1
+
+    def close(self):
+        while True:
+            try:
+                imap = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                imap.logout()
+            except Exception:
+                pass
+
 class EmailConnector():
-    def __init__(self,username,password,imap_ssl_host='imap.gmail.com',imap_ssl_port=993):
+    def __init__(self,username,password,imap_ssl_host='imap.gmail.com',imap_ssl_port=993, state_file=None, use_ssl=True):
         self.imap_ssl_host = imap_ssl_host
         self.imap_ssl_port = imap_ssl_port
+        self.use_ssl = use_ssl
         self.username=username
         self.password=password
         self.verbose = True
         self.current_directory = None
         self.current_readonly = True
+        self.current_uidvalidity = None
+        # Etat de synchro incrémentale: {"<compte>/<répertoire>": {"uidvalidity": int, "last_uid": int}}
+        self.state_file = state_file
+        self.state = {}
+        self.load_state()
+        # Mesures cumulées des FETCH (toutes connexions): messages, octets reçus,
+        # attente réseau (fetch), analyse / décodage (decode) et STORE \Deleted (delete)
+        self.stats = {'messages': 0, 'bytes': 0, 'fetch_seconds': 0.0, 'decode_seconds': 0.0, 'delete_seconds': 0.0}
+        self.stats_lock = threading.Lock()
         self.imap_ssl_connexion()
                
+    def open_imap(self):
+        if self.use_ssl:
+            return imaplib.IMAP4_SSL(host=self.imap_ssl_host, port=self.imap_ssl_port)
+        return imaplib.IMAP4(host=self.imap_ssl_host, port=self.imap_ssl_port)
+
+    def add_stats(self, **values):
+        with self.stats_lock:
+            for key, value in values.items():
+                self.stats[key] += value
+
+    def uid_fetch(self, imap, uids, items):
+        t0 = time.perf_counter()
+        resp_code, data = imap.uid('FETCH', ','.join(str(uid) for uid in uids), items)
+        size = sum(len(x) for item in data if item is not None for x in (item if isinstance(item, tuple) else (item,)))
+        self.add_stats(bytes=size, fetch_seconds=time.perf_counter() - t0)
+        self.print_verbose(resp_code)
+        return data
+
     def imap_ssl_connexion(self):
         try:
-            self.imap_ssl = imaplib.IMAP4_SSL(host="imap.gmail.com", port=imaplib.IMAP4_SSL_PORT)
+            self.imap_ssl = self.open_imap()
         except Exception as e:
             print(f"ErrorType : {type(e).__name__}, Error : {e}")
             raise SystemError("Can't create IMAP server") from e
@@ -34,6 +300,16 @@ class EmailConnector():
         if self.verbose:
             print(f"Response Code : {resp_code}")
 
+    def open_worker_connexion(self):
+        '''
+        Nouvelle connexion authentifiée sur le répertoire courant, en lecture seule
+        (utilisée par le pool de téléchargement)
+        '''
+        imap = self.open_imap()
+        imap.login(self.username, self.password)
+        imap.select(mailbox=self.current_directory, readonly=True)
+        return imap
+
     def connect_mailbox(self):  # sourcery skip: class-extract-method
         try:
             resp_code, response = self.imap_ssl.login(self.username, self.password)
@@ -44,6 +320,19 @@ class EmailConnector():
         self.print_verbose(resp_code)
         return True
         
+    def reconnect_mailbox(self):
+        '''
+        Rouvre la connexion principale après une coupure et resélectionne le répertoire courant
+        '''
+        try:
+            self.imap_ssl.shutdown()
+        except Exception:
+            pass
+        self.imap_ssl_connexion()
+        self.imap_ssl.login(self.username, self.password)
+        if self.current_directory is not None:
+            self.imap_ssl.select(mailbox=self.current_directory, readonly=self.current_readonly)
+
     def logout_mailbox(self):
         try:
             resp_code, response = self.imap_ssl.logout()
@@ -74,7 +363,57 @@ class EmailConnector():
         self.print_verbose(resp_code)
         self.current_directory = directory
         self.current_readonly = readonly
+        self.current_uidvalidity = self.get_uidvalidity()
         return int(mail_count[0])
+
+    def get_uidvalidity(self):
+        # Réponse non sollicitée du SELECT, sinon demande explicite via STATUS
+        resp_code, data = self.imap_ssl.response('UIDVALIDITY')
+        if data and data[0] is not None:
+            return int(data[0])
+        resp_code, data = self.imap_ssl.status(self.current_directory, '(UIDVALIDITY)')
+        match = re.search(rb'UIDVALIDITY (\d+)', data[0] or b'')
+        return int(match.group(1)) if match else None
+
+    def load_state(self):
+        self.state = {}
+        if self.state_file is None or not os.path.isfile(self.state_file):
+            return self.state
+        try:
+            with open(self.state_file) as fp:
+                self.state = json.load(fp)
+        except (OSError, ValueError) as e:
+            print(f"ErrorType : {type(e).__name__}, Error : {e}")
+        return self.state
+
+    def save_state(self):
+        if self.state_file is None:
+            return False
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, 'w') as fp:
+            json.dump(self.state, fp, indent=2)
+        os.replace(tmp_file, self.state_file)
+        return True
+
+    def _state_key(self):
+        return f"{self.username}/{self.current_directory}"
+
+    def get_last_uid(self):
+        '''
+        Plus grand UID déjà traité dans le répertoire courant,
+        0 si inconnu ou si UIDVALIDITY a changé (les UID ne sont plus comparables)
+        '''
+        entry = self.state.get(self._state_key())
+        if entry is None or self.current_uidvalidity is None or entry.get('uidvalidity') != self.current_uidvalidity:
+            return 0
+        return int(entry.get('last_uid', 0))
+
+    def set_last_uid(self, uid):
+        if int(uid) > self.get_last_uid():
+            self.state[self._state_key()] = {'uidvalidity': self.current_uidvalidity, 'last_uid': int(uid)}
+
+    def reset_state(self):
+        self.state.pop(self._state_key(), None)
             
     def search_emails(self, field,key_word ):
         '''
@@ -84,6 +423,17 @@ class EmailConnector():
         self.print_verbose(resp_code)
         return [int(x) for x in mails[0].decode().split()]
 
+    def search_new_emails(self, field, key_word):
+        '''
+        Comme search_emails, mais retourne les UID supérieurs au dernier UID traité
+        (recherche `UID n:*`)
+        '''
+        last_uid = self.get_last_uid()
+        resp_code, mails = self.imap_ssl.uid('SEARCH', None, 'UID', f'{last_uid + 1}:*', field, key_word)
+        self.print_verbose(resp_code)
+        # `n:*` contient toujours le dernier message, même si son UID est < n
+        return [uid for uid in (int(x) for x in mails[0].decode().split()) if uid > last_uid]
+
     def print_message(self,  message):
         print("================== Start of Mail  ====================")
         print(f'From       : {message.get("From")}')
@@ -105,7 +455,120 @@ class EmailConnector():
         if do_print:
             self.print_message(message)
         self.print_verbose(resp_code)
-        return email.message_from_string(mail_data[0][1].decode('utf-8'))
+        return message
+
+    def get_email_by_uid(self, uid, do_print = False):
+        mail_data = self.uid_fetch(self.imap_ssl, [uid], '(RFC822)')
+        if not mail_data or not isinstance(mail_data[0], tuple):
+            return None
+        t0 = time.perf_counter()
+        message = email.message_from_bytes(mail_data[0][1])
+        self.add_stats(messages=1, decode_seconds=time.perf_counter() - t0)
+        if do_print:
+            self.print_message(message)
+        return message
+
+    def fetch_bodystructures(self, uids, imap=None):
+        data = self.uid_fetch(imap or self.imap_ssl, uids, '(BODYSTRUCTURE)')
+        t0 = time.perf_counter()
+        structures = {msg['UID']: msg.get('BODYSTRUCTURE') for msg in parse_fetch_response(data) if 'UID' in msg}
+        self.add_stats(decode_seconds=time.perf_counter() - t0)
+        return structures
+
+    def _fetch_attachment_batch(self, imap, batch, prefix, skip_names):
+        structures = self.fetch_bodystructures(batch, imap)
+        parts_by_uid = {
+            uid: [p for p in find_attachment_parts(structures.get(uid), prefix) if p[1] not in skip_names]
+            for uid in batch
+        }
+        groups = defaultdict(list)
+        for uid, parts in parts_by_uid.items():
+            if parts:
+                groups[tuple(section for section, _, _ in parts)].append(uid)
+        bodies = {}
+        for sections, group in groups.items():
+            items = ' '.join(f'BODY.PEEK[{section}]' for section in sections)
+            data = self.uid_fetch(imap, group, f'({items})')
+            for msg in parse_fetch_response(data):
+                for section in sections:
+                    body = msg.get(f'BODY[{section}]')
+                    if 'UID' in msg and body is not None:
+                        bodies[(msg['UID'], section)] = body.encode() if isinstance(body, str) else body
+        t0 = time.perf_counter()
+        results = []
+        for uid in batch:
+            attachments = []
+            for section, filename, encoding in parts_by_uid[uid]:
+                body = bodies.get((uid, section))
+                if body is None:
+                    # Email incomplet: signalé par None, il ne doit être ni supprimé ni dépassé
+                    print(f"Part {section} ({filename}) of email {uid} not returned by the server, email will be fetched again")
+                    attachments = None
+                    break
+                attachments.append((filename, decode_part(body, encoding)))
+            results.append((uid, attachments))
+        self.add_stats(messages=len(batch), decode_seconds=time.perf_counter() - t0)
+        return results
+
+    def _fetch_batch(self, pool, batch, prefix, skip_names, attempt):
+        '''
+        Un essai de _fetch_attachment_batch: sur la connexion principale (pool None,
+        rouverte après une coupure) ou sur une connexion du pool (jetée si elle tombe)
+        '''
+        if pool is None:
+            if attempt:
+                self.reconnect_mailbox()
+            return self._fetch_attachment_batch(self.imap_ssl, batch, prefix, skip_names)
+        imap = pool.acquire()
+        try:
+            results = self._fetch_attachment_batch(imap, batch, prefix, skip_names)
+        except RETRY_ERRORS:
+            pool.release(imap, broken=True)
+            raise
+        pool.release(imap)
+        return results
+
+    def _fetch_batch_with_retry(self, pool, batch, prefix, skip_names, retries, backoff):
+        return retry_call(
+            lambda attempt: self._fetch_batch(pool, batch, prefix, skip_names, attempt),
+            retries, backoff, label=f'UIDs {batch[0]}-{batch[-1]}, ',
+        )
+
+    def fetch_attachment_parts(self, uids, prefix='touch', skip_names=(), batch_size=50, workers=1, retries=FETCH_RETRIES, backoff=RETRY_BACKOFF):
+        '''
+        Télécharge uniquement les pièces jointes dont le nom commence par `prefix`:
+        BODYSTRUCTURE d'un lot d'UID, puis BODY.PEEK[n] des parties utiles, en un seul
+        FETCH pour tous les UID du lot qui demandent les mêmes sections.
+        Produit (uid, [(nom de fichier, contenu décodé), ...]) pour chaque UID, dans l'ordre;
+        (uid, None) si le serveur n'a pas renvoyé toutes les parties demandées.
+        Les fichiers de `skip_names` ne sont pas téléchargés.
+
+        Avec workers > 1, les lots sont répartis sur un pool de `workers` connexions
+        (threads), au plus 2 * workers lots d'avance. La connexion principale reste seule
+        à modifier la boîte (suppression, expunge).
+        Un lot dont la connexion tombe est repris sur une nouvelle connexion jusqu'à
+        `retries` fois, après backoff, 2 * backoff, ... secondes (voir retry_call).
+        '''
+        uids = list(uids)
+        batches = [uids[i:i + batch_size] for i in range(0, len(uids), batch_size)]
+        if workers <= 1:
+            for batch in batches:
+                yield from self._fetch_batch_with_retry(None, batch, prefix, skip_names, retries, backoff)
+            return
+        pool = ImapConnectionPool(self, workers)
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                todo = iter(batches)
+                def submit(batch):
+                    return executor.submit(self._fetch_batch_with_retry, pool, batch, prefix, skip_names, retries, backoff)
+                pending = deque(submit(b) for b in itertools.islice(todo, 2 * workers))
+                while pending:
+                    future = pending.popleft()
+                    for b in itertools.islice(todo, 1):
+                        pending.append(submit(b))
+                    yield from future.result()
+        finally:
+            pool.close()
 
     def delete_email(self, mail_id):
         if getattr(self, "current_readonly", True):
@@ -114,6 +577,19 @@ class EmailConnector():
         self.print_verbose(resp_code)
         return resp_code == 'OK'
 
+    def delete_email_by_uid(self, uid):
+        '''
+        Marque \\Deleted un UID ou une liste d'UID (une seule commande STORE)
+        '''
+        if getattr(self, "current_readonly", True):
+            raise RuntimeError("Mailbox is in read-only mode; cannot delete emails.")
+        uids = uid if isinstance(uid, (list, tuple)) else [uid]
+        t0 = time.perf_counter()
+        resp_code, response = self.imap_ssl.uid('STORE', ','.join(str(u) for u in uids), '+FLAGS', '(\\Deleted)')
+        self.add_stats(delete_seconds=time.perf_counter() - t0)
+        self.print_verbose(resp_code)
+        return resp_code == 'OK'
+
     def expunge(self):
         resp_code, response = self.imap_ssl.expunge()
         self.print_verbose(resp_code)
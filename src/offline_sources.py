@@ -0,0 +1,114 @@
+import email
+import mailbox
+import os
+import time
+import zipfile
+
+from src.attachment_index import AttachmentIndex
+
+'''
+Sources hors ligne de rapports Okofen: export mbox (Google Takeout), répertoire
+Maildir ou archive zip (CSV touch_*.csv et/ou emails .eml).
+Les pièces jointes touch_*.csv sont extraites message par message (ou membre par
+membre), sans décompresser l'archive entière.
+'''
+
+SOURCE_TYPES = ('auto', 'mbox', 'maildir', 'zip')
+
+def detect_source_type(path):
+    if os.path.isdir(path):
+        if all(os.path.isdir(os.path.join(path, d)) for d in ('cur', 'new')):
+            return 'maildir'
+        raise ValueError(f"{path} is a directory but not a Maildir (cur/ and new/ expected)")
+    if zipfile.is_zipfile(path):
+        return 'zip'
+    return 'mbox'
+
+def touch_attachments(message, prefix='touch'):
+    '''
+    Pièces jointes d'un email dont le nom commence par `prefix`: liste de (nom, contenu)
+    '''
+    out = []
+    for part in message.walk():
+        if part.get_content_maintype() == 'multipart':
+            continue
+        filename = part.get_filename()
+        if filename and filename.startswith(prefix):
+            payload = part.get_payload(decode=True)
+            if payload is not None:
+                out.append((filename, payload))
+    return out
+
+def _iter_mailbox(box, prefix):
+    for key in box.iterkeys():
+        raw = box.get_bytes(key)
+        yield len(raw), touch_attachments(email.message_from_bytes(raw), prefix)
+
+def iter_source(path, source_type='auto', prefix='touch'):
+    '''
+    Parcourt une source hors ligne et produit, pour chaque message (ou membre du zip),
+    (octets lus, [(nom de fichier, contenu), ...])
+    '''
+    if source_type == 'auto':
+        source_type = detect_source_type(path)
+    if source_type == 'mbox':
+        yield from _iter_mailbox(mailbox.mbox(path, create=False), prefix)
+    elif source_type == 'maildir':
+        yield from _iter_mailbox(mailbox.Maildir(path, factory=None, create=False), prefix)
+    elif source_type == 'zip':
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir():
+                    continue
+                if name.startswith(prefix) and name.lower().endswith('.csv'):
+                    yield info.file_size, [(name, archive.read(info))]
+                elif name.lower().endswith('.eml'):
+                    raw = archive.read(info)
+                    yield len(raw), touch_attachments(email.message_from_bytes(raw), prefix)
+    else:
+        raise ValueError(f"Unknown source type: {source_type} (expected one of {', '.join(SOURCE_TYPES)})")
+
+def extract_source(path, data_dir, source_type='auto', on_file=None, verbose=0, progress_every=5.0):
+    '''
+    Ecrit dans data_dir les touch_*.csv d'une source hors ligne et appelle on_file(chemin)
+    pour chaque fichier écrit. Les contenus déjà présents sont ignorés; une autre version
+    d'un fichier existant le remplace (conflit, voir AttachmentIndex).
+    Affiche la progression toutes les `progress_every` secondes si verbose > 0.
+    Retourne les compteurs: messages, octets lus, fichiers écrits / ignorés / en conflit, durée.
+    '''
+    stats = {'messages': 0, 'bytes': 0, 'written': 0, 'skipped': 0, 'conflicts': 0, 'seconds': 0.0}
+    index = AttachmentIndex(data_dir)
+    t0 = last_report = time.perf_counter()
+    try:
+        for size, attachments in iter_source(path, source_type):
+            stats['messages'] += 1
+            stats['bytes'] += size
+            for filename, payload in attachments:
+                status, file_path = index.add(filename, payload)
+                if status == 'duplicate':
+                    stats['skipped'] += 1
+                    continue
+                if status == 'conflict':
+                    stats['conflicts'] += 1
+                stats['written'] += 1
+                if on_file is not None:
+                    on_file(file_path)
+            now = time.perf_counter()
+            if verbose > 0 and now - last_report >= progress_every:
+                last_report = now
+                print(format_source_stats(stats, now - t0))
+    finally:
+        index.save()
+    stats['seconds'] = time.perf_counter() - t0
+    if verbose > 0:
+        print(format_source_stats(stats, stats['seconds']))
+    return stats
+
+def format_source_stats(stats, elapsed):
+    elapsed = max(elapsed, 1e-9)
+    return (
+        f"{stats['messages']} message(s), {stats['bytes'] / 1e6:.1f} MB read, "
+        f"{stats['written']} file(s) written ({stats['conflicts']} new version(s)), {stats['skipped']} already present | "
+        f"{stats['messages'] / elapsed:.1f} msg/s, {stats['bytes'] / 1e6 / elapsed:.2f} MB/s"
+    )
@@ -1,5 +1,7 @@
 
-from src.mailler import EmailConnector
+from src.attachment_index import AttachmentIndex
+from src.mailler import FETCH_RETRIES, EmailConnector
+from src.okofen_store import DayIndex, open_store
 import os
 import src.system as s
 import pandas as pd
@@ -8,7 +10,9 @@ from datetime import datetime
 from datetime import timedelta  
 from dataclasses import dataclass
 from dateutil import parser
+import time
 import json
+from collections import deque
 def datetime2str(d):
     return d.strftime("%Y-%m-%d %H:%M:%S")
 
@@ -44,19 +48,156 @@ def find_lastest_date(data):
             lastest_date =d
     return   parse_date(lastest_date)
 
+def raw_datetimes(data):
+    '''
+    Horodatages des lignes brutes (colonnes 'Datum ' et 'Zeit ' des CSV)
+    '''
+    if data.shape[0]==0:
+        return pd.DatetimeIndex([], name='datetime')
+    return pd.DatetimeIndex(pd.to_datetime(data['Datum ']+' '+data['Zeit '],format="%d.%m.%Y %H:%M:%S"), name='datetime')
+
 def get_date_from_okofen_file(filename):
     b = s.basename(filename).split('_')
     return int(b[1][:4]),int(b[1][4:6]),int(b[1][6:])
 
 def read_okfen_data(filename)->pd.DataFrame|None:
     try:
-        return pd.read_csv(filename,sep=';',encoding = "ISO-8859-1")
+        return pd.read_csv(filename,sep=';',encoding = OKOFEN_CSV_ENCODING)
     except Exception:
         print('')
         print(f'[ERROR] Fail to read {filename}')
         print('')
         return None
+
+OKOFEN_CSV_ENCODING = "ISO-8859-1"
+CSV_ENGINES = ('c', 'pyarrow')
+# Etat de la synchro IMAP incrémentale (UIDVALIDITY, dernier UID traité), dans data_dir
+IMAP_STATE_FILE = 'okofen_imap_state.json'
+# 'parts': BODYSTRUCTURE puis BODY.PEEK[n] des seules pièces jointes touch_*.csv
+# 'rfc822': message complet (comportement historique)
+FETCH_MODES = ('parts', 'rfc822')
+DELETE_BATCH_SIZE = 100
+# Stockage des mesures: 'hdf5' (fichier HDF5_DB_FILE monolithique, historique),
+# 'hdf5_table' (HDF5 table interrogeable), 'parquet' (partitions mensuelles)
+# ou 'memmap' (colonnes float32 projetées en mémoire), voir src.okofen_store
+STORAGES = ('hdf5', 'hdf5_table', 'parquet', 'memmap')
+HDF5_DB_FILE = '0-okofen_db-vendome.h5'
+# Index des jours (lignes, premier / dernier horodatage, complétude) d'un stockage, dans data_dir
+DAY_INDEX_FILE = 'okofen_days.{storage}.json'
+
+def _norm_col(c):
+    return " ".join(str(c).lstrip("\ufeff").replace("\u00a0", " ").split())
+
+def _replicated_header_rows(filename, header):
+    '''
+    Numéros de ligne (0 = entête) des copies de l'entête dans le fichier, lu ligne à ligne
+    '''
+    with open(filename, encoding=OKOFEN_CSV_ENCODING, newline='') as fp:
+        next(fp, None)
+        return [i for i, line in enumerate(fp, start=1) if line.rstrip('\r\n') == header]
+
+def read_okofen_csv(filename, columns=None, dtype='float32', engine='c', text_columns=('Datum', 'Zeit'))->pd.DataFrame|None:
+    """
+    Lecteur typé des CSV Okofen: ne parse que `columns` (noms normalisés, sans espaces
+    superflus; None = toutes), virgule décimale gérée au parsing, mesures en `dtype`
+    (un dtype unique, ou un dict nom normalisé -> dtype, float32 par défaut).
+    Les colonnes `text_columns` (date/heure) restent des chaînes; les noms de colonnes
+    sont ceux du fichier. engine: 'c' ou 'pyarrow' (si installé).
+    Le fichier est lu directement par pandas, sans copie en mémoire. Les lignes d'entête
+    répliquées (redémarrage de la chaudière) ne sont cherchées que si le parsing typé
+    échoue, puis sautées au parsing.
+    """
+    try:
+        with open(filename, encoding=OKOFEN_CSV_ENCODING, newline='') as fp:
+            header = fp.readline().rstrip('\r\n')
+    except Exception:
+        print(f'[ERROR] Fail to read {filename}')
+        return None
+    raw_cols = header.split(';')
+    wanted = None if columns is None else {_norm_col(c) for c in columns}
+    # Un ';' final donne une colonne sans nom, jamais importée
+    usecols = [c for c in raw_cols if _norm_col(c) and (wanted is None or _norm_col(c) in wanted)]
+    text_cols = [c for c in usecols if _norm_col(c) in text_columns]
+    if isinstance(dtype, dict):
+        col_dtypes = {c: dtype.get(_norm_col(c), 'float32') for c in usecols}
+    else:
+        col_dtypes = {c: dtype for c in usecols}
+    dtypes = {c: (str if c in text_cols else col_dtypes[c]) for c in usecols}
+
+    def _read(dtypes, skiprows=None):
+        return pd.read_csv(
+            filename, sep=';', decimal=',', encoding=OKOFEN_CSV_ENCODING,
+            usecols=usecols, dtype=dtypes, skiprows=skiprows,
+            # pyarrow n'accepte pas une liste de lignes à sauter
+            engine='c' if skiprows else engine,
+        )
+    try:
+        data = _read(dtypes)
+        if text_cols and len(text_cols) == len(usecols):
+            # Colonnes texte seules: les entêtes répliqués ont été lus comme des données
+            data = data[data[text_cols[0]] != text_cols[0]].reset_index(drop=True)
+        return data
+    except ValueError:
+        pass
+    skip = None
+    try:
+        skip = _replicated_header_rows(filename, header) or None
+        if skip:
+            return _read(dtypes, skip)
+    except ValueError:
+        pass
+    except Exception:
+        print(f'[ERROR] Fail to read {filename}')
+        return None
+    # Valeur non numérique dans une colonne de mesure: lecture texte puis conversion tolérante
+    try:
+        data = _read({c: str for c in usecols}, skip)
+    except Exception:
+        print(f'[ERROR] Fail to read {filename}')
+        return None
+    for c in usecols:
+        if c not in text_cols:
+            data[c] = pd.to_numeric(data[c].str.replace(',', '.', regex=False), errors='coerce').astype(col_dtypes[c])
+    return data
     
+OKOFEN_DICO = {
+    'datetime':'datetime',
+    'AT [°C]': 'T°C Extérieure',
+    'ATakt [°C]': 'ATakt [°C]',
+    'PE1 KT[°C]': 'T°C Chaudière',
+    'PE1 KT_SOLL[°C]': 'T°C Chaudière Consigne',
+    'PE1_BR1 ': 'OKO 1 - Contact Brûleur (On/Off)',
+    'HK1 VL Ist[°C]': 'T°C Départ',
+    'HK1 VL Soll[°C]': 'T°C Départ Consigne',
+    'HK1 RT Ist[°C]': 'T°C Ambiante',
+    'HK1 RT Soll[°C]': 'T°C Ambiante Consigne',
+    'HK1 Pumpe': 'Circulateur Chauffage (On/Off)',
+    'HK1 Status':"Status Chauff.",
+    'WW1 EinT Ist[°C]':'T°C ECS',
+    'WW1 AusT Ist[°C]':'T°C ECS (arret)',
+    'WW1 Soll[°C]':'T°C ECS Consigne',
+    'WW1 Pumpe':'Circulateur ECS',
+    'WW1 Status':'Status ESC',
+    'PE1 Modulation[%]':'PE1 Modulation[%]',
+    'PE1 FRT Ist[°C]':'T°C Flamme',
+    'PE1 FRT Soll[°C]':'T°C Flamme Consigne',
+    'PE1 Fuellstand[kg]' : 'Niveau Sillo kg',
+    'PE1 Fuellstand ZWB[kg]' : 'Niveau tremis kg',
+}
+
+def _confirmed(ack):
+    '''
+    Vrai si un fichier transmis à on_file est pris en compte: pas d'accusé (import
+    ultérieur) ou import réussi (attend la fin de l'import en cours)
+    '''
+    if ack is None:
+        return True
+    try:
+        ack.result()
+    except Exception:
+        return False
+    return True
+
 @dataclass()
 class OkofenConfig:
     data_dir:str="Local directory path to save data"
@@ -64,7 +205,41 @@ class OkofenConfig:
     gmail_passwd:str='xxxxxxxxxxx'
     email_subject_key_serach:str = 'P0060B5_41F11E'
     gmail_box:str="INBOX"
+    imap_host:str="imap.gmail.com"
+    imap_port:int=993
+    imap_ssl:bool=True
     
+def format_okofen_data(data, log=None):
+    '''
+    Données brutes des CSV -> mesures float32 aux noms de OKOFEN_DICO, indexées par datetime
+    '''
+    datetimes = raw_datetimes(data)
+    dico = OKOFEN_DICO
+    if log is not None:
+        for f in data.columns:
+            if f in dico:
+                log(f"'{f}' : '{dico[f]}'") # type: ignore
+            else:
+                log(f"'{f}' : ''")
+    cols = [c for c in dico if c != 'datetime']
+    values = data[cols].rename(columns=dico) # type: ignore
+    # Anciennes bases HDF5 (CSV lus en texte): virgule décimale à convertir
+    for c in values.columns:
+        if values[c].dtype == object:
+            values[c] = pd.to_numeric(values[c].astype(str).str.replace(',', '.', regex=False), errors='coerce')
+    values = values.astype('float32')
+    values.index = datetimes
+    return values.sort_index(kind='stable')
+
+def empty_okofen_data():
+    return pd.DataFrame(
+        columns=[v for k, v in OKOFEN_DICO.items() if k != 'datetime'],
+        index=pd.DatetimeIndex([], name='datetime'), dtype='float32',
+    )
+
+def list_local_datafiles(data_dir:str):
+    return glob.glob(s.join(data_dir,'touch_*.csv'))
+
 def read_OkofenConfig(filename:str):
     f = open(filename)
     config_data = json.load(f)
@@ -76,27 +251,101 @@ def read_OkofenConfig(filename:str):
         gmail_passwd=config_data["gmail_passwd"],
         email_subject_key_serach=config_data["email_subject_key_serach"],
         gmail_box=config_data["gmail_box"],
+        imap_host=config_data.get("imap_host", "imap.gmail.com"),
+        imap_port=int(config_data.get("imap_port", 993)),
+        imap_ssl=bool(config_data.get("imap_ssl", True)),
     )
     return config
     
 class Okofen():
-    def __init__(self,config:OkofenConfig, verbose:int = 0, delete_emails: bool = True):
+    def __init__(self,config:OkofenConfig, verbose:int = 0, delete_emails: bool = True, csv_engine: str = 'c', fetch_mode: str = 'parts', mail_workers: int = 1, mail_retries: int = FETCH_RETRIES, storage: str = 'hdf5', lazy: bool = False, read_only: bool = False):
+        if fetch_mode not in FETCH_MODES:
+            raise ValueError(f"Unknown fetch mode: {fetch_mode} (expected one of {', '.join(FETCH_MODES)})")
+        if storage not in STORAGES:
+            raise ValueError(f"Unknown storage: {storage} (expected one of {', '.join(STORAGES)})")
+        if lazy and storage == 'hdf5':
+            raise ValueError("lazy mode needs a queryable storage ('hdf5_table', 'parquet' or 'memmap')")
         self.config = config
         self.verbose = verbose
+        self.csv_engine = csv_engine
+        self.fetch_mode = fetch_mode
+        self.mail_workers = mail_workers
+        self.mail_retries = mail_retries
         self.mail_dir = self.config.gmail_box
         self.key_serach = self.config.email_subject_key_serach
         self.data_dir = self.config.data_dir
         self.delete_emails = delete_emails
-        self.gmail = EmailConnector(username = self.config.gmail_acount,password = config.gmail_passwd)
-        self.gmail.verbose = verbose == 1
-        self.local_files = s.ls_files(self.data_dir,'csv',False)
-        self.print("Connexion is setup")
+        self.storage = storage
+        # lazy: okofen.data n'est pas chargé, les sélections interrogent le stockage
+        self.lazy = lazy
+        # read_only: analyse seule, ni connexion mail ni écriture du stockage (qui doit exister)
+        self.read_only = read_only
+        self.store = None if storage == 'hdf5' else open_store(storage, self.data_dir, read_only=read_only)
+        self.day_index = DayIndex(s.join(self.data_dir, DAY_INDEX_FILE.format(storage=storage)))
+        # Pièces jointes écrites dans data_dir, doublons ignorés, conflits et temps d'écriture cumulé
+        self.stats = {'files': 0, 'duplicates': 0, 'conflicts': 0, 'write_seconds': 0.0}
+        # Connexion mail, liste des fichiers, index des pièces jointes et mesures: créés au premier usage
+        self._gmail = None
+        self._local_files = None
+        self._attachments = None
+        self._data = None
+
+    @property
+    def gmail(self):
+        if self._gmail is None:
+            if self.read_only:
+                raise RuntimeError("Okofen is read-only: no mail connection")
+            self._gmail = EmailConnector(
+                username = self.config.gmail_acount,
+                password = self.config.gmail_passwd,
+                imap_ssl_host = self.config.imap_host,
+                imap_ssl_port = self.config.imap_port,
+                use_ssl = self.config.imap_ssl,
+                state_file = s.join(self.data_dir, IMAP_STATE_FILE),
+            )
+            self._gmail.verbose = self.verbose == 1
+            self.print("Connexion is setup")
+        return self._gmail
+
+    @property
+    def local_files(self):
+        if self._local_files is None:
+            self._local_files = s.ls_files(self.data_dir,'csv',False)
+        return self._local_files
+
+    @property
+    def attachments(self):
+        if self._attachments is None:
+            self._attachments = AttachmentIndex(self.data_dir)
+        return self._attachments
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self.load_data()
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    def load_data(self):
+        '''
+        Toutes les mesures, mises en forme, lues depuis le stockage
+        '''
+        if self.store is not None:
+            return self.store.read()
+        db_filename = s.join(self.data_dir,HDF5_DB_FILE)
+        if not s.exists(db_filename):
+            return empty_okofen_data()
+        return format_okofen_data(pd.read_hdf(db_filename,key='data'))
         
     def print(self,msg):
         if self.verbose>0:
             print(msg)
         
-    def get_attachement_from_okfen_email(self,email_message,existing_files):
+    def get_attachement_from_okfen_email(self,email_message):
+        saved = []
         for part in email_message.walk():
             # this part comes from the snipped I don't understand yet... 
             if part.get_content_maintype() == 'multipart':
@@ -108,32 +357,117 @@ class Okofen():
             if bool(filename):
                 if filename[:5]!='touch':
                     continue
-                if filename in existing_files:
-                    self.print(f'Already have {filename} in db')
+                path = self.save_attachment(filename, part.get_payload(decode=True))
+                if path is not None:
+                    saved.append(path)
+        return saved
+
+    def save_attachment(self, filename, payload):
+        '''
+        Ecrit la pièce jointe dans data_dir; retourne son chemin si elle a été écrite.
+        Un contenu déjà présent (même sous un autre nom) est ignoré; une autre version
+        d'un fichier existant le remplace et sera réimportée (voir AttachmentIndex)
+        '''
+        t0 = time.perf_counter()
+        status, filePath = self.attachments.add(filename, payload)
+        if status == 'duplicate':
+            self.stats['duplicates'] += 1
+            self.print(f'Already have {filename} (same content as {os.path.basename(filePath)})')
+            return None
+        if status == 'conflict':
+            self.stats['conflicts'] += 1
+            self.print(f'"{filename}" differs from the local copy: previous version moved to {self.attachments.conflicts[-1]["archived_as"]}, file will be re-imported')
+        self.stats['files'] += 1
+        self.stats['write_seconds'] += time.perf_counter() - t0
+        self.print(f'"{filename}" has been downloaded' )
+        return filePath
+
+    def iter_okofen_emails(self, email_ids):
+        '''
+        Enregistre les pièces jointes touch_*.csv de chaque email (selon fetch_mode)
+        et produit (UID, chemins des fichiers écrits) une fois l'email traité,
+        (UID, None) si l'email n'a pas pu être lu en entier
+        '''
+        if self.fetch_mode == 'parts':
+            # Pas de filtre par nom: un même nom peut porter une autre version du fichier
+            emails = self.gmail.fetch_attachment_parts(email_ids, 'touch', workers=self.mail_workers, retries=self.mail_retries)
+            for id, attachments in emails:
+                if attachments is None:
+                    yield id, None
                     continue
-                filePath = os.path.join(self.config.data_dir, filename)
-                if not os.path.isfile(filePath):
-                    with open(filePath, 'wb') as fp:
-                        fp.write(part.get_payload(decode=True))
-                self.print(f'"{filename}" has been downloaded' )
+                saved = []
+                for filename, payload in attachments:
+                    self.print(f"Attached file: {filename}")
+                    path = self.save_attachment(filename, payload)
+                    if path is not None:
+                        saved.append(path)
+                yield id, saved
+            return
+        for id in email_ids:
+            email_message = self.gmail.get_email_by_uid(id,False)
+            if email_message is None:
+                yield id, None
+                continue
+            yield id, self.get_attachement_from_okfen_email(email_message)
         
-    def download_data_from_gmail(self, delete_emails: bool | None = None):      
+    def download_data_from_gmail(self, delete_emails: bool | None = None, full_sync: bool = False, on_file=None):      
+        '''
+        Télécharge les pièces jointes touch_*.csv des emails Okofen.
+        Seuls les emails dont l'UID dépasse le dernier UID traité (fichier d'état
+        IMAP_STATE_FILE dans data_dir) sont relus; full_sync=True repart de zéro.
+        on_file(chemin) est appelé pour chaque fichier écrit, dès qu'il est sur disque;
+        s'il retourne un Future (import en flux), l'email n'est supprimé et le dernier UID
+        n'avance qu'une fois l'import de tous ses fichiers confirmé.
+        '''
         if delete_emails is None:
             delete_emails = self.delete_emails
         if self.gmail.connect_mailbox():
             mail_count = self.gmail.set_directory(self.mail_dir, readonly=not delete_emails)
             self.print(f'{mail_count} emails in {self.mail_dir}')
-            email_ids = self.gmail.search_emails('FROM',self.key_serach)
-            self.print(f'{len(email_ids)} found from sender {self.key_serach}')
-            for id in email_ids:
-                email_message = self.gmail.get_email(id,False)
-                self.get_attachement_from_okfen_email(email_message,self.local_files)
-                if delete_emails:
-                    try:
-                        self.gmail.delete_email(id)
-                        self.print(f"Email {id} deleted from {self.mail_dir}")
-                    except Exception as exc:
-                        self.print(f"Failed to delete email {id}: {exc}")
+            if full_sync:
+                self.gmail.reset_state()
+            email_ids = self.gmail.search_new_emails('FROM',self.key_serach)
+            self.print(f'{len(email_ids)} new emails found from sender {self.key_serach} (after UID {self.gmail.get_last_uid()})')
+            # Emails traités en attente de suppression: un STORE par lot plutôt que par email
+            to_delete = []
+            # Emails lus, dans l'ordre, en attente de la confirmation de leurs fichiers:
+            # (UID, accusés retournés par on_file), accusés None si l'email est incomplet
+            pending = deque()
+            # Premier email incomplet ou non importé: le dernier UID traité ne doit plus avancer au-delà
+            incomplete = False
+
+            def settle(wait):
+                nonlocal to_delete, incomplete
+                while pending:
+                    id, acks = pending[0]
+                    if not wait and acks is not None and not all(ack is None or ack.done() for ack in acks):
+                        return
+                    pending.popleft()
+                    if acks is None or not all(_confirmed(ack) for ack in acks):
+                        incomplete = True
+                        continue
+                    if delete_emails:
+                        to_delete.append(id)
+                        if len(to_delete) >= DELETE_BATCH_SIZE:
+                            self.delete_emails_by_uid(to_delete)
+                            to_delete = []
+                    if not incomplete:
+                        self.gmail.set_last_uid(id)
+
+            try:
+                for id, paths in self.iter_okofen_emails(email_ids):
+                    acks = None
+                    if paths is not None:
+                        acks = [on_file(path) for path in paths] if on_file is not None else []
+                    pending.append((id, acks))
+                    settle(wait=False)
+            finally:
+                # Attend les imports en cours: seuls les emails confirmés sont supprimés
+                settle(wait=True)
+                if to_delete:
+                    self.delete_emails_by_uid(to_delete)
+                self.gmail.save_state()
+                self.attachments.save()
             if delete_emails and email_ids:
                 try:
                     self.gmail.expunge()
@@ -141,33 +475,97 @@ class Okofen():
                 except Exception as exc:
                     self.print(f"Failed to expunge mailbox: {exc}")
             self.gmail.logout_mailbox()
-            self.local_files = s.ls_files(self.data_dir,'csv',False)
+            self._local_files = None
             
+    def delete_emails_by_uid(self, uids):
+        try:
+            self.gmail.delete_email_by_uid(uids)
+            self.print(f"{len(uids)} email(s) deleted from {self.mail_dir}")
+        except Exception as exc:
+            self.print(f"Failed to delete emails {uids[0]}..{uids[-1]}: {exc}")
+
     def get_local_datafile_list(self):
-        return glob.glob(s.join(self.data_dir,'touch_*.csv'))
+        return list_local_datafiles(self.data_dir)
     
     def update_local_db(self):
-        db_filename = s.join(self.data_dir,'0-okofen_db-vendome.h5')
+        if self.read_only:
+            raise RuntimeError("Okofen is read-only: the local database cannot be updated")
+        if self.store is not None:
+            return self.update_store()
+        db_filename = s.join(self.data_dir,HDF5_DB_FILE)
         if s.exists(db_filename):
             self.data = pd.read_hdf(db_filename,key='data')
         else:
             # Initialisation correcte lors de la première exécution sans HDF5 existant
             self.data = pd.DataFrame()
-        lastes_date_in_db = find_lastest_date(self.data)
-        local_files = self.get_local_datafile_list()
-        have_new_data = False
-        
-        for i in range(len(local_files)):
-            current_date = get_date_from_okofen_file(local_files[i])
+        lastes_date_in_db = self.get_day_index().lastest_complete_date()
+        new_data = self.read_new_datafiles(lastes_date_in_db)
+        if new_data:
+            self.data = pd.concat([self.data,*new_data],ignore_index=True) # type: ignore            
+            self.data.to_hdf(db_filename,key='data')
+            # Jours touchés recalculés sur toutes leurs lignes (un jour peut couvrir deux CSV)
+            touched = pd.concat([d['Datum '] for d in new_data]).unique()
+            rows = self.data[self.data['Datum '].isin(touched)]
+            self.day_index.update(raw_datetimes(rows), days=pd.to_datetime(touched, format="%d.%m.%Y").date)
+            self.day_index.save()
+
+    def read_new_datafiles(self, lastes_date_in_db):
+        '''
+        CSV locaux postérieurs au dernier jour complet en base, lus tels quels
+        '''
+        new_data = []
+        for filename in sorted(self.get_local_datafile_list()):
+            current_date = get_date_from_okofen_file(filename)
             if lastes_date_in_db is None or is_bigger_than(current_date,lastes_date_in_db)>0:
-                self.print(f'***{local_files[i]}***')
-                current = read_okfen_data(local_files[i])
+                self.print(f'***{filename}***')
+                current = read_okofen_csv(filename, columns=['Datum', 'Zeit', *OKOFEN_DICO], engine=self.csv_engine)
                 if current is None:
                     continue
-                self.data = pd.concat([self.data,current],ignore_index=True) # type: ignore            
-                have_new_data = True
-        if have_new_data:
-            self.data.to_hdf(db_filename,key='data')
+                new_data.append(current)
+        return new_data
+
+    def update_store(self):
+        '''
+        Mise à jour du stockage (storage != 'hdf5'): seuls les nouveaux CSV sont lus,
+        et seules les partitions touchées sont réécrites. Au premier passage, un
+        ancien fichier HDF5 monolithique est repris dans le stockage.
+        '''
+        db_filename = s.join(self.data_dir,HDF5_DB_FILE)
+        if self.store.is_empty():
+            if s.exists(db_filename):
+                self.print(f'Migrating {db_filename} to {self.storage} storage')
+                self.store.append(format_okofen_data(pd.read_hdf(db_filename,key='data')))
+            self.day_index.rebuild(self.stored_datetimes())
+        new_data = self.read_new_datafiles(self.get_day_index().lastest_complete_date())
+        if new_data:
+            frame = format_okofen_data(pd.concat(new_data,ignore_index=True))
+            self.store.append(frame)
+            days = frame.index.normalize()
+            stored = self.store.read(days[0], days[-1] + timedelta(days=1) - timedelta(microseconds=1), columns=[]).index
+            self.day_index.update(stored, days=set(days.date))
+            self.day_index.save()
+
+    def stored_datetimes(self):
+        '''
+        Horodatages de toutes les lignes stockées (pour reconstruire l'index des jours)
+        '''
+        if self.store is not None:
+            return self.store.read(columns=[]).index
+        data = self._data
+        if data is None:
+            db_filename = s.join(self.data_dir,HDF5_DB_FILE)
+            data = pd.read_hdf(db_filename,key='data') if s.exists(db_filename) else pd.DataFrame()
+        if isinstance(data.index, pd.DatetimeIndex):
+            return data.index
+        return raw_datetimes(data)
+
+    def get_day_index(self):
+        '''
+        Index des jours (DayIndex), reconstruit depuis les données au premier usage
+        '''
+        if not self.day_index.loaded:
+            self.day_index.rebuild(self.stored_datetimes())
+        return self.day_index
             
     def Update_db_from_gmail(self):
         self.download_data_from_gmail()
@@ -176,47 +574,20 @@ class Okofen():
         self.get_day_list()
         
     def data_format(self):
-        self.data['datetime']=pd.to_datetime(self.data['Datum ']+' '+self.data['Zeit '],format="%d.%m.%Y %H:%M:%S")
-        self.data = self.data.sort_values(['datetime'],ascending = [True]) # type: ignore
-        dico = {
-            'datetime':'datetime',
-            'AT [°C]': 'T°C Extérieure',
-            'ATakt [°C]': 'ATakt [°C]',
-            'PE1 KT[°C]': 'T°C Chaudière',
-            'PE1 KT_SOLL[°C]': 'T°C Chaudière Consigne',
-            'PE1_BR1 ': 'OKO 1 - Contact Brûleur (On/Off)',
-            'HK1 VL Ist[°C]': 'T°C Départ',
-            'HK1 VL Soll[°C]': 'T°C Départ Consigne',
-            'HK1 RT Ist[°C]': 'T°C Ambiante',
-            'HK1 RT Soll[°C]': 'T°C Ambiante Consigne',
-            'HK1 Pumpe': 'Circulateur Chauffage (On/Off)',
-            'HK1 Status':"Status Chauff.",
-            'WW1 EinT Ist[°C]':'T°C ECS',
-            'WW1 AusT Ist[°C]':'T°C ECS (arret)',
-            'WW1 Soll[°C]':'T°C ECS Consigne',
-            'WW1 Pumpe':'Circulateur ECS',
-            'WW1 Status':'Status ESC',
-            'PE1 Modulation[%]':'PE1 Modulation[%]',
-            'PE1 FRT Ist[°C]':'T°C Flamme',
-            'PE1 FRT Soll[°C]':'T°C Flamme Consigne',
-            'PE1 Fuellstand[kg]' : 'Niveau Sillo kg',
-            'PE1 Fuellstand ZWB[kg]' : 'Niveau tremis kg',
-        }
-        for f in self.data.columns:
-            if f in dico:
-                self.print(f"'{f}' : '{dico[f]}'") # type: ignore
-            else:
-                self.print(f"'{f}' : ''")
-                
-        self.data=self.data[dico.keys()].rename(columns=dico) # type: ignore
-        self.data = self.data.replace(',','.', regex=True)
-        cols = self.data.columns[1:]
-        self.data=pd.DataFrame(data = self.data[cols].to_numpy(), index=self.data['datetime'], columns=cols,dtype='float')
-
+        if self.store is not None:
+            if not self.lazy:
+                self.data = self.store.read()
+            return
+        if self._data is None:
+            self._data = self.load_data()
+        elif not isinstance(self._data.index, pd.DatetimeIndex):
+            self.data = format_okofen_data(self._data, self.print)
 
     def select_data(self,d:datetime, nb_days = 1):
         first_day = datetime(d.year,d.month,d.day,3,0,0)
         last_day = first_day+timedelta(days=nb_days)
+        if self.store is not None:
+            return self.store.read(first_day, last_day)
         return self.data.loc[first_day:last_day]
     
     def select_data_by_days(self, start_date:str, end_date:str)->pd.DataFrame:
@@ -224,12 +595,24 @@ class Okofen():
         end = parser.parse(end_date,dayfirst=True)
         first_day = datetime(start.year,start.month,start.day,3,0,0)
         last_day = datetime(end.year,end.month,end.day,2,59,59)
+        if self.store is not None:
+            return self.store.read(first_day, last_day)
         return self.data.loc[first_day:last_day]
     
     def get_day_list(self):
-        self.days= []
-        for d in self.data.index:
-            date = d.date() # type: ignore
-            if date not in self.days:
-                self.days.append(date)
+        self.days = self.get_day_index().days()
         return self.days
+
+def open_okofen(config, storage:str = 'hdf5', lazy:bool|None = None, verbose:int = 0):
+    '''
+    Okofen en lecture seule pour l'analyse (notebook, processus web): aucune connexion
+    mail, rien n'est lu avant le premier usage; fonctionne hors ligne.
+    Le stockage n'est jamais créé: FileNotFoundError s'il n'existe pas encore.
+    config: OkofenConfig ou chemin du fichier config_okofen.json.
+    lazy: par défaut, True pour les stockages interrogeables ('hdf5_table', 'parquet', 'memmap').
+    '''
+    if isinstance(config, str):
+        config = read_OkofenConfig(config)
+    if lazy is None:
+        lazy = storage != 'hdf5'
+    return Okofen(config, verbose=verbose, storage=storage, lazy=lazy, read_only=True)
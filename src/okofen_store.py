@@ -0,0 +1,357 @@
+import datetime
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+'''
+Stockage des mesures Okofen mises en forme (index datetime, colonnes float32
+aux noms de OKOFEN_DICO), en remplacement du fichier HDF5 monolithique
+0-okofen_db-vendome.h5 qui est relu et réécrit en entier à chaque mise à jour.
+
+Chaque stockage expose la même interface:
+- append(frame): ajoute des lignes; celles dont le datetime existe déjà sont remplacées
+- read(start=None, end=None, columns=None): lignes de start à end (inclus), colonnes choisies
+- is_empty(), last_timestamp()
+'''
+
+# Un jour est complet au-delà de ce nombre de lignes (une mesure par minute)
+COMPLETE_DAY_ROWS = 1400
+
+class DayIndex():
+    '''
+    Index annexe (JSON) d'un stockage: une entrée par jour calendaire avec le nombre
+    de lignes, le premier et le dernier horodatage et la complétude. Le dernier jour
+    complet et la liste des jours s'en déduisent sans lire les mesures.
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.loaded = False
+        self.load()
+
+    def load(self):
+        self.entries = {}
+        self.loaded = False
+        if not os.path.isfile(self.path):
+            return self
+        try:
+            with open(self.path) as fp:
+                self.entries = json.load(fp).get('days', {})
+            self.loaded = True
+        except (OSError, ValueError) as e:
+            print(f"ErrorType : {type(e).__name__}, Error : {e}")
+        return self
+
+    def save(self):
+        tmp_file = self.path + '.tmp'
+        with open(tmp_file, 'w') as fp:
+            json.dump({'days': dict(sorted(self.entries.items()))}, fp, indent=1)
+        os.replace(tmp_file, self.path)
+        self.loaded = True
+
+    def update(self, index, days=None):
+        '''
+        Recalcule les jours de `days` (par défaut: ceux présents dans `index`) à partir
+        de l'index datetime `index`, qui doit contenir toutes les lignes de ces jours
+        '''
+        index = pd.DatetimeIndex(index)
+        for day in (days if days is not None else ()):
+            self.entries.pop(day.isoformat(), None)
+        if len(index) == 0:
+            return
+        stats = pd.Series(index, index=index.normalize()).groupby(level=0).agg(['count', 'min', 'max'])
+        for day, (count, first, last) in zip(stats.index, stats.itertuples(index=False)):
+            self.entries[day.date().isoformat()] = {
+                'rows': int(count),
+                'first': first.isoformat(),
+                'last': last.isoformat(),
+                'complete': bool(count > COMPLETE_DAY_ROWS),
+            }
+
+    def rebuild(self, index):
+        self.entries = {}
+        self.update(index)
+        self.save()
+
+    def days(self):
+        return [datetime.date.fromisoformat(d) for d in sorted(self.entries)]
+
+    def lastest_complete_date(self):
+        '''
+        Dernier jour complet, (année, mois, jour) comme find_lastest_date, ou None
+        '''
+        complete = [d for d, e in self.entries.items() if e['complete']]
+        if not complete:
+            return None
+        d = datetime.date.fromisoformat(max(complete))
+        return d.year, d.month, d.day
+
+STORE_DIRS = {
+    'parquet': 'okofen_parquet',
+    'hdf5_table': 'okofen_table.h5',
+    'memmap': 'okofen_memmap',
+}
+
+def _prepare_root(root, read_only):
+    '''
+    Crée le répertoire d'un stockage; en lecture seule, rien n'est créé et un
+    répertoire absent est une erreur
+    '''
+    if not read_only:
+        os.makedirs(root, exist_ok=True)
+    elif not os.path.isdir(root):
+        raise FileNotFoundError(f"Store not found: {root} (read-only, run an update first)")
+
+class ParquetStore():
+    '''
+    Une partition Parquet par mois (AAAA-MM.parquet). Une mise à jour ne réécrit
+    que les mois touchés; une lecture ne charge que les mois et colonnes demandés.
+    Nécessite pyarrow. En lecture seule, le répertoire doit déjà exister.
+    '''
+    def __init__(self, root, read_only=False):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("The parquet store needs pyarrow (pip install pyarrow)") from e
+        self.root = root
+        _prepare_root(root, read_only)
+
+    def _path(self, month):
+        return os.path.join(self.root, f'{month}.parquet')
+
+    def months(self):
+        '''
+        Partitions présentes, triées (pd.Period mensuels)
+        '''
+        names = [os.path.basename(p)[:-len('.parquet')] for p in glob.glob(os.path.join(self.root, '*.parquet'))]
+        return sorted(pd.Period(n, freq='M') for n in names)
+
+    def is_empty(self):
+        return not self.months()
+
+    def last_timestamp(self):
+        months = self.months()
+        if not months:
+            return None
+        index = pd.read_parquet(self._path(months[-1]), columns=[]).index
+        return index.max() if len(index) else None
+
+    def append(self, frame):
+        if frame.shape[0] == 0:
+            return []
+        frame = frame.astype('float32').rename_axis('datetime')
+        touched = []
+        for month, part in frame.groupby(frame.index.to_period('M')):
+            path = self._path(month)
+            if os.path.isfile(path):
+                old = pd.read_parquet(path)
+                part = pd.concat([old[~old.index.isin(part.index)], part])
+            part = part[~part.index.duplicated(keep='last')].sort_index()
+            tmp_file = path + '.tmp'
+            part.to_parquet(tmp_file, engine='pyarrow', index=True)
+            os.replace(tmp_file, path)
+            touched.append(month)
+        return touched
+
+    def read(self, start=None, end=None, columns=None):
+        months = self.months()
+        if start is not None:
+            months = [m for m in months if m.end_time >= pd.Timestamp(start)]
+        if end is not None:
+            months = [m for m in months if m.start_time <= pd.Timestamp(end)]
+        filters = []
+        if start is not None:
+            filters.append(('datetime', '>=', pd.Timestamp(start)))
+        if end is not None:
+            filters.append(('datetime', '<=', pd.Timestamp(end)))
+        frames = [
+            pd.read_parquet(self._path(m), columns=columns, filters=filters or None)
+            for m in months
+        ]
+        if not frames:
+            return pd.DataFrame(columns=columns or [], index=pd.DatetimeIndex([], name='datetime'), dtype='float32')
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
+
+class HDF5TableStore():
+    '''
+    Fichier HDF5 au format table (clé 'data'), index datetime indexé (CSI):
+    les ajouts n'écrivent que les nouvelles lignes et les lectures par dates
+    sont des requêtes `where`, sans charger tout le fichier.
+    '''
+    key = 'data'
+
+    def __init__(self, path, complib='blosc', complevel=5, read_only=False):
+        if read_only and not os.path.isfile(path):
+            raise FileNotFoundError(f"Store not found: {path} (read-only, run an update first)")
+        self.path = path
+        self.complib = complib
+        self.complevel = complevel
+
+    def _open(self, mode='r'):
+        return pd.HDFStore(self.path, mode=mode, complib=self.complib, complevel=self.complevel)
+
+    def is_empty(self):
+        if not os.path.isfile(self.path):
+            return True
+        with self._open() as st:
+            return self.key not in st or st.get_storer(self.key).nrows == 0
+
+    def last_timestamp(self):
+        if self.is_empty():
+            return None
+        with self._open() as st:
+            return st.select_column(self.key, 'index').max()
+
+    @staticmethod
+    def _where(start, end):
+        where = []
+        if start is not None:
+            where.append(f'index >= Timestamp("{pd.Timestamp(start).isoformat()}")')
+        if end is not None:
+            where.append(f'index <= Timestamp("{pd.Timestamp(end).isoformat()}")')
+        return where or None
+
+    def append(self, frame):
+        if frame.shape[0] == 0:
+            return []
+        frame = frame.astype('float32').rename_axis('datetime')
+        frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+        start, end = frame.index[0], frame.index[-1]
+        with self._open('a') as st:
+            if self.key in st:
+                # Lignes déjà présentes sur la période: remplacées par les nouvelles
+                where = self._where(start, end)
+                old = st.select(self.key, where=where)
+                if old.shape[0]:
+                    frame = pd.concat([old[~old.index.isin(frame.index)], frame]).sort_index()
+                    st.remove(self.key, where=where)
+            st.append(self.key, frame, format='table', index=False)
+            st.create_table_index(self.key, columns=['index'], optlevel=9, kind='full')
+        return [start, end]
+
+    def read(self, start=None, end=None, columns=None):
+        empty = pd.DataFrame(columns=columns or [], index=pd.DatetimeIndex([], name='datetime'), dtype='float32')
+        if not os.path.isfile(self.path):
+            return empty
+        with self._open() as st:
+            if self.key not in st:
+                return empty
+            if columns is not None and len(columns) == 0:
+                # Index seul: une colonne lue puis écartée
+                first = st.get_storer(self.key).non_index_axes[0][1][:1]
+                data = st.select(self.key, where=self._where(start, end), columns=first)[[]]
+            else:
+                data = st.select(self.key, where=self._where(start, end), columns=columns)
+        if not data.index.is_monotonic_increasing:
+            data = data.sort_index()
+        return data
+
+class MemmapStore():
+    '''
+    Colonnes contiguës sur disque, ouvertes avec numpy.memmap: datetime.i64 (horodatages
+    en ns, triés) et un fichier float32 par mesure (m00.f32, ...). meta.json donne
+    les noms des colonnes et le nombre de lignes valides, écrit après les données.
+    Une sélection par dates est une tranche trouvée par searchsorted: pas de parsing
+    au démarrage, et les pages sont partagées (cache système) entre processus.
+    En lecture seule, le répertoire doit déjà exister.
+    '''
+    def __init__(self, root, read_only=False):
+        self.root = root
+        _prepare_root(root, read_only)
+        self.meta_file = os.path.join(root, 'meta.json')
+
+    def _meta(self):
+        if not os.path.isfile(self.meta_file):
+            return {'columns': [], 'rows': 0}
+        with open(self.meta_file) as fp:
+            return json.load(fp)
+
+    def _save_meta(self, meta):
+        tmp_file = self.meta_file + '.tmp'
+        with open(tmp_file, 'w') as fp:
+            json.dump(meta, fp, indent=1, ensure_ascii=False)
+        os.replace(tmp_file, self.meta_file)
+
+    def _file(self, meta, name):
+        if name == 'datetime':
+            return os.path.join(self.root, 'datetime.i64')
+        return os.path.join(self.root, f'm{meta["columns"].index(name):02d}.f32')
+
+    def _map(self, meta, name, rows):
+        dtype = np.int64 if name == 'datetime' else np.float32
+        return np.memmap(self._file(meta, name), dtype=dtype, mode='r', shape=(rows,))
+
+    def is_empty(self):
+        return self._meta()['rows'] == 0
+
+    def last_timestamp(self):
+        meta = self._meta()
+        if meta['rows'] == 0:
+            return None
+        return pd.Timestamp(int(self._map(meta, 'datetime', meta['rows'])[-1]))
+
+    def append(self, frame):
+        if frame.shape[0] == 0:
+            return []
+        frame = frame.astype('float32')
+        frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+        meta = self._meta()
+        if not meta['columns']:
+            meta['columns'] = [str(c) for c in frame.columns]
+        elif list(frame.columns) != meta['columns']:
+            frame = frame.reindex(columns=meta['columns'])
+        rows = meta['rows']
+        new_ts = frame.index.values.astype('datetime64[ns]').view(np.int64)
+        cut = rows
+        if rows:
+            # Lignes stockées à partir du premier nouvel horodatage: fusionnées puis réécrites
+            cut = int(np.searchsorted(self._map(meta, 'datetime', rows), new_ts[0], side='left'))
+        if cut < rows:
+            old_ts = np.array(self._map(meta, 'datetime', rows)[cut:])
+            old = pd.DataFrame(
+                {c: np.array(self._map(meta, c, rows)[cut:]) for c in meta['columns']},
+                index=pd.DatetimeIndex(old_ts.view('datetime64[ns]')),
+            )
+            frame = pd.concat([old[~old.index.isin(frame.index)], frame]).sort_index()
+            new_ts = frame.index.values.astype('datetime64[ns]').view(np.int64)
+            meta['rows'] = cut
+            self._save_meta(meta)
+        for name in ['datetime', *meta['columns']]:
+            path = self._file(meta, name)
+            values = new_ts if name == 'datetime' else frame[name].to_numpy(dtype=np.float32)
+            with open(path, 'ab') as fp:
+                fp.truncate(cut * values.itemsize)
+                fp.write(np.ascontiguousarray(values).tobytes())
+        meta['rows'] = cut + len(new_ts)
+        self._save_meta(meta)
+        return [frame.index[0], frame.index[-1]]
+
+    def arrays(self, start=None, end=None, columns=None):
+        '''
+        Tranche [start, end] sans copie: (index datetime64[ns], {colonne: memmap float32})
+        '''
+        meta = self._meta()
+        rows = meta['rows']
+        names = meta['columns'] if columns is None else list(columns)
+        if rows == 0:
+            return np.empty(0, dtype='datetime64[ns]'), {c: np.empty(0, dtype=np.float32) for c in names}
+        ts = self._map(meta, 'datetime', rows)
+        i0 = 0 if start is None else int(np.searchsorted(ts, pd.Timestamp(start).value, side='left'))
+        i1 = rows if end is None else int(np.searchsorted(ts, pd.Timestamp(end).value, side='right'))
+        return ts[i0:i1].view('datetime64[ns]'), {c: self._map(meta, c, rows)[i0:i1] for c in names}
+
+    def read(self, start=None, end=None, columns=None):
+        index, values = self.arrays(start, end, columns)
+        return pd.DataFrame(values, index=pd.DatetimeIndex(index, name='datetime'), columns=list(values))
+
+def open_store(kind, data_dir, read_only=False):
+    if kind == 'parquet':
+        return ParquetStore(os.path.join(data_dir, STORE_DIRS[kind]), read_only=read_only)
+    if kind == 'hdf5_table':
+        return HDF5TableStore(os.path.join(data_dir, STORE_DIRS[kind]), read_only=read_only)
+    if kind == 'memmap':
+        return MemmapStore(os.path.join(data_dir, STORE_DIRS[kind]), read_only=read_only)
+    raise ValueError(f"Unknown storage: {kind} (expected one of {', '.join(STORE_DIRS)})")